@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Seeded synthetic inputs with the schemas of the course datasets.
+
+Every generator takes the number of rows and a seed and returns the same frame
+for the same arguments, so benchmark runs on different commits time identical
+inputs. Column names, dtypes and value ranges follow the real files:
+
+- data_input          goit_pa_hm_1/data_input.csv (dataset, value)
+- campaign_days       goit-pa_final_project/control_group.csv / test_group.csv
+- superstore          Sample - Superstore.xls (goit_pa_hm_3, goit_pa_hm__6)
+- user_data           goit_pa_hm_8/user_data_2000.csv
+- conversions         user-level binary conversions of two variants (goit_pa_hm_7)
+
+Sizes are meant to run from 10^4 to 10^8 rows; all columns are drawn with
+vectorised numpy calls, string columns via categorical codes.
+"""
+
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SIZES = (10**4, 10**5, 10**6, 10**7, 10**8)
+
+# One row per (group, day) and datetime64[ns] ends in April 2262, so the campaign
+# schema cannot hold more days than this per group
+CAMPAIGN_START = pd.Timestamp('1700-01-01')
+MAX_CAMPAIGN_DAYS = (pd.Timestamp('2262-04-11') - CAMPAIGN_START).days
+MAX_CAMPAIGN_ROWS = 2 * MAX_CAMPAIGN_DAYS
+
+CAMPAIGN_COLUMNS = ['Campaign Name', 'Date', 'Spend [USD]', '# of Impressions', 'Reach',
+                    '# of Website Clicks', '# of Searches', '# of View Content',
+                    '# of Add to Cart', '# of Purchase']
+
+SUB_CATEGORIES = {
+    'Furniture': ['Bookcases', 'Chairs', 'Furnishings', 'Tables'],
+    'Office Supplies': ['Appliances', 'Art', 'Binders', 'Envelopes', 'Fasteners',
+                        'Labels', 'Paper', 'Storage', 'Supplies'],
+    'Technology': ['Accessories', 'Copiers', 'Machines', 'Phones'],
+}
+SEGMENTS = ['Consumer', 'Corporate', 'Home Office']
+SHIP_MODES = ['Standard Class', 'Second Class', 'First Class', 'Same Day']
+REGIONS = ['Central', 'East', 'South', 'West']
+DISCOUNTS = np.array([0.0, 0.1, 0.15, 0.2, 0.3, 0.32, 0.4, 0.45, 0.5, 0.6, 0.7, 0.8])
+
+
+def _labels(codes: np.ndarray, categories: Sequence[str]) -> pd.Series:
+    """String column from integer codes (same `str` dtype as pd.read_csv / read_excel)."""
+    return pd.Series(pd.Categorical.from_codes(codes, categories=pd.Index(categories))).astype('str')
+
+
+def _numbered(prefix: str, n: int, width: int = 5) -> pd.Index:
+    return prefix + pd.Index(np.arange(n)).astype('str').str.zfill(width)
+
+
+def data_input(rows: int, seed: int = 0, datasets: int = 3) -> pd.DataFrame:
+    """`dataset,value` rows: a symmetric, a right-skewed and a discrete dataset, repeated."""
+    rng = np.random.default_rng(seed)
+    dataset = rng.integers(0, datasets, rows)
+    kind = dataset % 3
+    value = np.where(
+        kind == 0, rng.normal(62.5, 15, rows).round(),
+        np.where(kind == 1, rng.lognormal(2.3, 0.9, rows).round(), rng.integers(1, 9, rows)),
+    )
+    return pd.DataFrame({
+        'dataset': _labels(dataset, [f'Dataset {i + 1}' for i in range(datasets)]),
+        'value': value.astype(np.int64),
+    })
+
+
+def campaign_days(days: int, seed: int = 0, group: str = 'Control') -> pd.DataFrame:
+    """
+    Daily campaign rows of one group in the control_group.csv schema.
+
+    Counters are nested binomial draws, so the guardrails hold (reach and
+    clicks <= impressions, purchases <= add to cart <= view content); the Test
+    group gets a higher CTR and cart conversion, like the real experiment.
+    """
+    if days > MAX_CAMPAIGN_DAYS:
+        raise ValueError(f"campaign_days supports at most {MAX_CAMPAIGN_DAYS} days per group, got {days}")
+    rng = np.random.default_rng(seed)
+    ctr, cart_to_purchase = (0.08, 0.40) if group == 'Control' else (0.10, 0.55)
+    impressions = rng.poisson(100_000, days)
+    clicks = rng.binomial(impressions, ctr)
+    searches = rng.binomial(clicks, 0.35)
+    view_content = rng.binomial(searches, 0.85)
+    add_to_cart = rng.binomial(view_content, 0.55)
+    return pd.DataFrame({
+        'Campaign Name': f'{group} Campaign',
+        'Date': pd.date_range(CAMPAIGN_START, periods=days, freq='D'),
+        'Spend [USD]': rng.normal(2300, 350, days).round().clip(1).astype(np.int64),
+        '# of Impressions': impressions,
+        'Reach': rng.binomial(impressions, 0.75),
+        '# of Website Clicks': clicks,
+        '# of Searches': searches,
+        '# of View Content': view_content,
+        '# of Add to Cart': add_to_cart,
+        '# of Purchase': rng.binomial(add_to_cart, cart_to_purchase),
+    }, columns=CAMPAIGN_COLUMNS)
+
+
+def write_campaign_csvs(rows: int, folder: Path, seed: int = 0) -> Tuple[Path, Path]:
+    """Split `rows` days between Control and Test and write both semicolon CSVs like the originals."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for offset, group in enumerate(('Control', 'Test')):
+        frame = campaign_days(rows // 2 + (rows % 2) * (1 - offset), seed + offset, group)
+        path = folder / f'{group.lower()}_group.csv'
+        frame.to_csv(path, sep=';', index=False, date_format='%d.%m.%Y')
+        paths.append(path)
+    return paths[0], paths[1]
+
+
+def superstore(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Order lines in the Sample - Superstore schema.
+
+    About two lines per order and twelve per customer; order dates span four
+    years, ship dates follow within a week.
+    """
+    rng = np.random.default_rng(seed)
+    n_orders = max(1, rows // 2)
+    n_customers = max(1, rows // 12)
+    n_products = max(1, rows // 5)
+
+    order = np.sort(rng.integers(0, n_orders, rows))
+    order_day = rng.integers(0, 4 * 365, n_orders)
+    order_date = pd.Timestamp('2014-01-01') + pd.to_timedelta(order_day[order], unit='D')
+    ship_date = order_date + pd.to_timedelta(rng.integers(0, 8, rows), unit='D')
+    customer = rng.integers(0, n_customers, n_orders)[order]
+
+    pairs = [(category, sub) for category, subs in SUB_CATEGORIES.items() for sub in subs]
+    product = rng.integers(0, n_products, rows)
+    pair = product % len(pairs)
+    category_codes = np.array([list(SUB_CATEGORIES).index(c) for c, _ in pairs])[pair]
+
+    sales = rng.lognormal(4.0, 1.3, rows).round(3)
+    quantity = rng.integers(1, 15, rows)
+    discount = DISCOUNTS[rng.integers(0, len(DISCOUNTS), rows)]
+    profit = (sales * (0.3 - discount) + rng.normal(0, 0.05, rows) * sales).round(4)
+
+    order_years = order_date.year.to_numpy()
+    return pd.DataFrame({
+        'Row ID': np.arange(1, rows + 1),
+        'Order ID': 'US-' + pd.Index(order_years).astype('str') + '-' + _numbered('', n_orders, 6)[order],
+        'Order Date': order_date,
+        'Ship Date': ship_date,
+        'Ship Mode': _labels(rng.integers(0, len(SHIP_MODES), n_orders)[order], SHIP_MODES),
+        'Customer ID': _labels(customer, _numbered('CU-', n_customers)),
+        'Customer Name': _labels(customer, _numbered('Customer ', n_customers)),
+        'Segment': _labels(rng.integers(0, len(SEGMENTS), n_customers)[customer], SEGMENTS),
+        'Country/Region': 'United States',
+        'City': _labels(customer % 500, _numbered('City ', 500, 3)),
+        'State/Province': _labels(customer % 50, _numbered('State ', 50, 2)),
+        'Postal Code': _labels(customer % 650, _numbered('', 650)),
+        'Region': _labels(customer % len(REGIONS), REGIONS),
+        'Product ID': _labels(product, _numbered('PRD-', n_products, 8)),
+        'Category': _labels(category_codes, list(SUB_CATEGORIES)),
+        'Sub-Category': _labels(pair, [sub for _, sub in pairs]),
+        'Product Name': _labels(product, _numbered('Product ', n_products, 8)),
+        'Sales': sales,
+        'Quantity': quantity,
+        'Discount': discount,
+        'Profit': profit,
+    })
+
+
+def user_data(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Users in the user_data_2000.csv schema.
+
+    Assignment to Test depends on region and session time, so propensity
+    scores are not flat and matching has work to do.
+    """
+    rng = np.random.default_rng(seed)
+    region = rng.integers(0, 3, rows)
+    session = rng.gamma(4.0, 3.0, rows).round().clip(1).astype(np.int64)
+    logit = -0.4 + 0.3 * region + 0.03 * (session - 12)
+    test = rng.random(rows) < 1 / (1 + np.exp(-logit))
+    return pd.DataFrame({
+        'User_ID': np.arange(101, 101 + rows),
+        'Group': np.where(test, 'Test', 'Control'),
+        'Retention_7d': (rng.random(rows) < 0.45 + 0.05 * test).astype(np.int64),
+        'Retention_30d': (rng.random(rows) < 0.30 + 0.04 * test).astype(np.int64),
+        'Avg_Session_Time': session,
+        'Region': _labels(region, ['Asia', 'EU', 'US']),
+    })
+
+
+def conversions(rows: int, seed: int = 0, rates: Tuple[float, float] = (0.10, 0.11)) -> pd.DataFrame:
+    """One row per user of an A/B test: variant and whether the user converted."""
+    rng = np.random.default_rng(seed)
+    variant = rng.integers(0, 2, rows)
+    return pd.DataFrame({
+        'Variant': _labels(variant, ['A', 'B']),
+        'Converted': (rng.random(rows) < np.asarray(rates)[variant]).astype(np.int64),
+    })
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis steps that only exist as notebook cells, as importable functions.
+
+The propensity score matching of goit_pa_hm_8/Fefelov_PA_assignment_8.ipynb
+(cells "ШАГ 1-2" and "ПІДХІД 1") is reproduced step for step so the benchmark
+times the same work as the notebook; keep the two in sync when the notebook
+changes. Requires scikit-learn, like the notebook.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+
+def propensity_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """Treatment flag, one-hot regions, scaled session time, logistic propensity score and common support."""
+    df_psm = df.copy()
+    df_psm['Treatment'] = (df_psm['Group'] == 'Test').astype(int)
+    region_dummies = pd.get_dummies(df_psm['Region'], prefix='Region', drop_first=False)
+    df_psm = pd.concat([df_psm, region_dummies], axis=1)
+    df_psm['Session_Time_Scaled'] = StandardScaler().fit_transform(df_psm[['Avg_Session_Time']])
+
+    feature_cols = ['Session_Time_Scaled', 'Region_Asia', 'Region_EU', 'Region_US']
+    X = df_psm[feature_cols].values
+    y = df_psm['Treatment'].values
+    logit_model = LogisticRegression(random_state=42, max_iter=1000, solver='lbfgs')
+    logit_model.fit(X, y)
+    df_psm['propensity_score'] = logit_model.predict_proba(X)[:, 1]
+
+    ps_test = df_psm.loc[df_psm['Treatment'] == 1, 'propensity_score']
+    ps_control = df_psm.loc[df_psm['Treatment'] == 0, 'propensity_score']
+    df_psm['in_support'] = (
+        (df_psm['propensity_score'] >= max(ps_test.min(), ps_control.min())) &
+        (df_psm['propensity_score'] <= min(ps_test.max(), ps_control.max()))
+    )
+
+    epsilon = 1e-10  # avoids log(0)
+    df_psm['ps_logit'] = np.log(
+        (df_psm['propensity_score'] + epsilon) / (1 - df_psm['propensity_score'] + epsilon)
+    )
+    return df_psm
+
+
+def nearest_neighbor_matching_with_caliper(data, ps_col, treatment_col, caliper) -> List[Tuple]:
+    """1:1 nearest neighbour matching within a caliper, without replacement (notebook version)."""
+    treated_idx = data[data[treatment_col] == 1].index.tolist()
+    control_idx = data[data[treatment_col] == 0].index.tolist()
+
+    treated_ps = data.loc[treated_idx, ps_col].values.reshape(-1, 1)
+    control_ps = data.loc[control_idx, ps_col].values.reshape(-1, 1)
+
+    nn = NearestNeighbors(n_neighbors=1, metric='euclidean')
+    nn.fit(control_ps)
+    distances, indices = nn.kneighbors(treated_ps)
+
+    matched_pairs = []
+    matched_control_idx = set()
+    for i, (dist, idx) in enumerate(zip(distances.flatten(), indices.flatten())):
+        if dist <= caliper and idx not in matched_control_idx:
+            matched_pairs.append((treated_idx[i], control_idx[idx]))
+            matched_control_idx.add(idx)
+    return matched_pairs
+
+
+def psm_matching(df: pd.DataFrame) -> List[Tuple]:
+    """Propensity scores, then matching on logit(PS) within common support with the 0.2 x SD caliper."""
+    df_psm = propensity_scores(df)
+    df_psm = df_psm[df_psm['in_support']].copy()
+    caliper_logit = 0.2 * df_psm['ps_logit'].std()
+    return nearest_neighbor_matching_with_caliper(df_psm, 'ps_logit', 'Treatment', caliper_logit)
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the analysis scripts of the course folders.
+
+Each benchmark generates a seeded synthetic input with the schema of the real
+dataset (generators.py), imports the analysis code from its folder and times
+it at every requested size:
+
+- hm1_stats / hm1_stats_approx  calculations.calculate_metrics (goit_pa_hm_1)
+- superstore_eda                PA_assignment_3_analysis stages without plots/export (goit_pa_hm_3)
+- superstore_rfm                rfm.build_customer_features + rfm_scores (goit_pa_hm_3)
+- superstore_clusters           clustering.fit_minibatch_kmeans + assignment of every customer (goit_pa_hm_3)
+- superstore_basket             basket.build_basket_matrix + association_rules on Product ID (goit_pa_hm_3)
+- ltv_cohorts                   prepare_cohorts + ltv_by_age + ltv_by_calendar_year (goit_pa_hm__6)
+- ab_analyzer                   ABTestAnalyzer.run_full_analysis, quiet (goit-pa_final_project)
+- psm_matching                  propensity score matching of the hm_8 notebook (notebook_steps.py)
+- ztest_helpers                 ci_wald + two_proportion_z_test on user-level rows (goit_pa_hm_7)
+
+Runs go through profiling.Profiler, so the stages instrumented inside the
+scripts are stored as a per-benchmark breakdown. Results are stored per
+commit in results/<commit>.json (results/<commit>-dirty.json for a tree with
+uncommitted changes); `--compare REV` prints the time ratio against another
+commit and the empirical scaling exponent (slope of log time vs log rows), so
+a change that turns a linear stage into a quadratic one shows up even when
+the small sizes still look fast.
+
+Usage:
+    python run_benchmarks.py                                 # all benchmarks, 10^4 and 10^5 rows
+    python run_benchmarks.py --sizes 1e4 1e5 1e6 --only superstore_eda ltv_cohorts
+    python run_benchmarks.py --compare HEAD~1
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+ROOT = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / 'results'
+DEFAULT_SIZES = (10**4, 10**5)
+
+sys.path.insert(0, str(ROOT / 'goit-pa_final_project'))
+
+import generators  # noqa: E402
+from profiling import Profiler  # noqa: E402
+
+
+def import_from(folder: str, module: str):
+    """Import a script module from its course folder (the folders are not packages)."""
+    path = str(ROOT / folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module)
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+# setup(rows, seed, workdir) generates the input and returns the timed callable
+
+def hm1_stats(rows: int, seed: int, workdir: Path, approximate: bool = False) -> Callable[[], Any]:
+    calculations = import_from('goit_pa_hm_1', 'calculations')
+    raw_df = generators.data_input(rows, seed).sort_values(['dataset', 'value']).reset_index(drop=True)
+    return lambda: calculations.calculate_metrics(raw_df, approximate)
+
+
+def hm1_stats_approx(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    return hm1_stats(rows, seed, workdir, approximate=True)
+
+
+def superstore_eda(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    pa3 = import_from('goit_pa_hm_3', 'PA_assignment_3_analysis')
+    raw = generators.superstore(rows, seed)
+
+    def run():
+        df = pa3.preprocess(pa3.optimize_dtypes(raw))  # typed copy, raw stays untouched
+        pa3.analyze_seasonality(df)
+        pa3.detect_anomalies(df)
+        df, _ = pa3.segment_customers(df)
+        return pa3.describe_segments(df)
+    return run
+
+
+def superstore_rfm(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    rfm = import_from('goit_pa_hm_3', 'rfm')
+    pa3 = import_from('goit_pa_hm_3', 'PA_assignment_3_analysis')
+    df = pa3.preprocess(pa3.optimize_dtypes(generators.superstore(rows, seed)))
+
+    def run():
+        features = rfm.build_customer_features(df)
+        return features.rfm_scores()
+    return run
+
+
+def superstore_clusters(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    rfm = import_from('goit_pa_hm_3', 'rfm')
+    clustering = import_from('goit_pa_hm_3', 'clustering')
+    pa3 = import_from('goit_pa_hm_3', 'PA_assignment_3_analysis')
+    features = rfm.build_customer_features(pa3.preprocess(pa3.optimize_dtypes(generators.superstore(rows, seed))))
+
+    def run():
+        matrix, names = clustering.customer_feature_matrix(features)
+        model, labels = clustering.fit_minibatch_kmeans(matrix, names, n_clusters=5)
+        return labels
+    return run
+
+
+def superstore_basket(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    basket = import_from('goit_pa_hm_3', 'basket')
+    raw = generators.superstore(rows, seed)[['Order ID', 'Product ID']]
+
+    def run():
+        baskets = basket.build_basket_matrix(raw, basket='Order ID', item='Product ID')
+        return basket.association_rules(baskets, min_count=2, top_k=10)
+    return run
+
+
+def ltv_cohorts(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    ltv = import_from('goit_pa_hm__6', 'generate_ltv_cohort')
+    raw = generators.superstore(rows, seed)
+
+    def run():
+        df = ltv.prepare_cohorts(raw)
+        return ltv.ltv_by_age(df), ltv.ltv_by_calendar_year(df)
+    return run
+
+
+def ab_analyzer(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    analysis = import_from('goit-pa_final_project', 'final_project_analysis')
+    control_path, test_path = generators.write_campaign_csvs(rows, workdir, seed)
+
+    def run():
+        analyzer = analysis.ABTestAnalyzer(control_path, test_path, reporter='quiet')
+        analyzer.run_full_analysis()
+        analyzer.guardrail_report.raise_if_failed()  # a stopped run must not look fast
+        return analyzer
+    return run
+
+
+def psm_matching(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    notebook_steps = importlib.import_module('notebook_steps')
+    df = generators.user_data(rows, seed)
+    return lambda: notebook_steps.psm_matching(df)
+
+
+def ztest_helpers(rows: int, seed: int, workdir: Path) -> Callable[[], Any]:
+    hm7 = import_from('goit_pa_hm_7', 'generate_assignment_7_xls')
+    df = generators.conversions(rows, seed)
+
+    def run():
+        counts = df.groupby('Variant')['Converted'].agg(['mean', 'count'])
+        (p_a, n_a), (p_b, n_b) = counts.itertuples(index=False, name=None)
+        return hm7.ci_wald(p_a, n_a), hm7.ci_wald(p_b, n_b), hm7.two_proportion_z_test(p_a, n_a, p_b, n_b)
+    return run
+
+
+@dataclass(slots=True)
+class Benchmark:
+    name: str
+    setup: Callable[[int, int, Path], Callable[[], Any]]
+    max_rows: Optional[int] = None
+
+
+BENCHMARKS = {b.name: b for b in [
+    Benchmark('hm1_stats', hm1_stats),
+    Benchmark('hm1_stats_approx', hm1_stats_approx),
+    Benchmark('superstore_eda', superstore_eda),
+    Benchmark('superstore_rfm', superstore_rfm),
+    Benchmark('superstore_clusters', superstore_clusters),
+    Benchmark('superstore_basket', superstore_basket),
+    Benchmark('ltv_cohorts', ltv_cohorts),
+    Benchmark('ab_analyzer', ab_analyzer, max_rows=generators.MAX_CAMPAIGN_ROWS),
+    Benchmark('psm_matching', psm_matching),
+    Benchmark('ztest_helpers', ztest_helpers),
+]}
+
+
+# ============================================================================
+# RUNNING
+# ============================================================================
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Timing of one benchmark at one size; seconds / cpu / memory are of the fastest repeat."""
+
+    benchmark: str
+    rows: int
+    status: str  # ok / skipped / failed
+    seconds: Optional[float] = None
+    mean_seconds: Optional[float] = None
+    cpu_seconds: Optional[float] = None
+    setup_seconds: Optional[float] = None
+    repeats: int = 0
+    rss_delta_mb: Optional[float] = None
+    python_peak_mb: Optional[float] = None
+    stages: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def run_benchmark(benchmark: Benchmark, rows: int, seed: int = 0, repeat: int = 3,
+                  trace_memory: bool = False) -> BenchmarkResult:
+    """Generate the input once, then time `repeat` calls; failures are recorded, not raised."""
+    if benchmark.max_rows is not None and rows > benchmark.max_rows:
+        return BenchmarkResult(benchmark.name, rows, 'skipped',
+                               error=f"input schema holds at most {benchmark.max_rows:,} rows")
+    with tempfile.TemporaryDirectory(prefix=f'{benchmark.name}_') as workdir:
+        started = time.perf_counter()
+        try:
+            run = benchmark.setup(rows, seed, Path(workdir))
+        except ImportError as error:
+            return BenchmarkResult(benchmark.name, rows, 'skipped', error=f"missing dependency: {error.name or error}")
+        except Exception as error:
+            return BenchmarkResult(benchmark.name, rows, 'failed', error=f"setup: {type(error).__name__}: {error}")
+        setup_seconds = time.perf_counter() - started
+
+        profiles = []
+        try:
+            for _ in range(repeat):
+                with Profiler(benchmark.name, trace_memory=trace_memory) as profiler:
+                    with profiler.stage(benchmark.name, rows):
+                        run()
+                profiles.append(profiler)
+        except Exception as error:
+            return BenchmarkResult(benchmark.name, rows, 'failed', setup_seconds=setup_seconds,
+                                   repeats=len(profiles), error=f"{type(error).__name__}: {error}")
+
+    stages = [profiler.to_frame() for profiler in profiles]
+    best = min(stages, key=lambda frame: frame.loc[frame['depth'] == 0, 'seconds'].iloc[0])
+    top = best[best['depth'] == 0].iloc[0]
+    nested = best[best['depth'] > 0].groupby('name', sort=False)['seconds'].sum()
+    return BenchmarkResult(
+        benchmark.name, rows, 'ok',
+        seconds=float(top['seconds']),
+        mean_seconds=float(np.mean([frame.loc[frame['depth'] == 0, 'seconds'].iloc[0] for frame in stages])),
+        cpu_seconds=float(top['cpu_seconds']),
+        setup_seconds=setup_seconds,
+        repeats=repeat,
+        rss_delta_mb=None if pd.isna(top['rss_delta_mb']) else float(top['rss_delta_mb']),
+        python_peak_mb=None if pd.isna(top['python_peak_mb']) else float(top['python_peak_mb']),
+        stages={name: float(seconds) for name, seconds in nested.items()},
+    )
+
+
+def to_frame(results: List[BenchmarkResult]) -> pd.DataFrame:
+    columns = [f.name for f in fields(BenchmarkResult)]
+    return pd.DataFrame([asdict(r) for r in results], columns=columns)
+
+
+def scaling_exponents(frame: pd.DataFrame) -> pd.Series:
+    """Slope of log(seconds) over log(rows) per benchmark: ~1 linear, ~2 quadratic (needs >= 2 sizes)."""
+    ok = frame[(frame['status'] == 'ok') & (frame['seconds'] > 0)]
+    slopes = {
+        name: np.polyfit(np.log(group['rows'].astype(float)), np.log(group['seconds'].astype(float)), 1)[0]
+        for name, group in ok.groupby('benchmark', sort=False)
+        if group['rows'].nunique() >= 2
+    }
+    return pd.Series(slopes, name='scaling_exponent', dtype=float)
+
+
+# ============================================================================
+# STORAGE PER COMMIT
+# ============================================================================
+
+def _git(*args: str) -> str:
+    return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def git_revision() -> Tuple[str, bool]:
+    """Short commit of the tree and whether tracked files have uncommitted changes."""
+    try:
+        return _git('rev-parse', '--short=12', 'HEAD'), bool(_git('status', '--porcelain', '--untracked-files=no'))
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def results_path(commit: str, dirty: bool = False, results_dir: Path = RESULTS_DIR) -> Path:
+    return Path(results_dir) / f"{commit}{'-dirty' if dirty else ''}.json"
+
+
+def save_results(results: List[BenchmarkResult], commit: str, dirty: bool,
+                 results_dir: Path = RESULTS_DIR) -> Path:
+    """Merge into the commit's file; a rerun replaces the same (benchmark, rows) entries."""
+    path = results_path(commit, dirty, results_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    entries = {}
+    if path.exists():
+        with open(path, encoding='utf-8') as f:
+            entries = {(r['benchmark'], r['rows']): r for r in json.load(f)['results']}
+    entries.update({(r.benchmark, r.rows): asdict(r) for r in results})
+    document = {
+        'commit': commit,
+        'dirty': dirty,
+        'updated_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': sorted(entries.values(), key=lambda r: (r['benchmark'], r['rows'])),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_results(revision: str, results_dir: Path = RESULTS_DIR) -> pd.DataFrame:
+    """Stored results of a commit (any git revision, e.g. HEAD~1 or a tag)."""
+    try:
+        commit = _git('rev-parse', '--short=12', revision)
+    except (OSError, subprocess.CalledProcessError):
+        commit = revision
+    path = results_path(commit, results_dir=results_dir)
+    if not path.exists():
+        raise FileNotFoundError(f"No benchmark results for {revision} ({path}); run the suite on that commit first")
+    with open(path, encoding='utf-8') as f:
+        return pd.DataFrame(json.load(f)['results'])
+
+
+def compare(current: pd.DataFrame, base: pd.DataFrame, threshold: float = 1.25) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Time ratio current / base per (benchmark, rows) and scaling exponents of both.
+
+    Sizes slower than `threshold` x base are flagged, as are benchmarks whose
+    exponent grew by more than 0.2 (a change in complexity class).
+    """
+    keys = ['benchmark', 'rows']
+    merged = current[keys + ['seconds']].merge(base[keys + ['seconds']], on=keys, suffixes=('', '_base'))
+    merged['ratio'] = merged['seconds'] / merged['seconds_base']
+    merged['regression'] = merged['ratio'] > threshold
+
+    # Exponents over the sizes both runs have, otherwise different size ranges are compared
+    common = merged[keys]
+    exponents = pd.concat([scaling_exponents(current.merge(common, on=keys)).rename('exponent'),
+                           scaling_exponents(base.merge(common, on=keys)).rename('exponent_base')], axis=1)
+    exponents['regression'] = (exponents['exponent'] - exponents['exponent_base']) > 0.2
+    return merged, exponents
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_size(text: str) -> int:
+    """'1e6', '1_000_000' and '1000000' are all accepted."""
+    return int(float(text.replace('_', '')))
+
+
+def main(argv=None) -> pd.DataFrame:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis scripts on synthetic data")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=list(DEFAULT_SIZES),
+                        help="Input rows, e.g. 1e4 1e5 1e6 (default: 1e4 1e5)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed calls per size; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic inputs")
+    parser.add_argument("--trace-memory", action="store_true", help="Record the tracemalloc peak (slower)")
+    parser.add_argument("--results-dir", type=Path, default=RESULTS_DIR, help="Folder of the per-commit results")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--compare", type=str, default=None, help="Git revision to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Time ratio flagged as a regression")
+    args = parser.parse_args(argv)
+
+    commit, dirty = git_revision()
+    print(f"Commit {commit}{' (dirty)' if dirty else ''}, sizes {', '.join(f'{s:,}' for s in args.sizes)}")
+    results = []
+    for name in args.only:
+        for rows in args.sizes:
+            result = run_benchmark(BENCHMARKS[name], rows, args.seed, args.repeat, args.trace_memory)
+            results.append(result)
+            timing = f"{result.seconds:9.3f} s" if result.status == 'ok' else f"{result.status}: {result.error}"
+            print(f"  {name:<18} {rows:>13,}  {timing}")
+
+    frame = to_frame(results)
+    exponents = scaling_exponents(frame)
+    if not exponents.empty:
+        print("\nScaling exponents (log time / log rows):")
+        print(exponents.round(2).to_string())
+
+    if not args.no_save:
+        path = save_results(results, commit, dirty, args.results_dir)
+        print(f"\nResults: {path}")
+
+    if args.compare:
+        times, exponent_changes = compare(frame, load_results(args.compare, args.results_dir), args.threshold)
+        print(f"\nAgainst {args.compare}:")
+        print(times.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+        if not exponent_changes.empty:
+            print(exponent_changes.to_string(float_format=lambda v: f"{v:.2f}"))
+        if times['regression'].any() or exponent_changes['regression'].any():
+            print("Regressions found.")
+    return frame
+
+
+if __name__ == "__main__":
+    main()
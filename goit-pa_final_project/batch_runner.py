@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Nightly batch runner for many campaign A/B experiments.
+
+Experiments come from a manifest (CSV or JSON with experiment_id, control_path,
+test_path; paths relative to the manifest) or are discovered as folders that
+contain control_group.csv and test_group.csv. Each experiment runs the
+ABTestAnalyzer stages in its own worker process:
+
+- At most `max_workers` experiments run at the same time
+- An experiment that exceeds `timeout` seconds is terminated, the batch goes on
+- Errors, guardrail stops and crashed workers are recorded per experiment
+
+Workers return structured rows instead of printing; all experiments are merged
+into one Parquet table, plus a per-experiment run status table.
+
+Usage:
+    python batch_runner.py manifest.csv --output batch_results.parquet --workers 8 --timeout 600
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from dataclasses import asdict, fields
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from final_project_analysis import ABTestAnalyzer
+from guardrails import DataQualityError
+
+RESULT_COLUMNS = [
+    'experiment_id', 'stage', 'metric', 'control', 'test', 'difference',
+    'ci_lower', 'ci_upper', 'statistic', 'p_value', 'p_adjusted', 'significant',
+]
+RUN_COLUMNS = ['experiment_id', 'status', 'seconds', 'rows', 'error']
+
+
+def read_manifest(path: str) -> pd.DataFrame:
+    """Experiments from a CSV/JSON manifest; relative paths are resolved against its folder."""
+    path = Path(path)
+    manifest = pd.read_json(path) if path.suffix == '.json' else pd.read_csv(path)
+    missing = {'experiment_id', 'control_path', 'test_path'} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"Manifest {path} is missing columns: {sorted(missing)}")
+    for column in ('control_path', 'test_path'):
+        manifest[column] = [str(p if Path(p).is_absolute() else path.parent / p) for p in manifest[column]]
+    return manifest[['experiment_id', 'control_path', 'test_path']]
+
+
+def discover_experiments(root: str, control_name: str = 'control_group.csv', test_name: str = 'test_group.csv') -> pd.DataFrame:
+    """One experiment per folder under `root` that holds both CSVs (the folder name is the id)."""
+    rows = [
+        {'experiment_id': str(control.parent.relative_to(root)), 'control_path': str(control),
+         'test_path': str(control.parent / test_name)}
+        for control in sorted(Path(root).rglob(control_name))
+        if (control.parent / test_name).exists()
+    ]
+    return pd.DataFrame(rows, columns=['experiment_id', 'control_path', 'test_path'])
+
+
+def collect_results(experiment_id: str, analyzer: ABTestAnalyzer) -> pd.DataFrame:
+    """Flatten the stage outputs of a finished analyzer into RESULT_COLUMNS rows."""
+    frames = []
+    ctrl, test = analyzer.aggregate_metrics.control, analyzer.aggregate_metrics.test
+    names = [f.name for f in fields(ctrl)]
+    frames.append(pd.DataFrame({
+        'stage': 'aggregate', 'metric': names,
+        'control': [float(getattr(ctrl, k)) for k in names], 'test': [float(getattr(test, k)) for k in names],
+    }))
+
+    t_tests = pd.DataFrame.from_dict({name: asdict(r) for name, r in analyzer.t_test_results.items()}, orient='index')
+    frames.append(pd.DataFrame({
+        'stage': 't_test', 'metric': t_tests.index,
+        'control': t_tests['control_mean'], 'test': t_tests['test_mean'],
+        'statistic': t_tests['t_statistic'], 'p_value': t_tests['p_value'],
+        'significant': t_tests['significant'],
+    }))
+
+    ratios = analyzer.ratio_results
+    frames.append(ratios.rename(columns={
+        'control_ratio': 'control', 'test_ratio': 'test', 'z_statistic': 'statistic',
+    }).assign(stage='ratio'))
+
+    report = analyzer.report.drop(columns='test')  # test kind (welch / z), not the Test mean
+    frames.append(report.rename(columns={'control_mean': 'control', 'test_mean': 'test'}).assign(stage='report'))
+
+    ci = analyzer.ci_result
+    frames.append(pd.DataFrame([{
+        'stage': 'confidence_interval', 'metric': 'Cart→Purchase',
+        'control': ci.control_rate, 'test': ci.test_rate, 'difference': ci.difference,
+        'ci_lower': ci.ci_lower, 'ci_upper': ci.ci_upper, 'significant': not ci.contains_zero,
+    }]))
+
+    frames.append(analyzer.funnel_ci.rename(columns={
+        'Stage': 'metric', 'control_rate': 'control', 'test_rate': 'test',
+    }).assign(stage='funnel', significant=lambda f: ~f['contains_zero']))
+
+    results = pd.concat([f.reindex(columns=RESULT_COLUMNS[1:]) for f in frames], ignore_index=True)
+    results['difference'] = results['difference'].fillna(results['test'] - results['control'])
+    results['significant'] = results['significant'].astype('boolean')
+    results.insert(0, 'experiment_id', experiment_id)
+    return results
+
+
+def run_experiment(experiment_id: str, control_path: str, test_path: str) -> pd.DataFrame:
+    """Run the analysis stages of one experiment with the quiet reporter; no summary file is written."""
+    analyzer = ABTestAnalyzer(control_path, test_path, reporter='quiet')
+    analyzer.run_stages(sequential=False)  # daily mSPRT replay is not part of the batch results
+    return collect_results(experiment_id, analyzer)
+
+
+def _worker(connection, experiment_id: str, control_path: str, test_path: str) -> None:
+    try:
+        connection.send(('ok', run_experiment(experiment_id, control_path, test_path), None))
+    except DataQualityError as error:
+        connection.send(('invalid', None, str(error)))
+    except Exception as error:  # isolate every failure to its experiment
+        connection.send(('failed', None, f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+def run_batch(
+    experiments: pd.DataFrame,
+    max_workers: Optional[int] = None,
+    timeout: float = 600.0,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Run every experiment in its own process with bounded concurrency.
+
+    Returns (results, runs): merged RESULT_COLUMNS rows of the successful
+    experiments and one status row per experiment (ok / invalid / failed / timeout).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    pending = list(experiments[['experiment_id', 'control_path', 'test_path']].itertuples(index=False, name=None))
+    pending.reverse()
+    running: Dict = {}  # receiving connection -> (process, experiment_id, start time)
+    results: List[pd.DataFrame] = []
+    runs: List[Dict] = []
+
+    def finish(connection, status, frame=None, error=None):
+        process, experiment_id, started = running.pop(connection)
+        if status == 'timeout':
+            process.terminate()
+        process.join()
+        connection.close()
+        if frame is not None:
+            results.append(frame)
+        runs.append({
+            'experiment_id': experiment_id, 'status': status, 'seconds': time.perf_counter() - started,
+            'rows': 0 if frame is None else len(frame), 'error': error,
+        })
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            experiment_id, control_path, test_path = pending.pop()
+            receiver, sender = mp.Pipe(duplex=False)
+            process = mp.Process(target=_worker, args=(sender, experiment_id, control_path, test_path), daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (process, experiment_id, time.perf_counter())
+
+        now = time.perf_counter()
+        next_deadline = min(started + timeout for _, _, started in running.values())
+        for connection in wait(list(running), timeout=max(next_deadline - now, 0)):
+            try:
+                status, frame, error = connection.recv()
+            except EOFError:  # worker died without reporting (e.g. killed, out of memory)
+                process = running[connection][0]
+                process.join()
+                status, frame, error = 'failed', None, f"worker exited with code {process.exitcode}"
+            finish(connection, status, frame, error)
+
+        now = time.perf_counter()
+        for connection, (_, _, started) in list(running.items()):
+            if now - started > timeout:
+                finish(connection, 'timeout', error=f"exceeded {timeout:.0f} s")
+
+    merged = pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=RESULT_COLUMNS)
+    return merged, pd.DataFrame(runs, columns=RUN_COLUMNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many A/B experiments in parallel")
+    parser.add_argument("source", type=str, help="Manifest (.csv/.json) or a folder to discover experiments in")
+    parser.add_argument("--output", type=str, default="batch_results.parquet", help="Merged results Parquet path")
+    parser.add_argument("--workers", type=int, default=None, help="Max concurrent experiments (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-experiment time limit, seconds")
+    args = parser.parse_args()
+
+    source = Path(args.source)
+    experiments = discover_experiments(source) if source.is_dir() else read_manifest(source)
+    print(f"Running {len(experiments)} experiments...")
+
+    results, runs = run_batch(experiments, max_workers=args.workers, timeout=args.timeout)
+    output = Path(args.output)
+    results.to_parquet(output, index=False)
+    runs.to_parquet(output.with_name(output.stem + '_runs.parquet'), index=False)
+
+    print(runs['status'].value_counts().to_string())
+    for run in runs[runs['status'] != 'ok'].itertuples(index=False):
+        print(f"  {run.experiment_id}: {run.status} — {run.error}")
+    print(f"Results: {output} ({len(results)} rows)")
+
+
+if __name__ == "__main__":
+    main()
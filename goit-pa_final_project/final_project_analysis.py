@@ -21,25 +21,88 @@ from scipy import stats
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional, Union
+import argparse
 import warnings
 warnings.filterwarnings('ignore')
 
+from cuped import MomentSums, cuped_welch_test
+from funnel import funnel_from_counts, stage_confidence_intervals
+from guardrails import DataQualityError, GuardrailReport, run_guardrails
+from profiling import Profiler, profiled
+from ratio_metrics import RATIO_METRICS, delta_ratio_test
+from report import ab_report, to_long
+from reporting import REPORTERS, Reporter, get_reporter
+from results import (AggregateMetrics, FunnelResult, GroupMetrics, LoadSummary,
+                     ProportionDifferenceCI, TTestResult)
+from sequential import monitor_daily_ratios
+
+# Funnel stages in order: (label, column in control_group.csv / test_group.csv)
+FUNNEL_STAGES = [
+    ('Impressions', '# of Impressions'),
+    ('Clicks', '# of Website Clicks'),
+    ('Searches', '# of Searches'),
+    ('View Content', '# of View Content'),
+    ('Add to Cart', '# of Add to Cart'),
+    ('Purchase', '# of Purchase'),
+]
+
+# Guardrails: counters that can never exceed another one, and the expected funnel order
+COUNT_COLUMNS = ['Spend [USD]', '# of Impressions', 'Reach', '# of Website Clicks',
+                 '# of Searches', '# of View Content', '# of Add to Cart', '# of Purchase']
+RANGE_RULES = [('Reach', '# of Impressions'), ('# of Website Clicks', '# of Impressions')]
+FUNNEL_ORDER = ['# of View Content', '# of Add to Cart', '# of Purchase']
+
+# Daily columns evaluated together in the multiple-testing report
+REPORT_METRICS = [
+    'Spend [USD]', '# of Impressions', '# of Website Clicks', '# of Searches',
+    '# of View Content', '# of Add to Cart', '# of Purchase',
+    'CTR', 'Cart_to_Purchase', 'Overall_Conversion',
+]
+
+# Ratio metrics monitored daily: (numerator column, denominator column), one unit per day
+SEQUENTIAL_METRICS = {
+    'CTR': ('# of Website Clicks', '# of Impressions'),
+    'Cart→Purchase': ('# of Purchase', '# of Add to Cart'),
+    'Overall Conversion': ('# of Purchase', '# of Website Clicks'),
+}
+
+
+def _daily_rows(analyzer, *args, **kwargs) -> int:
+    """Row count of a stage: daily rows of both groups."""
+    return len(analyzer.control_df) + len(analyzer.test_df)
+
 
 class ABTestAnalyzer:
     """A/B Test Analysis for advertising campaign comparison."""
     
-    def __init__(self, control_path: str, test_path: str):
-        """Initialize analyzer with data paths."""
+    def __init__(self, control_path: str, test_path: str, allocation_column: Optional[str] = None,
+                 expected_shares: Optional[Dict[str, float]] = None, reporter: Union[str, Reporter] = 'text'):
+        """
+        Initialize analyzer with data paths.
+        
+        allocation_column / expected_shares configure the SRM guardrail: the
+        column holding allocated units and the planned split (50/50 by default).
+        Without a column SRM is reported as skipped (days per group are not units).
+        
+        reporter renders the stage results: 'text' (console tables), 'quiet'
+        (nothing) or 'json' (one line per stage), or a Reporter instance.
+        Every stage returns its result object regardless of the reporter.
+        """
         self.control_path = Path(control_path)
         self.test_path = Path(test_path)
+        self.allocation_column = allocation_column
+        self.expected_shares = expected_shares
         self.control_df = None
         self.test_df = None
         self.combined_df = None
+        self.guardrail_report = None
+        self.reporter = get_reporter(reporter)
         
-    def load_data(self) -> None:
+    @profiled('load', rows=_daily_rows)
+    def load_data(self) -> LoadSummary:
         """Load and preprocess both datasets."""
-        print("Loading data...")
+        self.reporter.loading()
         
         # Load CSV files (semicolon-separated)
         self.control_df = pd.read_csv(self.control_path, sep=';', encoding='utf-8')
@@ -53,122 +116,81 @@ class ABTestAnalyzer:
         self.control_df['Group'] = 'Control'
         self.test_df['Group'] = 'Test'
         
+        self.check_data_quality()
+        
         # Handle missing values (Aug 5 in control has missing data)
-        print("\nChecking for missing values...")
-        print(f"Control missing: {self.control_df.isnull().sum().sum()}")
-        print(f"Test missing: {self.test_df.isnull().sum().sum()}")
+        control_missing = int(self.control_df.isnull().sum().sum())
+        test_missing = int(self.test_df.isnull().sum().sum())
         
         # Drop rows with all funnel metrics missing (Aug 5 control)
         funnel_cols = ['# of Impressions', 'Reach', '# of Website Clicks', 
                        '# of Searches', '# of View Content', '# of Add to Cart', '# of Purchase']
         
         control_complete = self.control_df.dropna(subset=funnel_cols, how='all')
-        print(f"\nRemoved {len(self.control_df) - len(control_complete)} incomplete rows from control")
+        removed_rows = len(self.control_df) - len(control_complete)
         self.control_df = control_complete
         
         # Combine for some analyses
         self.combined_df = pd.concat([self.control_df, self.test_df], ignore_index=True)
         
-        print(f"\nData loaded successfully:")
-        print(f"  Control: {len(self.control_df)} days")
-        print(f"  Test: {len(self.test_df)} days")
+        summary = LoadSummary(
+            control_days=len(self.control_df),
+            test_days=len(self.test_df),
+            control_missing=control_missing,
+            test_missing=test_missing,
+            removed_rows=removed_rows,
+            guardrails=self.guardrail_report,
+        )
+        self.reporter.loaded(summary)
+        return summary
+        
+    @profiled('guardrails', rows=_daily_rows)
+    def check_data_quality(self) -> GuardrailReport:
+        """
+        Guardrail stage: SRM, duplicate/missing days, range and funnel-order checks.
         
-    def calculate_aggregate_metrics(self) -> Dict:
+        Raises DataQualityError on a fatal failure, before any analysis runs.
+        """
+        raw = pd.concat([self.control_df, self.test_df], ignore_index=True)
+        report = run_guardrails(
+            raw, COUNT_COLUMNS,
+            range_rules=RANGE_RULES,
+            funnel_order=FUNNEL_ORDER,
+            allocation_column=self.allocation_column,
+            expected_shares=self.expected_shares,
+        )
+        self.reporter.guardrails(report)
+        
+        self.guardrail_report = report
+        report.raise_if_failed()
+        return report
+    
+    @profiled('aggregate', rows=_daily_rows)
+    def calculate_aggregate_metrics(self) -> AggregateMetrics:
         """Calculate aggregated metrics for both groups."""
-        print("\n" + "="*70)
-        print("CALCULATING AGGREGATE METRICS")
-        print("="*70)
-        
-        results = {}
-        
-        for group_name, df in [('Control', self.control_df), ('Test', self.test_df)]:
-            metrics = {
-                'total_spend': df['Spend [USD]'].sum(),
-                'total_impressions': df['# of Impressions'].sum(),
-                'total_reach': df['Reach'].sum(),
-                'total_clicks': df['# of Website Clicks'].sum(),
-                'total_searches': df['# of Searches'].sum(),
-                'total_view_content': df['# of View Content'].sum(),
-                'total_add_to_cart': df['# of Add to Cart'].sum(),
-                'total_purchases': df['# of Purchase'].sum(),
-                'days': len(df)
-            }
-            
-            # Calculate rates
-            metrics['ctr'] = metrics['total_clicks'] / metrics['total_impressions'] if metrics['total_impressions'] > 0 else 0
-            metrics['click_to_search'] = metrics['total_searches'] / metrics['total_clicks'] if metrics['total_clicks'] > 0 else 0
-            metrics['search_to_view'] = metrics['total_view_content'] / metrics['total_searches'] if metrics['total_searches'] > 0 else 0
-            metrics['view_to_cart'] = metrics['total_add_to_cart'] / metrics['total_view_content'] if metrics['total_view_content'] > 0 else 0
-            metrics['cart_to_purchase'] = metrics['total_purchases'] / metrics['total_add_to_cart'] if metrics['total_add_to_cart'] > 0 else 0
-            metrics['overall_conversion'] = metrics['total_purchases'] / metrics['total_clicks'] if metrics['total_clicks'] > 0 else 0
-            
-            # Cost metrics
-            metrics['cost_per_click'] = metrics['total_spend'] / metrics['total_clicks'] if metrics['total_clicks'] > 0 else 0
-            metrics['cost_per_purchase'] = metrics['total_spend'] / metrics['total_purchases'] if metrics['total_purchases'] > 0 else 0
-            metrics['roas_proxy'] = metrics['total_purchases'] / metrics['total_spend'] if metrics['total_spend'] > 0 else 0
-            
-            # Daily averages
-            metrics['avg_daily_spend'] = metrics['total_spend'] / metrics['days']
-            metrics['avg_daily_purchases'] = metrics['total_purchases'] / metrics['days']
-            
-            results[group_name] = metrics
+        results = AggregateMetrics(
+            control=GroupMetrics.from_frame(self.control_df),
+            test=GroupMetrics.from_frame(self.test_df),
+        )
+        self.reporter.aggregate_metrics(results)
         
         self.aggregate_metrics = results
         return results
     
+    @profiled('aggregate_summary')
     def print_aggregate_summary(self) -> None:
-        """Print formatted summary of aggregate metrics."""
-        print("\n" + "="*70)
-        print("AGGREGATE METRICS SUMMARY")
-        print("="*70)
-        
-        ctrl = self.aggregate_metrics['Control']
-        test = self.aggregate_metrics['Test']
-        
-        print(f"\n{'Metric':<30} {'Control':<20} {'Test':<20} {'Difference':<15}")
-        print("-" * 85)
-        
-        # Volume metrics
-        print(f"{'Total Spend ($)':<30} {ctrl['total_spend']:>20,.2f} {test['total_spend']:>20,.2f} {test['total_spend']-ctrl['total_spend']:>15,.2f}")
-        print(f"{'Total Impressions':<30} {ctrl['total_impressions']:>20,} {test['total_impressions']:>20,} {test['total_impressions']-ctrl['total_impressions']:>15,}")
-        print(f"{'Total Clicks':<30} {ctrl['total_clicks']:>20,} {test['total_clicks']:>20,} {test['total_clicks']-ctrl['total_clicks']:>15,}")
-        print(f"{'Total Purchases':<30} {ctrl['total_purchases']:>20,} {test['total_purchases']:>20,} {test['total_purchases']-ctrl['total_purchases']:>15,}")
-        
-        print("\n" + "-" * 85)
-        
-        # Rate metrics (percentages)
-        print(f"{'CTR (%)':<30} {ctrl['ctr']*100:>20.3f} {test['ctr']*100:>20.3f} {(test['ctr']-ctrl['ctr'])*100:>15.3f}")
-        print(f"{'Cart→Purchase (%)':<30} {ctrl['cart_to_purchase']*100:>20.3f} {test['cart_to_purchase']*100:>20.3f} {(test['cart_to_purchase']-ctrl['cart_to_purchase'])*100:>15.3f}")
-        print(f"{'Overall Conversion (%)':<30} {ctrl['overall_conversion']*100:>20.3f} {test['overall_conversion']*100:>20.3f} {(test['overall_conversion']-ctrl['overall_conversion'])*100:>15.3f}")
-        
-        print("\n" + "-" * 85)
-        
-        # Cost metrics
-        print(f"{'Cost per Click ($)':<30} {ctrl['cost_per_click']:>20.2f} {test['cost_per_click']:>20.2f} {test['cost_per_click']-ctrl['cost_per_click']:>15.2f}")
-        print(f"{'Cost per Purchase ($)':<30} {ctrl['cost_per_purchase']:>20.2f} {test['cost_per_purchase']:>20.2f} {test['cost_per_purchase']-ctrl['cost_per_purchase']:>15.2f}")
-        
-        # Relative improvements
-        print("\n" + "="*70)
-        print("RELATIVE IMPROVEMENTS (Test vs Control)")
-        print("="*70)
-        
-        improvements = {
-            'CTR': (test['ctr'] / ctrl['ctr'] - 1) * 100,
-            'Cart→Purchase': (test['cart_to_purchase'] / ctrl['cart_to_purchase'] - 1) * 100,
-            'Overall Conversion': (test['overall_conversion'] / ctrl['overall_conversion'] - 1) * 100,
-            'Cost per Purchase': (test['cost_per_purchase'] / ctrl['cost_per_purchase'] - 1) * 100,
-        }
-        
-        for metric, pct in improvements.items():
-            direction = "↑" if pct > 0 else "↓"
-            print(f"{metric:<30} {direction} {abs(pct):>6.2f}%")
+        """Render the aggregate metrics and relative improvements through the reporter."""
+        self.reporter.aggregate_summary(self.aggregate_metrics)
     
-    def perform_t_tests(self) -> Dict:
-        """Perform independent t-tests on daily metrics."""
-        print("\n" + "="*70)
-        print("STATISTICAL SIGNIFICANCE TESTING (Independent T-Tests)")
-        print("="*70)
+    @profiled('t_tests', rows=_daily_rows)
+    def perform_t_tests(self, cuped_suffix: Optional[str] = None) -> Dict[str, TTestResult]:
+        """
+        Perform independent t-tests on daily metrics.
         
+        With `cuped_suffix` (e.g. ' (pre)'), a metric column that has a matching
+        pre-period covariate column (e.g. '# of Purchase (pre)') is tested on
+        CUPED-adjusted values instead of the raw ones.
+        """
         # Daily metrics to test
         metrics_to_test = [
             ('Spend [USD]', 'Daily Spend'),
@@ -198,44 +220,86 @@ class ABTestAnalyzer:
         
         results = {}
         
-        print(f"\n{'Metric':<35} {'t-statistic':<15} {'p-value':<15} {'Significant?':<15}")
-        print("-" * 80)
-        
         for col, name in metrics_to_test:
-            control_data = self.control_df[col].dropna()
-            test_data = self.test_df[col].dropna()
-            
-            # Two-sided independent t-test
-            t_stat, p_value = stats.ttest_ind(control_data, test_data, equal_var=False)
-            
-            is_significant = p_value < 0.05
-            sig_marker = "✓ YES" if is_significant else "✗ NO"
-            
-            results[name] = {
-                't_statistic': t_stat,
-                'p_value': p_value,
-                'significant': is_significant,
-                'control_mean': control_data.mean(),
-                'test_mean': test_data.mean(),
-                'control_std': control_data.std(),
-                'test_std': test_data.std(),
-            }
-            
-            print(f"{name:<35} {t_stat:>15.4f} {p_value:>15.6f} {sig_marker:<15}")
-        
+            covariate = f"{col}{cuped_suffix}" if cuped_suffix else None
+            if covariate in self.control_df.columns and covariate in self.test_df.columns:
+                # CUPED: Welch test on covariate-adjusted moments
+                result = cuped_welch_test(
+                    MomentSums.from_arrays(self.control_df[col], self.control_df[covariate]),
+                    MomentSums.from_arrays(self.test_df[col], self.test_df[covariate]),
+                )
+                results[name] = TTestResult(
+                    t_statistic=result['t_statistic'],
+                    p_value=result['p_value'],
+                    significant=result['p_value'] < 0.05,
+                    control_mean=result['control_mean'],
+                    test_mean=result['test_mean'],
+                    control_std=result['control_std'],
+                    test_std=result['test_std'],
+                    method='CUPED',
+                    theta=result['theta'],
+                    variance_reduction=result['variance_reduction'],
+                )
+            else:
+                control_data = self.control_df[col].dropna()
+                test_data = self.test_df[col].dropna()
+                
+                # Two-sided independent t-test
+                t_stat, p_value = stats.ttest_ind(control_data, test_data, equal_var=False)
+                
+                results[name] = TTestResult(
+                    t_statistic=t_stat,
+                    p_value=p_value,
+                    significant=p_value < 0.05,
+                    control_mean=control_data.mean(),
+                    test_mean=test_data.mean(),
+                    control_std=control_data.std(),
+                    test_std=test_data.std(),
+                )
+        
+        self.reporter.t_tests(results)
         self.t_test_results = results
         return results
     
-    def calculate_confidence_interval_cart_to_purchase(self, confidence: float = 0.95) -> Dict:
+    @profiled('ratio_tests', rows=_daily_rows)
+    def perform_ratio_tests(self, confidence: float = 0.95) -> pd.DataFrame:
+        """
+        Test ratio metrics (CTR, CPC, cost per purchase, ROAS) with the delta method.
+        
+        Each ratio is total numerator / total denominator per group, so days are
+        weighted by their volume, and its SE comes from per-group sums of
+        squares and cross-products instead of a t-test on daily ratios.
+        """
+        results = delta_ratio_test(self.control_df, self.test_df, RATIO_METRICS, confidence=confidence)
+        self.reporter.ratio_tests(results)
+        
+        self.ratio_results = results
+        return results
+    
+    @profiled('report', rows=_daily_rows)
+    def perform_report(self, segments: Tuple[str, ...] = (), correction: str = 'bh') -> pd.DataFrame:
+        """
+        Evaluate all daily metrics (x optional segment columns) in one vectorised pass.
+        
+        Unlike the one-by-one t-tests above, p-values are adjusted for multiple
+        comparisons across the whole grid (Benjamini-Hochberg by default).
+        """
+        # Daily rate columns exist once perform_t_tests has run
+        metrics = [m for m in REPORT_METRICS if m in self.control_df.columns]
+        daily = pd.concat([self.control_df, self.test_df], ignore_index=True)
+        report = ab_report(to_long(daily, metrics, ['Group', *segments]), segments=segments, correction=correction)
+        self.reporter.report(report, correction)
+        
+        self.report = report
+        return report
+    
+    @profiled('confidence_interval', rows=_daily_rows)
+    def calculate_confidence_interval_cart_to_purchase(self, confidence: float = 0.95) -> ProportionDifferenceCI:
         """
         Calculate confidence interval for the difference in Cart→Purchase conversion rates.
         
         This is the key metric for Task 5.
         """
-        print("\n" + "="*70)
-        print("CONFIDENCE INTERVAL: Cart→Purchase Conversion Rate Difference")
-        print("="*70)
-        
         # Aggregate totals
         ctrl_purchases = self.control_df['# of Purchase'].sum()
         ctrl_carts = self.control_df['# of Add to Cart'].sum()
@@ -262,115 +326,63 @@ class ABTestAnalyzer:
         ci_lower = diff - z * se_diff
         ci_upper = diff + z * se_diff
         
-        result = {
-            'control_rate': p_ctrl,
-            'test_rate': p_test,
-            'difference': diff,
-            'se_difference': se_diff,
-            'confidence_level': confidence,
-            'z_score': z,
-            'ci_lower': ci_lower,
-            'ci_upper': ci_upper,
-            'contains_zero': ci_lower <= 0 <= ci_upper,
-            'ctrl_purchases': ctrl_purchases,
-            'ctrl_carts': ctrl_carts,
-            'test_purchases': test_purchases,
-            'test_carts': test_carts,
-        }
-        
-        print(f"\nControl Group:")
-        print(f"  Add to Cart: {ctrl_carts:,}")
-        print(f"  Purchases: {ctrl_purchases:,}")
-        print(f"  Conversion Rate: {p_ctrl*100:.2f}%")
-        
-        print(f"\nTest Group:")
-        print(f"  Add to Cart: {test_carts:,}")
-        print(f"  Purchases: {test_purchases:,}")
-        print(f"  Conversion Rate: {p_test*100:.2f}%")
-        
-        print(f"\nDifference (Test - Control):")
-        print(f"  Point Estimate: {diff*100:.2f} percentage points")
-        print(f"  Standard Error: {se_diff*100:.2f} pp")
-        
-        print(f"\n{confidence*100:.0f}% Confidence Interval:")
-        print(f"  Lower Bound: {ci_lower*100:.2f} pp")
-        print(f"  Upper Bound: {ci_upper*100:.2f} pp")
-        print(f"  Interval: [{ci_lower*100:.2f}%, {ci_upper*100:.2f}%]")
-        
-        if result['contains_zero']:
-            print(f"\n⚠️  CI contains zero → NO statistically significant difference")
-        else:
-            print(f"\n✓ CI does NOT contain zero → statistically significant difference")
-            if diff > 0:
-                print(f"  Test campaign has BETTER conversion rate")
-            else:
-                print(f"  Control campaign has BETTER conversion rate")
+        result = ProportionDifferenceCI(
+            control_rate=p_ctrl,
+            test_rate=p_test,
+            difference=diff,
+            se_difference=se_diff,
+            confidence_level=confidence,
+            z_score=z,
+            ci_lower=ci_lower,
+            ci_upper=ci_upper,
+            contains_zero=ci_lower <= 0 <= ci_upper,
+            ctrl_purchases=ctrl_purchases,
+            ctrl_carts=ctrl_carts,
+            test_purchases=test_purchases,
+            test_carts=test_carts,
+        )
+        self.reporter.confidence_interval(result)
         
         self.ci_result = result
         return result
     
-    def generate_funnel_data(self) -> pd.DataFrame:
+    @profiled('funnel', rows=_daily_rows)
+    def generate_funnel_data(self) -> FunnelResult:
         """Generate funnel stage data for visualization."""
-        print("\n" + "="*70)
-        print("FUNNEL ANALYSIS")
-        print("="*70)
-        
-        stages = [
-            'Impressions',
-            'Clicks',
-            'Searches',
-            'View Content',
-            'Add to Cart',
-            'Purchase'
-        ]
-        
-        control_values = [
-            self.aggregate_metrics['Control']['total_impressions'],
-            self.aggregate_metrics['Control']['total_clicks'],
-            self.aggregate_metrics['Control']['total_searches'],
-            self.aggregate_metrics['Control']['total_view_content'],
-            self.aggregate_metrics['Control']['total_add_to_cart'],
-            self.aggregate_metrics['Control']['total_purchases'],
-        ]
-        
-        test_values = [
-            self.aggregate_metrics['Test']['total_impressions'],
-            self.aggregate_metrics['Test']['total_clicks'],
-            self.aggregate_metrics['Test']['total_searches'],
-            self.aggregate_metrics['Test']['total_view_content'],
-            self.aggregate_metrics['Test']['total_add_to_cart'],
-            self.aggregate_metrics['Test']['total_purchases'],
-        ]
-        
-        funnel_df = pd.DataFrame({
-            'Stage': stages,
-            'Control': control_values,
-            'Test': test_values,
-        })
+        funnel = funnel_from_counts(self.combined_df, FUNNEL_STAGES, by=['Group'])
+        by_group = {group: part.set_index('Step') for group, part in funnel.groupby('Group')}
         
-        # Calculate conversion rates from previous stage
-        funnel_df['Control_Rate'] = funnel_df['Control'] / funnel_df['Control'].shift(1) * 100
-        funnel_df['Test_Rate'] = funnel_df['Test'] / funnel_df['Test'].shift(1) * 100
+        # Wide layout: one row per stage, one column per group
+        funnel_df = pd.DataFrame({'Stage': [label for label, _ in FUNNEL_STAGES]})
+        for suffix, column in [('', 'Count'), ('_Rate', 'Rate'), ('_Drop', 'Drop')]:
+            for group in ('Control', 'Test'):
+                funnel_df[group + suffix] = by_group[group][column].to_numpy()
         
-        # Drop rate (inverse of conversion)
-        funnel_df['Control_Drop'] = 100 - funnel_df['Control_Rate']
-        funnel_df['Test_Drop'] = 100 - funnel_df['Test_Rate']
+        # Stage-to-stage CIs for the Test - Control difference
+        result = FunnelResult(table=funnel_df, stage_ci=stage_confidence_intervals(funnel))
+        self.reporter.funnel(result)
         
-        print("\nFunnel Stage Counts:")
-        print(funnel_df[['Stage', 'Control', 'Test']].to_string(index=False))
+        self.funnel_data = funnel_df
+        self.funnel_ci = result.stage_ci
+        return result
+    
+    @profiled('sequential', rows=_daily_rows)
+    def perform_sequential_tests(self, alpha: float = 0.05) -> pd.DataFrame:
+        """
+        Replay the daily rows through an mSPRT monitor (always-valid p-values).
         
-        print("\nStage-to-Stage Conversion Rates (%):")
-        print(funnel_df[['Stage', 'Control_Rate', 'Test_Rate']].to_string(index=False))
+        Unlike re-running the t-tests every day, these p-values can be checked
+        daily without inflating the false positive rate.
+        """
+        daily = monitor_daily_ratios(self.control_df, self.test_df, SEQUENTIAL_METRICS, alpha=alpha)
+        self.reporter.sequential(daily)
         
-        self.funnel_data = funnel_df
-        return funnel_df
+        self.sequential_results = daily
+        return daily
     
+    @profiled('export')
     def export_results_summary(self, output_path: str) -> None:
         """Export comprehensive results summary to text file."""
-        print(f"\n" + "="*70)
-        print("EXPORTING RESULTS SUMMARY")
-        print("="*70)
-        
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write("="*70 + "\n")
             f.write("A/B TEST ANALYSIS RESULTS SUMMARY\n")
@@ -382,24 +394,24 @@ class ABTestAnalyzer:
             # Aggregate metrics
             f.write("AGGREGATE METRICS\n")
             f.write("-"*70 + "\n")
-            ctrl = self.aggregate_metrics['Control']
-            test = self.aggregate_metrics['Test']
+            ctrl = self.aggregate_metrics.control
+            test = self.aggregate_metrics.test
             
-            f.write(f"Control Group ({ctrl['days']} days):\n")
-            f.write(f"  Total Spend: ${ctrl['total_spend']:,.2f}\n")
-            f.write(f"  Total Clicks: {ctrl['total_clicks']:,}\n")
-            f.write(f"  Total Purchases: {ctrl['total_purchases']:,}\n")
-            f.write(f"  CTR: {ctrl['ctr']*100:.3f}%\n")
-            f.write(f"  Cart→Purchase: {ctrl['cart_to_purchase']*100:.2f}%\n")
-            f.write(f"  Cost per Purchase: ${ctrl['cost_per_purchase']:.2f}\n\n")
+            f.write(f"Control Group ({ctrl.days} days):\n")
+            f.write(f"  Total Spend: ${ctrl.total_spend:,.2f}\n")
+            f.write(f"  Total Clicks: {ctrl.total_clicks:,}\n")
+            f.write(f"  Total Purchases: {ctrl.total_purchases:,}\n")
+            f.write(f"  CTR: {ctrl.ctr*100:.3f}%\n")
+            f.write(f"  Cart→Purchase: {ctrl.cart_to_purchase*100:.2f}%\n")
+            f.write(f"  Cost per Purchase: ${ctrl.cost_per_purchase:.2f}\n\n")
             
-            f.write(f"Test Group ({test['days']} days):\n")
-            f.write(f"  Total Spend: ${test['total_spend']:,.2f}\n")
-            f.write(f"  Total Clicks: {test['total_clicks']:,}\n")
-            f.write(f"  Total Purchases: {test['total_purchases']:,}\n")
-            f.write(f"  CTR: {test['ctr']*100:.3f}%\n")
-            f.write(f"  Cart→Purchase: {test['cart_to_purchase']*100:.2f}%\n")
-            f.write(f"  Cost per Purchase: ${test['cost_per_purchase']:.2f}\n\n")
+            f.write(f"Test Group ({test.days} days):\n")
+            f.write(f"  Total Spend: ${test.total_spend:,.2f}\n")
+            f.write(f"  Total Clicks: {test.total_clicks:,}\n")
+            f.write(f"  Total Purchases: {test.total_purchases:,}\n")
+            f.write(f"  CTR: {test.ctr*100:.3f}%\n")
+            f.write(f"  Cart→Purchase: {test.cart_to_purchase*100:.2f}%\n")
+            f.write(f"  Cost per Purchase: ${test.cost_per_purchase:.2f}\n\n")
             
             # T-test results
             f.write("\n" + "="*70 + "\n")
@@ -408,58 +420,78 @@ class ABTestAnalyzer:
             
             for metric, result in self.t_test_results.items():
                 f.write(f"\n{metric}:\n")
-                f.write(f"  Control Mean: {result['control_mean']:.4f}\n")
-                f.write(f"  Test Mean: {result['test_mean']:.4f}\n")
-                f.write(f"  t-statistic: {result['t_statistic']:.4f}\n")
-                f.write(f"  p-value: {result['p_value']:.6f}\n")
-                f.write(f"  Significant (α=0.05): {'YES' if result['significant'] else 'NO'}\n")
+                f.write(f"  Control Mean: {result.control_mean:.4f}\n")
+                f.write(f"  Test Mean: {result.test_mean:.4f}\n")
+                f.write(f"  t-statistic: {result.t_statistic:.4f}\n")
+                f.write(f"  p-value: {result.p_value:.6f}\n")
+                f.write(f"  Significant (α=0.05): {'YES' if result.significant else 'NO'}\n")
             
             # CI for cart to purchase
             f.write("\n" + "="*70 + "\n")
             f.write("CONFIDENCE INTERVAL: Cart→Purchase Conversion\n")
             f.write("-"*70 + "\n")
             ci = self.ci_result
-            f.write(f"Control Rate: {ci['control_rate']*100:.2f}%\n")
-            f.write(f"Test Rate: {ci['test_rate']*100:.2f}%\n")
-            f.write(f"Difference: {ci['difference']*100:.2f} pp\n")
-            f.write(f"95% CI: [{ci['ci_lower']*100:.2f}%, {ci['ci_upper']*100:.2f}%]\n")
-            f.write(f"Contains Zero: {'Yes (not significant)' if ci['contains_zero'] else 'No (significant)'}\n")
+            f.write(f"Control Rate: {ci.control_rate*100:.2f}%\n")
+            f.write(f"Test Rate: {ci.test_rate*100:.2f}%\n")
+            f.write(f"Difference: {ci.difference*100:.2f} pp\n")
+            f.write(f"95% CI: [{ci.ci_lower*100:.2f}%, {ci.ci_upper*100:.2f}%]\n")
+            f.write(f"Contains Zero: {'Yes (not significant)' if ci.contains_zero else 'No (significant)'}\n")
             
             f.write("\n" + "="*70 + "\n")
             f.write("END OF SUMMARY\n")
             f.write("="*70 + "\n")
         
-        print(f"Results summary exported to: {output_path}")
+        self.reporter.exported(output_path)
     
-    def run_full_analysis(self) -> None:
-        """Execute complete analysis pipeline."""
-        print("\n" + "="*70)
-        print("STARTING FULL A/B TEST ANALYSIS")
-        print("="*70)
+    def run_stages(self, sequential: bool = True) -> None:
+        """
+        Run the analysis stages in pipeline order, without exporting the summary.
         
+        Shared by `run_full_analysis` and the batch runner so both run the same
+        stages. DataQualityError from the load guardrails propagates to the caller.
+        """
         self.load_data()
         self.calculate_aggregate_metrics()
         self.print_aggregate_summary()
         self.perform_t_tests()
+        self.perform_ratio_tests()
+        self.perform_report()
         self.calculate_confidence_interval_cart_to_purchase()
         self.generate_funnel_data()
+        if sequential:
+            self.perform_sequential_tests()
+    
+    @profiled('run_full_analysis')
+    def run_full_analysis(self) -> None:
+        """Execute complete analysis pipeline."""
+        self.reporter.started()
+        
+        try:
+            self.run_stages()
+        except DataQualityError as error:
+            self.reporter.stopped(error)
+            return
         
         # Export summary
         output_path = self.control_path.parent / 'analysis_results_summary.txt'
         self.export_results_summary(output_path)
         
-        print("\n" + "="*70)
-        print("ANALYSIS COMPLETE!")
-        print("="*70)
-        print("\nNext steps:")
-        print("  1. Review analysis_results_summary.txt")
-        print("  2. Use results to populate deliverable documents")
-        print("  3. Run funnel visualization notebook")
-        print("="*70)
+        self.reporter.finished()
 
 
-def main():
+def main(argv=None):
     """Main execution function."""
+    parser = argparse.ArgumentParser(description="A/B test analysis of the campaign data")
+    parser.add_argument("--report", choices=list(REPORTERS), default="text",
+                        help="Console output: text tables, quiet, or one JSON line per stage")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="Write per-stage timings, rows and memory to this JSON file")
+    parser.add_argument("--chrome-trace", type=str, default=None,
+                        help="Also write the stages as a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record the tracemalloc peak per stage (slower)")
+    args = parser.parse_args(argv)
+    
     # Paths relative to script location
     script_dir = Path(__file__).parent
     control_path = script_dir / 'control_group.csv'
@@ -468,11 +500,20 @@ def main():
     # Create analyzer instance
     analyzer = ABTestAnalyzer(
         control_path=str(control_path),
-        test_path=str(test_path)
+        test_path=str(test_path),
+        reporter=args.report,
     )
     
-    # Run full analysis
-    analyzer.run_full_analysis()
+    # Run full analysis (profiled when a profile or trace is requested)
+    if args.profile or args.chrome_trace:
+        with Profiler('final_project', trace_memory=args.trace_memory) as profiler:
+            analyzer.run_full_analysis()
+        if args.profile:
+            profiler.write_json(args.profile)
+        if args.chrome_trace:
+            profiler.write_chrome_trace(args.chrome_trace)
+    else:
+        analyzer.run_full_analysis()
     
     return analyzer
 
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Funnel engine for the A/B test analysis.
+
+Builds ordered N-stage funnels from either:
+1. Aggregate counters - one column per stage, as in control_group.csv / test_group.csv
+2. A raw event log - strict ordered per-user funnels within a conversion window
+
+Both return the same long table (one row per breakdown group and stage), and
+`stage_confidence_intervals` turns it into stage-to-stage conversion CIs
+between two variants.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from typing import List, Optional, Sequence, Tuple, Union
+
+# A stage is either a name (column / event name) or a (label, column / event name) pair
+Stage = Union[str, Tuple[str, str]]
+
+FUNNEL_COLUMNS = ['Step', 'Stage', 'Count', 'Entered', 'Rate', 'Drop', 'Overall']
+
+
+def _stage_pairs(stages: Sequence[Stage]) -> List[Tuple[str, str]]:
+    return [(stage, stage) if isinstance(stage, str) else tuple(stage) for stage in stages]
+
+
+def _long_funnel(counts: np.ndarray, labels: List[str], groups: pd.DataFrame) -> pd.DataFrame:
+    """Flatten a (groups x stages) count matrix into the long funnel table."""
+    n_groups, n_stages = counts.shape
+    entered = np.full(counts.shape, np.nan)
+    entered[:, 1:] = counts[:, :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = counts / entered * 100
+        overall = counts / counts[:, :1] * 100
+
+    funnel = groups.loc[groups.index.repeat(n_stages)].reset_index(drop=True)
+    funnel['Step'] = np.tile(np.arange(n_stages), n_groups)
+    funnel['Stage'] = np.tile(labels, n_groups)
+    integral = np.isfinite(counts).all() and np.array_equal(counts, np.round(counts))
+    funnel['Count'] = counts.ravel().astype(np.int64) if integral else counts.ravel()
+    funnel['Entered'] = entered.ravel()
+    funnel['Rate'] = rate.ravel()
+    funnel['Drop'] = 100 - funnel['Rate']
+    funnel['Overall'] = overall.ravel()
+    return funnel
+
+
+def funnel_from_counts(frame: pd.DataFrame, stages: Sequence[Stage], by: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Funnel from aggregate counters: each stage is a column summed per `by` group.
+
+    Example: funnel_from_counts(df, [('Clicks', '# of Website Clicks'), ...], by=['Group'])
+    """
+    pairs = _stage_pairs(stages)
+    columns = [column for _, column in pairs]
+    if by:
+        totals = frame.groupby(list(by), sort=True)[columns].sum()
+        groups = totals.index.to_frame(index=False)
+    else:
+        totals = frame[columns].sum().to_frame().T
+        groups = pd.DataFrame(index=range(1))
+    return _long_funnel(totals.to_numpy(dtype=float), [label for label, _ in pairs], groups)
+
+
+def first_stage_times(
+    user_codes: np.ndarray,
+    event_codes: np.ndarray,
+    timestamps: np.ndarray,
+    stage_codes: Sequence[int],
+    n_users: int,
+    window: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Entry time of every user into every stage of a strict ordered funnel (inf if not reached).
+
+    A user enters stage k at their first stage-k event at or after their entry
+    into stage k-1, and no later than `window` seconds after entering stage 0.
+    """
+    entry = np.full((n_users, len(stage_codes)), np.inf)
+    for k, code in enumerate(stage_codes):
+        rows = np.flatnonzero(event_codes == code)
+        users, times = user_codes[rows], timestamps[rows]
+        if k > 0:
+            keep = times >= entry[users, k - 1]
+            if window is not None:
+                keep &= times <= entry[users, 0] + window
+            users, times = users[keep], times[keep]
+        first = np.full(n_users, np.inf)
+        np.minimum.at(first, users, times)
+        entry[:, k] = first
+    return entry
+
+
+def funnel_from_events(
+    events: pd.DataFrame,
+    stages: Sequence[Stage],
+    window: Optional[float] = None,
+    by: Sequence[str] = (),
+    user_column: str = 'user_id',
+    event_column: str = 'event_name',
+    timestamp_column: str = 'timestamp',
+) -> pd.DataFrame:
+    """
+    Strict ordered per-user funnel from a raw event log.
+
+    `window` is the conversion window in seconds from entering the first stage.
+    Breakdown values in `by` (e.g. variant, platform) are taken from each user's
+    first event in the log.
+    """
+    pairs = _stage_pairs(stages)
+    user_codes, users = pd.factorize(events[user_column], sort=False)
+    event_codes, names = pd.factorize(events[event_column], sort=False)
+    ts = events[timestamp_column]
+    if pd.api.types.is_datetime64_any_dtype(ts.dtype):
+        timestamps = ts.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    else:
+        timestamps = ts.to_numpy(dtype=float)
+
+    name_codes = {name: code for code, name in enumerate(names)}
+    stage_codes = [name_codes.get(event_name, -1) for _, event_name in pairs]
+    reached = np.isfinite(first_stage_times(user_codes, event_codes, timestamps, stage_codes, len(users), window))
+
+    if by:
+        # factorize numbers users in order of appearance, so code k first occurs where the running max reaches k
+        running_max = np.maximum.accumulate(user_codes)
+        first_rows = np.flatnonzero(np.diff(running_max, prepend=-1) > 0)
+        dims = events[list(by)].iloc[first_rows].reset_index(drop=True)
+        group_codes = dims.groupby(list(by), sort=True, dropna=False).ngroup().to_numpy()
+        groups = dims.drop_duplicates().sort_values(list(by)).reset_index(drop=True)
+    else:
+        group_codes = np.zeros(len(users), dtype=np.int64)
+        groups = pd.DataFrame(index=range(1))
+
+    counts = np.column_stack([
+        np.bincount(group_codes[reached[:, k]], minlength=len(groups)) for k in range(len(pairs))
+    ]).astype(float)
+    return _long_funnel(counts, [label for label, _ in pairs], groups)
+
+
+def stage_confidence_intervals(
+    funnel: pd.DataFrame,
+    variant_column: str = 'Group',
+    control: str = 'Control',
+    treatment: str = 'Test',
+    confidence: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Wald CI for the treatment - control difference of every stage-to-stage conversion rate.
+
+    Same formula as ABTestAnalyzer.calculate_confidence_interval_cart_to_purchase,
+    applied to all stages (and all other breakdown groups) at once.
+    """
+    keys = [c for c in funnel.columns if c not in FUNNEL_COLUMNS and c != variant_column] + ['Step', 'Stage']
+    steps = funnel[funnel['Step'] > 0]
+    ctrl = steps[steps[variant_column] == control].set_index(keys)
+    test = steps[steps[variant_column] == treatment].set_index(keys)
+    ctrl, test = ctrl.align(test, join='inner', axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_ctrl = ctrl['Count'] / ctrl['Entered']
+        p_test = test['Count'] / test['Entered']
+        se_diff = np.sqrt(p_ctrl * (1 - p_ctrl) / ctrl['Entered'] + p_test * (1 - p_test) / test['Entered'])
+    z = stats.norm.ppf(1 - (1 - confidence) / 2)
+    diff = p_test - p_ctrl
+
+    result = pd.DataFrame({
+        'control_rate': p_ctrl,
+        'test_rate': p_test,
+        'difference': diff,
+        'se_difference': se_diff,
+        'ci_lower': diff - z * se_diff,
+        'ci_upper': diff + z * se_diff,
+    })
+    result['contains_zero'] = (result['ci_lower'] <= 0) & (0 <= result['ci_upper'])
+    return result.reset_index()
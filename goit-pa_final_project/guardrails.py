@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Data-quality guardrails that run before any A/B analysis.
+
+Checks on the daily campaign rows of all variants at once:
+1. Required columns present
+2. Duplicate days and missing days (calendar gaps or incomplete rows) per variant;
+   missing days are fatal only when a variant lacks more than
+   `max_missing_share` of the calendar, smaller gaps are warnings
+3. Negative counters
+4. Hard range rules, e.g. clicks <= impressions (vectorised over all rows)
+5. Funnel order, e.g. purchases <= add to cart <= view content
+6. Sample ratio mismatch (SRM): chi-square test of the allocation against the
+   planned split; skipped when no allocation column is given
+
+Each check has a severity. Failed checks listed in `fatal` make
+`GuardrailReport.raise_if_failed` stop the run with `DataQualityError`, so no
+compute is spent on an invalid experiment; the others are reported as warnings.
+"""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from scipy import stats
+from typing import Dict, List, Optional, Sequence, Tuple
+
+FATAL_CHECKS = ('missing_columns', 'duplicate_days', 'missing_days', 'negative_values', 'range', 'srm')
+MAX_MISSING_SHARE = 0.1  # share of calendar days a variant may lack before missing_days stops the run
+
+
+class DataQualityError(ValueError):
+    """Raised when a fatal guardrail fails; carries the full report."""
+
+    def __init__(self, report: 'GuardrailReport'):
+        self.report = report
+        failed = ', '.join(check.name for check in report.failures)
+        super().__init__(f"Data quality guardrails failed: {failed}")
+
+
+@dataclass
+class GuardrailCheck:
+    """Outcome of one guardrail."""
+
+    name: str
+    passed: bool
+    fatal: bool
+    detail: str
+    rows: List = field(default_factory=list)
+    skipped: bool = False  # could not be evaluated; neither a pass nor a failure
+
+    @property
+    def status(self) -> str:
+        if self.skipped:
+            return 'SKIP'
+        if self.passed:
+            return 'OK'
+        return 'FAIL' if self.fatal else 'WARN'
+
+
+@dataclass
+class GuardrailReport:
+    checks: List[GuardrailCheck] = field(default_factory=list)
+
+    @property
+    def failures(self) -> List[GuardrailCheck]:
+        return [check for check in self.checks if check.fatal and not check.passed]
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [(c.name, c.status, c.detail) for c in self.checks], columns=['check', 'status', 'detail']
+        )
+
+    def raise_if_failed(self) -> None:
+        if not self.passed:
+            raise DataQualityError(self)
+
+
+def srm_test(observed: Sequence[float], expected_shares: Optional[Sequence[float]] = None) -> Tuple[float, float]:
+    """Chi-square goodness of fit of allocation counts to the planned shares (equal by default)."""
+    observed = np.asarray(observed, dtype=float)
+    shares = np.full(observed.size, 1 / observed.size) if expected_shares is None else np.asarray(expected_shares, dtype=float)
+    expected = observed.sum() * shares / shares.sum()
+    statistic, p_value = stats.chisquare(observed, expected)
+    return float(statistic), float(p_value)
+
+
+def run_guardrails(
+    frame: pd.DataFrame,
+    count_columns: Sequence[str],
+    variant_column: str = 'Group',
+    date_column: str = 'Date',
+    range_rules: Sequence[Tuple[str, str]] = (),
+    funnel_order: Sequence[str] = (),
+    allocation_column: Optional[str] = None,
+    expected_shares: Optional[Dict[str, float]] = None,
+    srm_alpha: float = 0.001,
+    max_missing_share: float = MAX_MISSING_SHARE,
+    fatal: Sequence[str] = FATAL_CHECKS,
+) -> GuardrailReport:
+    """
+    Run all guardrails on the combined daily rows of every variant.
+
+    range_rules : (smaller, larger) column pairs that must always hold
+    funnel_order : columns from the top of the funnel down; each stage should not exceed the previous one
+    allocation_column : per-row allocation counts (randomised units) for SRM; None -> SRM is skipped
+    expected_shares : planned split per variant, equal if None
+    max_missing_share : missing_days is fatal once a variant lacks more than this share of the calendar days
+    """
+    report = GuardrailReport()
+
+    def add(name, passed, detail, rows=()):
+        report.checks.append(GuardrailCheck(name, bool(passed), name in fatal, detail, list(rows)))
+
+    required = [variant_column, date_column, *count_columns]
+    missing = [column for column in required if column not in frame.columns]
+    add('missing_columns', not missing, f"missing: {missing}" if missing else "all required columns present")
+    if missing:
+        return report
+
+    variant_codes, variants = pd.factorize(frame[variant_column], sort=True)
+    dates = pd.to_datetime(frame[date_column])
+    values = frame[list(count_columns)].to_numpy(dtype=float)
+
+    # Duplicate and missing days per variant
+    duplicated = pd.MultiIndex.from_arrays([variant_codes, dates.to_numpy()]).duplicated()
+    add('duplicate_days', not duplicated.any(),
+        f"{duplicated.sum()} duplicate (variant, day) rows", frame.loc[duplicated, [variant_column, date_column]].values.tolist())
+
+    calendar = pd.date_range(dates.min(), dates.max(), freq='D')
+    incomplete = np.isnan(values).any(axis=1)
+    gaps, missing_shares = [], []
+    for code, variant in enumerate(variants):
+        present = dates[(variant_codes == code) & ~incomplete]
+        absent = calendar.difference(pd.DatetimeIndex(present))
+        gaps.extend((variant, day.date()) for day in absent)
+        missing_shares.append(len(absent) / len(calendar))
+    # A few gaps are a warning; a variant missing a large part of the period cannot be compared
+    worst = int(np.argmax(missing_shares))
+    report.checks.append(GuardrailCheck(
+        'missing_days', not gaps,
+        'missing_days' in fatal and missing_shares[worst] > max_missing_share,
+        f"{len(gaps)} missing or incomplete (variant, day) pairs; "
+        f"most in {variants[worst]}: {missing_shares[worst]:.0%} of {len(calendar)} days (limit {max_missing_share:.0%})",
+        gaps,
+    ))
+
+    negative = (values < 0).any(axis=1)
+    add('negative_values', not negative.any(), f"{negative.sum()} rows with negative counters",
+        frame.loc[negative, [variant_column, date_column]].values.tolist())
+
+    index = {column: i for i, column in enumerate(count_columns)}
+    for name, pairs in (('range', list(range_rules)), ('funnel_order', list(zip(funnel_order[1:], funnel_order[:-1])))):
+        if not pairs:
+            continue
+        smaller = np.array([index[a] for a, _ in pairs])
+        larger = np.array([index[b] for _, b in pairs])
+        # All rules over all rows in one comparison; NaN never counts as a violation
+        broken = values[:, smaller] > values[:, larger]
+        per_rule = broken.sum(axis=0)
+        detail = "; ".join(f"{a} > {b}: {n} rows" for (a, b), n in zip(pairs, per_rule) if n) or f"{len(pairs)} rules hold"
+        rows = frame.loc[broken.any(axis=1), [variant_column, date_column]].values.tolist()
+        add(name, not broken.any(), detail, rows)
+
+    # SRM on the allocation of the complete rows. Days per variant say nothing about
+    # how units were split, so without an allocation column the check is not run
+    if allocation_column is None:
+        report.checks.append(GuardrailCheck('srm', True, 'srm' in fatal,
+                                            "skipped: no allocation column with randomised units", skipped=True))
+        return report
+    column = frame[allocation_column].to_numpy(dtype=float)
+    allocation = np.bincount(variant_codes[~incomplete], weights=column[~incomplete], minlength=len(variants))
+    unit = allocation_column
+    shares = None if expected_shares is None else [expected_shares[variant] for variant in variants]
+    statistic, p_value = srm_test(allocation, shares)
+    split = ", ".join(f"{variant}={count:,.0f}" for variant, count in zip(variants, allocation))
+    add('srm', p_value >= srm_alpha, f"{unit}: {split}; chi2={statistic:.2f}, p={p_value:.4g}")
+    return report
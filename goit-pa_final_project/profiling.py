@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Stage-level instrumentation for the analysis pipelines.
+
+Per stage it records wall and CPU time, row count, current and peak RSS and
+(optionally) the tracemalloc peak of Python allocations, and writes one
+profile per run as JSON and, optionally, as a Chrome trace (chrome://tracing
+or https://ui.perfetto.dev).
+
+Stages are marked with the `profiled` decorator or the `stage` context
+manager. Both are no-ops unless a `Profiler` is active, so the instrumented
+code runs unchanged when nobody asks for a profile:
+
+    with Profiler('final_project', trace_memory=True) as profiler:
+        analyzer.run_full_analysis()
+    profiler.write_json('profile.json')
+    profiler.write_chrome_trace('trace.json')
+"""
+
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process now (Linux /proc), None elsewhere."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of the process RSS so far (POSIX), None elsewhere."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def _row_count(value) -> Optional[int]:
+    return len(value) if hasattr(value, 'shape') and hasattr(value, '__len__') else None
+
+
+@dataclass(slots=True)
+class StageRecord:
+    """Measurements of one stage call."""
+
+    name: str
+    parent: Optional[str]
+    depth: int
+    start_seconds: float
+    seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows: Optional[int] = None
+    rss_mb: Optional[float] = None
+    rss_delta_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    python_peak_mb: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Profiler:
+    """Collects StageRecords while active (`with Profiler(...)`)."""
+
+    _active: List['Profiler'] = []
+
+    def __init__(self, name: str, trace_memory: bool = False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.records: List[StageRecord] = []
+        self._open: List[StageRecord] = []
+        self._python_peaks: List[int] = []
+        self._started_tracing = False
+        self.started_at = None
+        self._origin = None
+        self.total_seconds = 0.0
+
+    def __enter__(self) -> 'Profiler':
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.started_at = datetime.now()
+        self._origin = time.perf_counter()
+        Profiler._active.append(self)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.total_seconds = time.perf_counter() - self._origin
+        Profiler._active.remove(self)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @classmethod
+    def current(cls) -> Optional['Profiler']:
+        return cls._active[-1] if cls._active else None
+
+    def _fold_python_peak(self) -> None:
+        # tracemalloc has one global peak; fold it into every open stage before it is reset
+        peak = tracemalloc.get_traced_memory()[1]
+        self._python_peaks = [max(p, peak) for p in self._python_peaks]
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None):
+        """Measure the enclosed block as one stage; set `record.rows` inside if known later."""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            self._fold_python_peak()
+            tracemalloc.reset_peak()
+        parent = self._open[-1].name if self._open else None
+        record = StageRecord(name, parent, len(self._open), time.perf_counter() - self._origin, rows=rows)
+        self._open.append(record)
+        self._python_peaks.append(0)
+        rss_before = current_rss_mb()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except BaseException as error:
+            record.error = type(error).__name__
+            raise
+        finally:
+            record.seconds = time.perf_counter() - wall
+            record.cpu_seconds = time.process_time() - cpu
+            record.rss_mb = current_rss_mb()
+            if rss_before is not None and record.rss_mb is not None:
+                record.rss_delta_mb = record.rss_mb - rss_before
+            record.peak_rss_mb = peak_rss_mb()
+            if tracing and tracemalloc.is_tracing():
+                self._fold_python_peak()
+                record.python_peak_mb = self._python_peaks[-1] / MB
+            self._python_peaks.pop()
+            self._open.pop()
+            self.records.append(record)
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per stage call, in start order."""
+        records = sorted(self.records, key=lambda r: r.start_seconds)
+        return pd.DataFrame([asdict(r) for r in records], columns=[f.name for f in fields(StageRecord)])
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds') if self.started_at else None,
+            'total_seconds': self.total_seconds,
+            'peak_rss_mb': peak_rss_mb(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'stages': [asdict(r) for r in sorted(self.records, key=lambda r: r.start_seconds)],
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Complete ('X') events in the Trace Event Format, one per stage call."""
+        pid = os.getpid()
+        events = [
+            {
+                'name': r.name, 'cat': self.name, 'ph': 'X', 'pid': pid, 'tid': 0,
+                'ts': r.start_seconds * 1e6, 'dur': r.seconds * 1e6,
+                'args': {k: v for k, v in asdict(r).items() if k not in ('name', 'start_seconds', 'seconds') and v is not None},
+            }
+            for r in self.records
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+class _Untracked:
+    """Stand-in record when no profiler is active; attribute writes are ignored."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_UNTRACKED = _Untracked()
+
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None):
+    """Stage of the active profiler, or nothing when profiling is off."""
+    profiler = Profiler.current()
+    if profiler is None:
+        yield _UNTRACKED
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
+
+
+def profiled(name: Optional[str] = None, rows: Optional[Callable[..., int]] = None):
+    """
+    Decorator: every call is a stage of the active profiler.
+
+    rows : optional callable with the call's arguments, evaluated after the
+        call, returning the row count; by default the length of the returned
+        frame/array, else of the first frame/array argument.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = Profiler.current()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.stage(stage_name) as record:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    record.rows = rows(*args, **kwargs)
+                else:
+                    record.rows = _row_count(result)
+                    if record.rows is None:
+                        record.rows = next((n for n in map(_row_count, args) if n is not None), None)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-metric, multi-segment A/B report engine.
+
+Input is a long table of unit-level values: one row per unit (user, day, ...)
+and metric, with the variant and any segment columns (Region, device, cohort).
+Every metric x segment combination is a cell of the report:
+
+1. Per-cell, per-variant n / mean / variance in one grouped pass (bincount over
+   integer cell codes, two passes over the values for a stable variance)
+2. Vectorised tests over all cells at once: Welch t-test for continuous
+   metrics, two-proportion z-test for 0/1 metrics
+3. Benjamini-Hochberg or Holm correction across the whole grid
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from typing import Dict, Optional, Sequence
+
+REPORT_TESTS = ('welch', 'z')
+CORRECTIONS = ('bh', 'holm', 'none')
+
+
+def adjust_pvalues(p_values, method: str = 'bh') -> np.ndarray:
+    """Benjamini-Hochberg (FDR) or Holm (FWER) adjusted p-values; NaNs are left out."""
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{method}', expected one of {CORRECTIONS}")
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(p_values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    if method == 'none' or valid.size == 0:
+        adjusted[valid] = p_values[valid]
+        return adjusted
+
+    order = valid[np.argsort(p_values[valid], kind='stable')]
+    ranked = p_values[order]
+    m = ranked.size
+    rank = np.arange(1, m + 1)
+    if method == 'bh':
+        scaled = np.minimum.accumulate((ranked * m / rank)[::-1])[::-1]
+    else:
+        scaled = np.maximum.accumulate(ranked * (m - rank + 1))
+    adjusted[order] = np.minimum(scaled, 1.0)
+    return adjusted
+
+
+def to_long(frame: pd.DataFrame, metrics: Sequence[str], id_columns: Sequence[str]) -> pd.DataFrame:
+    """Melt wide unit-level columns into the (id columns, metric, value) layout of `ab_report`."""
+    return frame.melt(id_vars=list(id_columns), value_vars=list(metrics), var_name='metric', value_name='value')
+
+
+def _cell_codes(frame: pd.DataFrame, columns: Sequence[str], rows: np.ndarray):
+    """Integer code of each selected row's (metric, segments...) combination and the decoded key table."""
+    codes, uniques = [], []
+    for column in columns:
+        column_codes, column_uniques = pd.factorize(frame[column], sort=column != 'metric', use_na_sentinel=False)
+        codes.append(column_codes[rows])
+        uniques.append(column_uniques)
+
+    combined = np.zeros(rows.size, dtype=np.int64)
+    for column_codes, column_uniques in zip(codes, uniques):
+        combined = combined * len(column_uniques) + column_codes
+    cell_codes, cell_keys = pd.factorize(combined, sort=True)
+
+    keys = {}
+    remainder = np.asarray(cell_keys)
+    for column, column_uniques in reversed(list(zip(columns, uniques))):
+        remainder, part = np.divmod(remainder, len(column_uniques))
+        keys[column] = column_uniques.take(part)
+    return cell_codes, pd.DataFrame({column: keys[column] for column in columns})
+
+
+def ab_report(
+    data: pd.DataFrame,
+    segments: Sequence[str] = (),
+    variant_column: str = 'Group',
+    control: str = 'Control',
+    treatment: str = 'Test',
+    tests: Optional[Dict[str, str]] = None,
+    correction: str = 'bh',
+    alpha: float = 0.05,
+    confidence: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Test - Control comparison for every metric x segment cell of a long table.
+
+    data     : columns `metric`, `value`, `variant_column` and the `segments` columns
+    tests    : optional {metric: 'welch' | 'z'}; by default 0/1 metrics get the
+               z-test and all others the Welch t-test
+    correction : 'bh', 'holm' or 'none', applied across all cells
+
+    Returns one row per cell with group sizes, means, the difference and its CI,
+    the test statistic, raw and adjusted p-values.
+    """
+    if correction not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{correction}', expected one of {CORRECTIONS}")
+    # Factorize instead of comparing strings row by row; other variants get -1 and are dropped
+    variant_codes, variant_values = pd.factorize(data[variant_column])
+    arms = np.array([{control: 0, treatment: 1}.get(v, -1) for v in variant_values] + [-1])
+    arm = arms[variant_codes]
+    values = data['value'].to_numpy(dtype=float)
+    rows = np.flatnonzero((arm >= 0) & ~np.isnan(values))
+    values, arm = values[rows], arm[rows]
+    cell_codes, report = _cell_codes(data, ['metric', *segments], rows)
+    n_cells = len(report)
+
+    # One grouped pass: n, mean and centred sum of squares per (cell, variant)
+    groups = cell_codes * 2 + arm
+    n = np.bincount(groups, minlength=2 * n_cells).reshape(n_cells, 2).astype(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(groups, weights=values, minlength=2 * n_cells).reshape(n_cells, 2) / n
+        centred = (values - mean.ravel()[groups]) ** 2
+        var = np.bincount(groups, weights=centred, minlength=2 * n_cells).reshape(n_cells, 2) / (n - 1)
+    non_binary = np.bincount(cell_codes, weights=(values != 0) & (values != 1), minlength=n_cells) > 0
+
+    test = np.where(non_binary, 'welch', 'z').astype(object)
+    for metric, kind in (tests or {}).items():
+        if kind not in REPORT_TESTS:
+            raise ValueError(f"Unknown test '{kind}' for metric '{metric}', expected one of {REPORT_TESTS}")
+        test[(report['metric'] == metric).to_numpy()] = kind
+    is_z = test == 'z'
+
+    diff = mean[:, 1] - mean[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Welch: unpooled variances and Welch-Satterthwaite df
+        se_parts = var / n
+        se = np.sqrt(se_parts.sum(axis=1))
+        df = se_parts.sum(axis=1) ** 2 / (se_parts ** 2 / (n - 1)).sum(axis=1)
+        # z-test for proportions: pooled SE for the test, unpooled SE for the CI
+        p_pool = (mean * n).sum(axis=1) / n.sum(axis=1)
+        se_pooled = np.sqrt(p_pool * (1 - p_pool) * (1 / n).sum(axis=1))
+        se_unpooled = np.sqrt((mean * (1 - mean) / n).sum(axis=1))
+
+        statistic = np.where(is_z, diff / se_pooled, diff / se)
+        p_value = np.where(is_z, 2 * stats.norm.sf(np.abs(statistic)), 2 * stats.t.sf(np.abs(statistic), df))
+        critical = np.where(is_z, stats.norm.ppf((1 + confidence) / 2), stats.t.ppf((1 + confidence) / 2, df))
+        margin = critical * np.where(is_z, se_unpooled, se)
+        relative = diff / mean[:, 0]
+
+    p_adjusted = adjust_pvalues(p_value, correction)
+    report['test'] = test
+    report['n_control'] = n[:, 0].astype(np.int64)
+    report['n_test'] = n[:, 1].astype(np.int64)
+    report['control_mean'] = mean[:, 0]
+    report['test_mean'] = mean[:, 1]
+    report['difference'] = diff
+    report['relative_difference'] = relative
+    report['ci_lower'] = diff - margin
+    report['ci_upper'] = diff + margin
+    report['statistic'] = statistic
+    report['p_value'] = p_value
+    report['p_adjusted'] = p_adjusted
+    report['significant'] = p_adjusted < alpha
+    return report
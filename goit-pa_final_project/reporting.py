@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+Reporters for the ABTestAnalyzer stage results.
+
+- `Reporter`: quiet, every hook is a no-op (batch runs, library use)
+- `TextReporter`: the console tables of the interactive analysis
+- `JsonReporter`: one JSON object per stage and line, for logs and pipelines
+
+Stages compute first and hand their result object to the reporter, so table
+formatting and `to_string` only run when a text report is requested.
+"""
+
+import json
+import sys
+import numpy as np
+import pandas as pd
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Dict, TextIO, Union
+
+from guardrails import GuardrailReport
+from results import AggregateMetrics, FunnelResult, LoadSummary, ProportionDifferenceCI, TTestResult
+
+RULE = "=" * 70
+
+
+class Reporter:
+    """Quiet reporter: receives every stage result and renders nothing."""
+
+    def started(self) -> None:
+        pass
+
+    def loading(self) -> None:
+        pass
+
+    def guardrails(self, report: GuardrailReport) -> None:
+        pass
+
+    def loaded(self, summary: LoadSummary) -> None:
+        pass
+
+    def stopped(self, error: Exception) -> None:
+        pass
+
+    def aggregate_metrics(self, metrics: AggregateMetrics) -> None:
+        pass
+
+    def aggregate_summary(self, metrics: AggregateMetrics) -> None:
+        pass
+
+    def t_tests(self, results: Dict[str, TTestResult]) -> None:
+        pass
+
+    def ratio_tests(self, results: pd.DataFrame) -> None:
+        pass
+
+    def report(self, report: pd.DataFrame, correction: str) -> None:
+        pass
+
+    def confidence_interval(self, ci: ProportionDifferenceCI) -> None:
+        pass
+
+    def funnel(self, funnel: FunnelResult) -> None:
+        pass
+
+    def sequential(self, daily: pd.DataFrame) -> None:
+        pass
+
+    def exported(self, output_path: Union[str, Path]) -> None:
+        pass
+
+    def finished(self) -> None:
+        pass
+
+
+def _banner(title: str) -> None:
+    print("\n" + RULE)
+    print(title)
+    print(RULE)
+
+
+class TextReporter(Reporter):
+    """Human-readable console tables."""
+
+    def started(self) -> None:
+        _banner("STARTING FULL A/B TEST ANALYSIS")
+
+    def loading(self) -> None:
+        print("Loading data...")
+
+    def guardrails(self, report: GuardrailReport) -> None:
+        print("\nRunning data quality guardrails...")
+        for check in report.checks:
+            print(f"  [{check.status:<4}] {check.name:<16} {check.detail}")
+
+    def loaded(self, summary: LoadSummary) -> None:
+        print("\nChecking for missing values...")
+        print(f"Control missing: {summary.control_missing}")
+        print(f"Test missing: {summary.test_missing}")
+        print(f"\nRemoved {summary.removed_rows} incomplete rows from control")
+        print(f"\nData loaded successfully:")
+        print(f"  Control: {summary.control_days} days")
+        print(f"  Test: {summary.test_days} days")
+
+    def stopped(self, error: Exception) -> None:
+        print(f"\n✗ {error}")
+        print("ANALYSIS STOPPED: fix the input data and re-run.")
+
+    def aggregate_metrics(self, metrics: AggregateMetrics) -> None:
+        _banner("CALCULATING AGGREGATE METRICS")
+
+    def aggregate_summary(self, metrics: AggregateMetrics) -> None:
+        _banner("AGGREGATE METRICS SUMMARY")
+        ctrl, test = metrics.control, metrics.test
+
+        print(f"\n{'Metric':<30} {'Control':<20} {'Test':<20} {'Difference':<15}")
+        print("-" * 85)
+
+        # Volume metrics
+        print(f"{'Total Spend ($)':<30} {ctrl.total_spend:>20,.2f} {test.total_spend:>20,.2f} {test.total_spend-ctrl.total_spend:>15,.2f}")
+        print(f"{'Total Impressions':<30} {ctrl.total_impressions:>20,} {test.total_impressions:>20,} {test.total_impressions-ctrl.total_impressions:>15,}")
+        print(f"{'Total Clicks':<30} {ctrl.total_clicks:>20,} {test.total_clicks:>20,} {test.total_clicks-ctrl.total_clicks:>15,}")
+        print(f"{'Total Purchases':<30} {ctrl.total_purchases:>20,} {test.total_purchases:>20,} {test.total_purchases-ctrl.total_purchases:>15,}")
+
+        print("\n" + "-" * 85)
+
+        # Rate metrics (percentages)
+        print(f"{'CTR (%)':<30} {ctrl.ctr*100:>20.3f} {test.ctr*100:>20.3f} {(test.ctr-ctrl.ctr)*100:>15.3f}")
+        print(f"{'Cart→Purchase (%)':<30} {ctrl.cart_to_purchase*100:>20.3f} {test.cart_to_purchase*100:>20.3f} {(test.cart_to_purchase-ctrl.cart_to_purchase)*100:>15.3f}")
+        print(f"{'Overall Conversion (%)':<30} {ctrl.overall_conversion*100:>20.3f} {test.overall_conversion*100:>20.3f} {(test.overall_conversion-ctrl.overall_conversion)*100:>15.3f}")
+
+        print("\n" + "-" * 85)
+
+        # Cost metrics
+        print(f"{'Cost per Click ($)':<30} {ctrl.cost_per_click:>20.2f} {test.cost_per_click:>20.2f} {test.cost_per_click-ctrl.cost_per_click:>15.2f}")
+        print(f"{'Cost per Purchase ($)':<30} {ctrl.cost_per_purchase:>20.2f} {test.cost_per_purchase:>20.2f} {test.cost_per_purchase-ctrl.cost_per_purchase:>15.2f}")
+
+        # Relative improvements
+        _banner("RELATIVE IMPROVEMENTS (Test vs Control)")
+        for metric, pct in metrics.relative_improvements().items():
+            direction = "↑" if pct > 0 else "↓"
+            print(f"{metric:<30} {direction} {abs(pct):>6.2f}%")
+
+    def t_tests(self, results: Dict[str, TTestResult]) -> None:
+        _banner("STATISTICAL SIGNIFICANCE TESTING (Independent T-Tests)")
+        print(f"\n{'Metric':<35} {'t-statistic':<15} {'p-value':<15} {'Significant?':<15}")
+        print("-" * 80)
+        for name, result in results.items():
+            sig_marker = "✓ YES" if result.significant else "✗ NO"
+            if result.method == 'CUPED':
+                sig_marker += f" (CUPED, var -{result.variance_reduction*100:.0f}%)"
+            print(f"{name:<35} {result.t_statistic:>15.4f} {result.p_value:>15.6f} {sig_marker:<15}")
+
+    def ratio_tests(self, results: pd.DataFrame) -> None:
+        _banner("RATIO METRICS (Delta Method)")
+        print(f"\n{'Metric':<26} {'Control':>10} {'Test':>10} {'Lift':>9} {'Lift CI':>20} {'p-value':>10}")
+        print("-" * 90)
+        for row in results.itertuples(index=False):
+            lift_ci = f"[{row.relative_ci_lower*100:+.1f}%, {row.relative_ci_upper*100:+.1f}%]"
+            print(f"{row.metric:<26} {row.control_ratio:>10.4f} {row.test_ratio:>10.4f} "
+                  f"{row.relative_lift*100:>+8.1f}% {lift_ci:>20} {row.p_value:>10.6f}")
+
+    def report(self, report: pd.DataFrame, correction: str) -> None:
+        _banner(f"MULTI-METRIC REPORT ({correction.upper()}-adjusted p-values)")
+        print(f"\n{'Metric':<30} {'Difference':>15} {'p-value':>12} {'Adjusted':>12} {'Significant?':>14}")
+        print("-" * 85)
+        for row in report.itertuples(index=False):
+            sig_marker = "✓ YES" if row.significant else "✗ NO"
+            print(f"{row.metric:<30} {row.difference:>15.4f} {row.p_value:>12.6f} {row.p_adjusted:>12.6f} {sig_marker:>14}")
+
+    def confidence_interval(self, ci: ProportionDifferenceCI) -> None:
+        _banner("CONFIDENCE INTERVAL: Cart→Purchase Conversion Rate Difference")
+
+        print(f"\nControl Group:")
+        print(f"  Add to Cart: {ci.ctrl_carts:,}")
+        print(f"  Purchases: {ci.ctrl_purchases:,}")
+        print(f"  Conversion Rate: {ci.control_rate*100:.2f}%")
+
+        print(f"\nTest Group:")
+        print(f"  Add to Cart: {ci.test_carts:,}")
+        print(f"  Purchases: {ci.test_purchases:,}")
+        print(f"  Conversion Rate: {ci.test_rate*100:.2f}%")
+
+        print(f"\nDifference (Test - Control):")
+        print(f"  Point Estimate: {ci.difference*100:.2f} percentage points")
+        print(f"  Standard Error: {ci.se_difference*100:.2f} pp")
+
+        print(f"\n{ci.confidence_level*100:.0f}% Confidence Interval:")
+        print(f"  Lower Bound: {ci.ci_lower*100:.2f} pp")
+        print(f"  Upper Bound: {ci.ci_upper*100:.2f} pp")
+        print(f"  Interval: [{ci.ci_lower*100:.2f}%, {ci.ci_upper*100:.2f}%]")
+
+        if ci.contains_zero:
+            print(f"\n⚠️  CI contains zero → NO statistically significant difference")
+        else:
+            print(f"\n✓ CI does NOT contain zero → statistically significant difference")
+            if ci.difference > 0:
+                print(f"  Test campaign has BETTER conversion rate")
+            else:
+                print(f"  Control campaign has BETTER conversion rate")
+
+    def funnel(self, funnel: FunnelResult) -> None:
+        _banner("FUNNEL ANALYSIS")
+        table = funnel.table
+
+        print("\nFunnel Stage Counts:")
+        print(table[['Stage', 'Control', 'Test']].to_string(index=False))
+
+        print("\nStage-to-Stage Conversion Rates (%):")
+        print(table[['Stage', 'Control_Rate', 'Test_Rate']].to_string(index=False))
+
+        print("\nStage-to-Stage Difference, 95% CI (pp):")
+        ci_view = funnel.stage_ci[['Stage', 'difference', 'ci_lower', 'ci_upper']].copy()
+        ci_view[['difference', 'ci_lower', 'ci_upper']] *= 100
+        ci_view['Significant?'] = np.where(funnel.stage_ci['contains_zero'], "✗ NO", "✓ YES")
+        print(ci_view.to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+
+    def sequential(self, daily: pd.DataFrame) -> None:
+        _banner("SEQUENTIAL MONITORING (mSPRT, always-valid p-values)")
+        print(f"\n{'Metric':<30} {'Final p-value':<15} {'First significant day':<25}")
+        print("-" * 70)
+        for metric, rows in daily.groupby('Metric', sort=False):
+            significant = rows[rows['rejected']]
+            first_day = significant['Date'].iloc[0].strftime('%d.%m.%Y') if len(significant) else "—"
+            print(f"{metric:<30} {rows['p_value'].iloc[-1]:>15.6f} {first_day:<25}")
+
+    def exported(self, output_path: Union[str, Path]) -> None:
+        _banner("EXPORTING RESULTS SUMMARY")
+        print(f"Results summary exported to: {output_path}")
+
+    def finished(self) -> None:
+        _banner("ANALYSIS COMPLETE!")
+        print("\nNext steps:")
+        print("  1. Review analysis_results_summary.txt")
+        print("  2. Use results to populate deliverable documents")
+        print("  3. Run funnel visualization notebook")
+        print(RULE)
+
+
+def _encode(value):
+    """json.dumps fallback for result objects, frames and numpy / pandas scalars."""
+    if is_dataclass(value):
+        return {f.name: getattr(value, f.name) for f in fields(value)}
+    if isinstance(value, pd.DataFrame):
+        return value.astype(object).where(value.notna(), None).to_dict(orient='records')
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, Path)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JsonReporter(Reporter):
+    """One JSON line per stage: {"stage": ..., "result": ...}."""
+
+    def __init__(self, stream: TextIO = None):
+        self.stream = stream or sys.stdout
+
+    def emit(self, stage: str, result=None, **extra) -> None:
+        record = {'stage': stage, **extra, 'result': result}
+        self.stream.write(json.dumps(record, default=_encode, ensure_ascii=False) + "\n")
+
+    def guardrails(self, report: GuardrailReport) -> None:
+        self.emit('guardrails', report.to_frame())
+
+    def loaded(self, summary: LoadSummary) -> None:
+        self.emit('load', {f.name: getattr(summary, f.name) for f in fields(summary) if f.name != 'guardrails'})
+
+    def stopped(self, error: Exception) -> None:
+        self.emit('stopped', str(error))
+
+    def aggregate_metrics(self, metrics: AggregateMetrics) -> None:
+        self.emit('aggregate_metrics', metrics, relative_improvements=metrics.relative_improvements())
+
+    def t_tests(self, results: Dict[str, TTestResult]) -> None:
+        self.emit('t_tests', results)
+
+    def ratio_tests(self, results: pd.DataFrame) -> None:
+        self.emit('ratio_tests', results)
+
+    def report(self, report: pd.DataFrame, correction: str) -> None:
+        self.emit('report', report, correction=correction)
+
+    def confidence_interval(self, ci: ProportionDifferenceCI) -> None:
+        self.emit('confidence_interval', ci)
+
+    def funnel(self, funnel: FunnelResult) -> None:
+        self.emit('funnel', funnel)
+
+    def sequential(self, daily: pd.DataFrame) -> None:
+        self.emit('sequential', daily)
+
+    def exported(self, output_path: Union[str, Path]) -> None:
+        self.emit('export', output_path)
+
+
+REPORTERS = {'text': TextReporter, 'quiet': Reporter, 'json': JsonReporter}
+
+
+def get_reporter(reporter: Union[str, Reporter]) -> Reporter:
+    """Reporter instance from a name in REPORTERS, or the instance itself."""
+    if isinstance(reporter, Reporter):
+        return reporter
+    if reporter not in REPORTERS:
+        raise ValueError(f"Unknown reporter '{reporter}', expected one of {tuple(REPORTERS)}")
+    return REPORTERS[reporter]()
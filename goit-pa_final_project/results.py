@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Structured results of the ABTestAnalyzer stages.
+
+Every stage returns one of these slotted dataclasses (or a DataFrame for the
+tabular stages) instead of printing as it computes. Rendering them as console
+tables is left to a reporter (see reporting.py), so a quiet or JSON run never
+formats anything.
+"""
+
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from guardrails import GuardrailReport
+
+
+@dataclass(slots=True)
+class LoadSummary:
+    """Row counts after loading and cleaning both groups."""
+
+    control_days: int
+    test_days: int
+    control_missing: int
+    test_missing: int
+    removed_rows: int
+    guardrails: GuardrailReport
+
+
+@dataclass(slots=True)
+class GroupMetrics:
+    """Campaign totals, funnel rates and cost metrics of one group."""
+
+    total_spend: float
+    total_impressions: int
+    total_reach: int
+    total_clicks: int
+    total_searches: int
+    total_view_content: int
+    total_add_to_cart: int
+    total_purchases: int
+    days: int
+    ctr: float
+    click_to_search: float
+    search_to_view: float
+    view_to_cart: float
+    cart_to_purchase: float
+    overall_conversion: float
+    cost_per_click: float
+    cost_per_purchase: float
+    roas_proxy: float
+    avg_daily_spend: float
+    avg_daily_purchases: float
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'GroupMetrics':
+        """Aggregate the daily rows of one group."""
+        spend = df['Spend [USD]'].sum()
+        impressions = df['# of Impressions'].sum()
+        clicks = df['# of Website Clicks'].sum()
+        searches = df['# of Searches'].sum()
+        view_content = df['# of View Content'].sum()
+        add_to_cart = df['# of Add to Cart'].sum()
+        purchases = df['# of Purchase'].sum()
+        days = len(df)
+
+        def rate(numerator, denominator):
+            return numerator / denominator if denominator > 0 else 0
+
+        return cls(
+            total_spend=spend,
+            total_impressions=impressions,
+            total_reach=df['Reach'].sum(),
+            total_clicks=clicks,
+            total_searches=searches,
+            total_view_content=view_content,
+            total_add_to_cart=add_to_cart,
+            total_purchases=purchases,
+            days=days,
+            ctr=rate(clicks, impressions),
+            click_to_search=rate(searches, clicks),
+            search_to_view=rate(view_content, searches),
+            view_to_cart=rate(add_to_cart, view_content),
+            cart_to_purchase=rate(purchases, add_to_cart),
+            overall_conversion=rate(purchases, clicks),
+            cost_per_click=rate(spend, clicks),
+            cost_per_purchase=rate(spend, purchases),
+            roas_proxy=rate(purchases, spend),
+            avg_daily_spend=spend / days,
+            avg_daily_purchases=purchases / days,
+        )
+
+
+@dataclass(slots=True)
+class AggregateMetrics:
+    control: GroupMetrics
+    test: GroupMetrics
+
+    def relative_improvements(self) -> Dict[str, float]:
+        """Test vs Control change of the headline metrics, in percent."""
+        ctrl, test = self.control, self.test
+        return {
+            'CTR': (test.ctr / ctrl.ctr - 1) * 100,
+            'Cart→Purchase': (test.cart_to_purchase / ctrl.cart_to_purchase - 1) * 100,
+            'Overall Conversion': (test.overall_conversion / ctrl.overall_conversion - 1) * 100,
+            'Cost per Purchase': (test.cost_per_purchase / ctrl.cost_per_purchase - 1) * 100,
+        }
+
+
+@dataclass(slots=True)
+class TTestResult:
+    """Welch (or CUPED-adjusted Welch) test of one daily metric."""
+
+    t_statistic: float
+    p_value: float
+    significant: bool
+    control_mean: float
+    test_mean: float
+    control_std: float
+    test_std: float
+    method: str = 'Welch'
+    theta: Optional[float] = None
+    variance_reduction: Optional[float] = None
+
+
+@dataclass(slots=True)
+class ProportionDifferenceCI:
+    """Normal-approximation CI for the Test - Control difference of a conversion rate."""
+
+    control_rate: float
+    test_rate: float
+    difference: float
+    se_difference: float
+    confidence_level: float
+    z_score: float
+    ci_lower: float
+    ci_upper: float
+    contains_zero: bool
+    ctrl_purchases: int
+    ctrl_carts: int
+    test_purchases: int
+    test_carts: int
+
+
+@dataclass(slots=True)
+class FunnelResult:
+    """Wide funnel table (one row per stage) and stage-to-stage difference CIs."""
+
+    table: pd.DataFrame
+    stage_ci: pd.DataFrame
@@ -1,8 +1,15 @@
+import math
+import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import shutil
 from pathlib import Path
 
+import xlsxwriter
+
+from streaming_stats import approximate_median_mode
+
 # Налаштування шляхів
 BASE_DIR = Path(__file__).resolve().parent
 INPUT_PATH = BASE_DIR / "data_input.csv"
@@ -11,9 +18,51 @@ FINAL_OUTPUT_PATH = BASE_DIR / "Fefelov_PA_assignment_1.xlsx"
 PLOT_HISTOGRAM = BASE_DIR / "histogram.png"
 PLOT_BOXPLOT = BASE_DIR / "boxplot.png"
 
+# Наближені медіана/мода (скетчі) для дуже великих груп; за замовчуванням — точний розрахунок
+USE_APPROXIMATE_STATS = os.environ.get("PA_APPROXIMATE_STATS", "0") == "1"
+
+# Потоковий експорт (xlsxwriter constant_memory) для великих аркушів з даними
+USE_STREAMING_EXPORT = os.environ.get("PA_STREAMING_EXPORT", "0") == "1"
+EXCEL_MAX_ROWS = 1_048_576  # ліміт рядків аркуша Excel (разом із заголовком)
+
+# Скільки значень моди показувати в клітинці та поясненні, якщо їх кілька
+MAX_MODE_VALUES = 10
+
+# Формати колонок для кожного аркуша: (діапазон, ширина, назва формату)
+SHEET_COLUMNS = {
+    "data": [("A:A", 12, "text"), ("B:B", 12, "number")],
+    "metrics": [
+        ("A:A", 14, "text"),
+        ("B:B", 20, "number"),
+        ("C:E", 18, "number"),
+        ("F:F", 20, "number"),
+        ("G:G", 28, "number"),
+        ("H:H", 22, "percent"),
+        # Лише в наближеному режимі: межі похибок скетчів
+        ("I:I", 26, "percent_fine"),
+        ("J:J", 26, "integer"),
+    ],
+    "summary": [("A:A", 12, "text"), ("B:B", 80, "text")],
+}
+
+# Параметри гістограм: кількість бінів і сітка графіків на одну сторінку
+HIST_BINS = 10
+HIST_COLS = 3
+HIST_ROWS_PER_PAGE = 4
+
+
+def build_interpretation(
+    mean_val: float,
+    median_val: float,
+    mode_text: str,
+    std_val: float,
+    approximation: dict | None = None,
+) -> str:
+    """Формує коротке текстове пояснення для менеджера.
 
-def build_interpretation(mean_val: float, median_val: float, mode_text: str, std_val: float) -> str:
-    """Формує коротке текстове пояснення для менеджера."""
+    `approximation` — межі похибок з `approximate_median_mode`, якщо медіана та мода
+    оцінені наближено.
+    """
     diff = mean_val - median_val
     if abs(diff) <= 0.1:
         balance = "Середнє практично дорівнює медіані — розподіл симетричний."  # noqa: E501
@@ -47,165 +96,297 @@ def build_interpretation(mean_val: float, median_val: float, mode_text: str, std
             f"Стандартне відхилення {std_val:.2f} (коефіцієнт варіації {cv:.1%}) вказує на значні коливання показників."  # noqa: E501
         )
 
-    return " ".join([balance, mode_phrase, dispersion])
+    parts = [balance, mode_phrase, dispersion]
+    if approximation is not None:
+        parts.append(
+            "Медіана та мода оцінені наближено: "
+            f"похибка рангу медіани не перевищує {approximation['median_rank_error']:.2%} "
+            f"(медіана в межах {approximation['median_low']:.2f}–{approximation['median_high']:.2f}), "
+            f"частота моди може бути завищена не більше ніж на {approximation['mode_count_error']}."  # noqa: E501
+        )
 
+    return " ".join(parts)
 
-# Завантаження даних
-raw_df = pd.read_csv(INPUT_PATH)
-raw_df = raw_df.sort_values(["dataset", "value"]).reset_index(drop=True)
 
-# Розрахунок метрик для кожного датасету
-metrics = []
-interpretations = []
-for dataset_name, group in raw_df.groupby("dataset"):
-    values = group["value"].astype(float)
-    mean_val = values.mean()
-    median_val = values.median()
-    mode_values = values.mode().tolist()
-    if len(mode_values) == len(values):
-        mode_text = ""
-    else:
-        mode_text = ", ".join(map(str, mode_values))
-    std_val = values.std(ddof=0)
-    metric_row = {
-        "dataset": dataset_name,
-        "count": len(values),
-        "mean": mean_val,
-        "median": median_val,
-        "mode": mode_text,
-        "variance": values.var(ddof=0),  # дисперсія генеральної сукупності
-        "std_dev": std_val,
-        "coef_of_variation": std_val / mean_val if mean_val != 0 else float("nan"),
+def format_mode(mode_values: list) -> str:
+    """Значення моди через кому; понад `MAX_MODE_VALUES` — лише перші та кількість решти."""
+    shown = ", ".join(map(str, mode_values[:MAX_MODE_VALUES]))
+    hidden = len(mode_values) - MAX_MODE_VALUES
+    return f"{shown} … (ще {hidden})" if hidden > 0 else shown
+
+
+def histogram_page_paths(base_path: Path, n_pages: int) -> list[Path]:
+    """Перша сторінка зберігається під `base_path`, наступні — з суфіксом `_2`, `_3`, ..."""
+    return [
+        base_path if page == 0 else base_path.with_name(f"{base_path.stem}_{page + 1}{base_path.suffix}")
+        for page in range(n_pages)
+    ]
+
+
+def plot_histograms(
+    histograms: dict,
+    metrics_rows: list[dict],
+    base_path: Path,
+    cols: int = HIST_COLS,
+    rows_per_page: int = HIST_ROWS_PER_PAGE,
+) -> list[Path]:
+    """Малює гістограми з попередньо порахованих бінів, сторінками по `cols × rows_per_page`.
+
+    `histograms` — {dataset: (counts, bin_edges)} з `np.histogram`; середнє та медіана
+    беруться з уже розрахованих `metrics_rows`, тож сирі значення повторно не скануються.
+    """
+    metrics_by_dataset = {row["dataset"]: row for row in metrics_rows}
+    names = list(histograms)
+    per_page = cols * rows_per_page
+    n_pages = max(1, math.ceil(len(names) / per_page))
+    paths = histogram_page_paths(base_path, n_pages)
+
+    for page, path in enumerate(paths):
+        page_names = names[page * per_page:(page + 1) * per_page]
+        n_cols = min(cols, max(len(page_names), 1))
+        n_rows = max(1, math.ceil(len(page_names) / n_cols))
+        fig, axes = plt.subplots(n_rows, n_cols, figsize=(5 * n_cols, 4 * n_rows), squeeze=False)
+        title = 'Розподіл значень по датасетам'
+        if n_pages > 1:
+            title += f' (сторінка {page + 1}/{n_pages})'
+        fig.suptitle(title, fontsize=14, fontweight='bold')
+
+        flat_axes = axes.ravel()
+        for ax, dataset_name in zip(flat_axes, page_names):
+            counts, edges = histograms[dataset_name]
+            mean_val = metrics_by_dataset[dataset_name]["mean"]
+            median_val = metrics_by_dataset[dataset_name]["median"]
+            ax.hist(edges[:-1], bins=edges, weights=counts, color='steelblue', edgecolor='black', alpha=0.7)
+            ax.set_title(f'{dataset_name}', fontsize=12)
+            ax.set_xlabel('Значення', fontsize=10)
+            ax.set_ylabel('Частота', fontsize=10)
+            ax.axvline(mean_val, color='red', linestyle='--', linewidth=2, label=f'Середнє: {mean_val:.2f}')
+            ax.axvline(median_val, color='green', linestyle='--', linewidth=2, label=f'Медіана: {median_val:.2f}')
+            ax.legend(fontsize=8)
+            ax.grid(True, alpha=0.3)
+        for ax in flat_axes[len(page_names):]:
+            ax.set_visible(False)
+
+        plt.tight_layout()
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+        plt.close(fig)
+
+    return paths
+
+
+def add_formats(workbook) -> dict:
+    """Спільні формати комірок для обох режимів експорту."""
+    return {
+        "header": workbook.add_format({"bold": True, "bg_color": "#D9E1F2", "border": 1}),
+        "number": workbook.add_format({"num_format": "#,##0.00", "border": 1}),
+        "percent": workbook.add_format({"num_format": "0.0%", "border": 1}),
+        "percent_fine": workbook.add_format({"num_format": "0.00%", "border": 1}),
+        "integer": workbook.add_format({"num_format": "#,##0", "border": 1}),
+        "text": workbook.add_format({"text_wrap": True, "valign": "top", "border": 1}),
     }
-    metrics.append(metric_row)
-    interpretations.append(
-        {
+
+
+def layout_sheet(sheet, layout_name: str, formats: dict) -> None:
+    sheet.freeze_panes(1, 0)
+    for col_range, width, fmt_name in SHEET_COLUMNS[layout_name]:
+        sheet.set_column(col_range, width, formats[fmt_name])
+
+
+def data_sheet_names(n_rows: int, max_rows: int = EXCEL_MAX_ROWS) -> list[str]:
+    """Назви аркушів для сирих даних: `data`, `data_2`, ... по `max_rows - 1` рядків."""
+    n_sheets = max(1, math.ceil(n_rows / (max_rows - 1)))
+    return ["data" if idx == 0 else f"data_{idx + 1}" for idx in range(n_sheets)]
+
+
+def write_streaming_sheet(workbook, name: str, layout_name: str, df: pd.DataFrame, formats: dict) -> None:
+    """Пише DataFrame рядок за рядком; у режимі constant_memory рядки одразу скидаються на диск."""
+    sheet = workbook.add_worksheet(name)
+    layout_sheet(sheet, layout_name, formats)
+    sheet.write_row(0, 0, [str(col) for col in df.columns], formats["header"])
+    for row_idx, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        sheet.write_row(row_idx, 0, row)
+
+
+def export_streaming(
+    path: Path,
+    raw_df: pd.DataFrame,
+    metrics_df: pd.DataFrame,
+    summary_df: pd.DataFrame,
+    max_rows: int = EXCEL_MAX_ROWS,
+) -> list[str]:
+    """Експорт через xlsxwriter `constant_memory`; сирі дані понад ліміт Excel діляться на кілька аркушів."""
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+    formats = add_formats(workbook)
+    rows_per_sheet = max_rows - 1
+    sheet_names = data_sheet_names(len(raw_df), max_rows)
+    for idx, name in enumerate(sheet_names):
+        shard = raw_df.iloc[idx * rows_per_sheet:(idx + 1) * rows_per_sheet]
+        write_streaming_sheet(workbook, name, "data", shard, formats)
+    write_streaming_sheet(workbook, "metrics", "metrics", metrics_df, formats)
+    write_streaming_sheet(workbook, "summary", "summary", summary_df, formats)
+    workbook.close()
+    return sheet_names
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Створює жорстке посилання `dst` на `src`; якщо ФС не підтримує — копіює файл."""
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def calculate_metrics(raw_df: pd.DataFrame, approximate: bool = USE_APPROXIMATE_STATS):
+    """Метрики, пояснення та біни гістограм для кожного датасету.
+
+    Повертає `(metrics, interpretations, histograms)`: списки рядків для аркушів
+    `metrics` і `summary` та {dataset: (counts, bin_edges)} для графіків.
+    """
+    metrics = []
+    interpretations = []
+    histograms = {}
+    for dataset_name, group in raw_df.groupby("dataset"):
+        values = group["value"].astype(float)
+        mean_val = values.mean()
+        approximation = None
+        if approximate:
+            approximation = approximate_median_mode(values.to_numpy())
+            median_val = approximation["median"]
+            mode_values = approximation["mode_values"]
+            # Оцінка Space-Saving містить поріг витіснення, тож рішення — за гарантованою частотою
+            no_mode = approximation["mode_count_min"] <= 1
+        else:
+            median_val = values.median()
+            mode_values = values.mode().tolist()
+            no_mode = len(mode_values) == len(values)
+        if no_mode:
+            mode_text = ""
+        else:
+            mode_text = format_mode(mode_values)
+        std_val = values.std(ddof=0)
+        metric_row = {
             "dataset": dataset_name,
-            "human_readable_summary": build_interpretation(mean_val, median_val, mode_text, std_val),
+            "count": len(values),
+            "mean": mean_val,
+            "median": median_val,
+            "mode": mode_text,
+            "variance": values.var(ddof=0),  # дисперсія генеральної сукупності
+            "std_dev": std_val,
+            "coef_of_variation": std_val / mean_val if mean_val != 0 else float("nan"),
+        }
+        if approximation is not None:
+            metric_row["median_rank_error"] = approximation["median_rank_error"]
+            metric_row["mode_count_error"] = approximation["mode_count_error"]
+        metrics.append(metric_row)
+        # Біни для графіків рахуються тут же, щоб етап візуалізації не сканував значення повторно
+        histograms[dataset_name] = np.histogram(values.to_numpy(), bins=HIST_BINS)
+        interpretations.append(
+            {
+                "dataset": dataset_name,
+                "human_readable_summary": build_interpretation(
+                    mean_val, median_val, mode_text, std_val, approximation
+                ),
+            }
+        )
+    return metrics, interpretations, histograms
+
+
+def main():
+    # Завантаження даних
+    raw_df = pd.read_csv(INPUT_PATH)
+    raw_df = raw_df.sort_values(["dataset", "value"]).reset_index(drop=True)
+
+    # Розрахунок метрик для кожного датасету
+    metrics, interpretations, histograms = calculate_metrics(raw_df)
+
+    metrics_df = pd.DataFrame(metrics).rename(
+        columns={
+            "dataset": "Dataset",
+            "count": "Кількість спостережень",
+            "mean": "Середнє значення",
+            "median": "Медіана",
+            "mode": "Мода",
+            "variance": "Дисперсія (σ²)",
+            "std_dev": "Стандартне відхилення (σ)",
+            "coef_of_variation": "Коефіцієнт варіації",
+            "median_rank_error": "Похибка рангу медіани (≤)",
+            "mode_count_error": "Похибка частоти моди (≤)",
         }
     )
 
-metrics_df = pd.DataFrame(metrics).rename(
-    columns={
-        "dataset": "Dataset",
-        "count": "Кількість спостережень",
-        "mean": "Середнє значення",
-        "median": "Медіана",
-        "mode": "Мода",
-        "variance": "Дисперсія (σ²)",
-        "std_dev": "Стандартне відхилення (σ)",
-        "coef_of_variation": "Коефіцієнт варіації",
-    }
-)
+    summary_df = pd.DataFrame(interpretations).rename(
+        columns={
+            "dataset": "Dataset",
+            "human_readable_summary": "Пояснення для менеджера",
+        }
+    )
 
-summary_df = pd.DataFrame(interpretations).rename(
-    columns={
-        "dataset": "Dataset",
-        "human_readable_summary": "Пояснення для менеджера",
-    }
-)
-
-# Експорт до Excel з окремими аркушами та форматуванням для зручності читання
-with pd.ExcelWriter(OUTPUT_PATH, engine="xlsxwriter") as writer:
-    raw_df.to_excel(writer, sheet_name="data", index=False)
-    metrics_df.to_excel(writer, sheet_name="metrics", index=False)
-    summary_df.to_excel(writer, sheet_name="summary", index=False)
-
-    workbook = writer.book
-
-    header_fmt = workbook.add_format({"bold": True, "bg_color": "#D9E1F2", "border": 1})
-    number_fmt = workbook.add_format({"num_format": "#,##0.00", "border": 1})
-    percent_fmt = workbook.add_format({"num_format": "0.0%", "border": 1})
-    text_fmt = workbook.add_format({"text_wrap": True, "valign": "top", "border": 1})
-
-    # Форматування аркуша з метриками
-    metrics_sheet = writer.sheets["metrics"]
-    metrics_sheet.freeze_panes(1, 0)
-    metrics_sheet.set_column("A:A", 14, text_fmt)
-    metrics_sheet.set_column("B:B", 20, number_fmt)
-    metrics_sheet.set_column("C:E", 18, number_fmt)
-    metrics_sheet.set_column("F:F", 20, number_fmt)
-    metrics_sheet.set_column("G:G", 28, number_fmt)
-    metrics_sheet.set_column("H:H", 22, percent_fmt)
-    metrics_sheet.set_row(0, None, header_fmt)
-
-    # Форматування аркуша з даними
-    data_sheet = writer.sheets["data"]
-    data_sheet.freeze_panes(1, 0)
-    data_sheet.set_column("A:A", 12, text_fmt)
-    data_sheet.set_column("B:B", 12, number_fmt)
-    data_sheet.set_row(0, None, header_fmt)
-
-    # Форматування аркуша з поясненнями
-    summary_sheet = writer.sheets["summary"]
-    summary_sheet.freeze_panes(1, 0)
-    summary_sheet.set_column("A:A", 12, text_fmt)
-    summary_sheet.set_column("B:B", 80, text_fmt)
-    summary_sheet.set_row(0, None, header_fmt)
-
-# Копіювання файлу для здачі
-shutil.copyfile(OUTPUT_PATH, FINAL_OUTPUT_PATH)
-
-# Генерація візуалізацій
-plt.style.use('seaborn-v0_8-darkgrid')
-
-# Гістограми для кожного датасету
-fig, axes = plt.subplots(1, 3, figsize=(15, 4))
-fig.suptitle('Розподіл значень по датасетам', fontsize=14, fontweight='bold')
-
-for idx, (dataset_name, group) in enumerate(raw_df.groupby("dataset")):
-    values = group["value"].astype(float)
-    axes[idx].hist(values, bins=10, color='steelblue', edgecolor='black', alpha=0.7)
-    axes[idx].set_title(f'{dataset_name}', fontsize=12)
-    axes[idx].set_xlabel('Значення', fontsize=10)
-    axes[idx].set_ylabel('Частота', fontsize=10)
-    axes[idx].axvline(values.mean(), color='red', linestyle='--', linewidth=2, label=f'Середнє: {values.mean():.2f}')
-    axes[idx].axvline(values.median(), color='green', linestyle='--', linewidth=2, label=f'Медіана: {values.median():.2f}')
-    axes[idx].legend(fontsize=8)
-    axes[idx].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(PLOT_HISTOGRAM, dpi=300, bbox_inches='tight')
-plt.close()
-
-# Boxplot для порівняння датасетів
-fig, ax = plt.subplots(figsize=(10, 6))
-datasets_list = []
-labels_list = []
-
-for dataset_name, group in raw_df.groupby("dataset"):
-    datasets_list.append(group["value"].astype(float).tolist())
-    labels_list.append(dataset_name)
-
-bp = ax.boxplot(datasets_list, tick_labels=labels_list, patch_artist=True,
-                showmeans=True, meanline=True,
-                boxprops=dict(facecolor='lightblue', edgecolor='black', linewidth=1.5),
-                medianprops=dict(color='red', linewidth=2),
-                meanprops=dict(color='green', linestyle='--', linewidth=2),
-                whiskerprops=dict(color='black', linewidth=1.5),
-                capprops=dict(color='black', linewidth=1.5),
-                flierprops=dict(marker='o', markerfacecolor='red', markersize=8, linestyle='none'))
-
-ax.set_title('Порівняння розподілів датасетів (Boxplot)', fontsize=14, fontweight='bold')
-ax.set_ylabel('Значення', fontsize=12)
-ax.set_xlabel('Dataset', fontsize=12)
-ax.grid(True, alpha=0.3, axis='y')
-
-# Додаємо легенду
-from matplotlib.lines import Line2D
-legend_elements = [
-    Line2D([0], [0], color='red', linewidth=2, label='Медіана'),
-    Line2D([0], [0], color='green', linestyle='--', linewidth=2, label='Середнє'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=8, label='Викиди')
-]
-ax.legend(handles=legend_elements, loc='upper right', fontsize=10)
-
-plt.tight_layout()
-plt.savefig(PLOT_BOXPLOT, dpi=300, bbox_inches='tight')
-plt.close()
+    # Експорт до Excel з окремими аркушами та форматуванням для зручності читання
+    if USE_STREAMING_EXPORT or len(raw_df) >= EXCEL_MAX_ROWS:
+        export_streaming(OUTPUT_PATH, raw_df, metrics_df, summary_df)
+    else:
+        with pd.ExcelWriter(OUTPUT_PATH, engine="xlsxwriter") as writer:
+            raw_df.to_excel(writer, sheet_name="data", index=False)
+            metrics_df.to_excel(writer, sheet_name="metrics", index=False)
+            summary_df.to_excel(writer, sheet_name="summary", index=False)
+
+            formats = add_formats(writer.book)
+            for sheet_name in ("data", "metrics", "summary"):
+                layout_sheet(writer.sheets[sheet_name], sheet_name, formats)
+                writer.sheets[sheet_name].set_row(0, None, formats["header"])
+
+    # Файл для здачі — жорстке посилання на той самий файл замість повного копіювання
+    link_or_copy(OUTPUT_PATH, FINAL_OUTPUT_PATH)
+
+    # Генерація візуалізацій
+    plt.style.use('seaborn-v0_8-darkgrid')
+
+    # Гістограми для кожного датасету (з попередньо порахованих бінів)
+    histogram_paths = plot_histograms(histograms, metrics, PLOT_HISTOGRAM)
+
+    # Boxplot для порівняння датасетів
+    fig, ax = plt.subplots(figsize=(10, 6))
+    datasets_list = []
+    labels_list = []
+
+    for dataset_name, group in raw_df.groupby("dataset"):
+        datasets_list.append(group["value"].astype(float).tolist())
+        labels_list.append(dataset_name)
+
+    bp = ax.boxplot(datasets_list, tick_labels=labels_list, patch_artist=True,
+                    showmeans=True, meanline=True,
+                    boxprops=dict(facecolor='lightblue', edgecolor='black', linewidth=1.5),
+                    medianprops=dict(color='red', linewidth=2),
+                    meanprops=dict(color='green', linestyle='--', linewidth=2),
+                    whiskerprops=dict(color='black', linewidth=1.5),
+                    capprops=dict(color='black', linewidth=1.5),
+                    flierprops=dict(marker='o', markerfacecolor='red', markersize=8, linestyle='none'))
+
+    ax.set_title('Порівняння розподілів датасетів (Boxplot)', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Значення', fontsize=12)
+    ax.set_xlabel('Dataset', fontsize=12)
+    ax.grid(True, alpha=0.3, axis='y')
+
+    # Додаємо легенду
+    from matplotlib.lines import Line2D
+    legend_elements = [
+        Line2D([0], [0], color='red', linewidth=2, label='Медіана'),
+        Line2D([0], [0], color='green', linestyle='--', linewidth=2, label='Середнє'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=8, label='Викиди')
+    ]
+    ax.legend(handles=legend_elements, loc='upper right', fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(PLOT_BOXPLOT, dpi=300, bbox_inches='tight')
+    plt.close()
 
-if __name__ == "__main__":
     print("Результати збережено до:", OUTPUT_PATH)
     print("Файл для здачі збережено до:", FINAL_OUTPUT_PATH)
-    print("Гістограми збережено до:", PLOT_HISTOGRAM)
+    print("Гістограми збережено до:", ", ".join(map(str, histogram_paths)))
     print("Boxplot збережено до:", PLOT_BOXPLOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Наближені потокові оцінки медіани та моди для дуже великих груп значень.
+
+- `QuantileSketch` — компактор квантилів (KLL-подібний) із детермінованою
+  межею похибки рангу.
+- `SpaceSaving` — структура heavy hitters для моди з межею переоцінки частоти.
+
+Обидві структури оновлюються пакетами (chunk-ами) через numpy, і їхній розмір
+не залежить від кількості значень у групі. `approximate_median_mode` приводить
+до float лише поточний chunk і приймає також ітератор chunk-ів (наприклад,
+колонку з `pd.read_csv(..., chunksize=...)`), тож усю групу не обов'язково
+тримати в пам'яті. Переданий цілим масив, звісно, вже займає свою пам'ять.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_SKETCH_K = 4096
+DEFAULT_HEAVY_HITTERS = 1024
+
+
+class QuantileSketch:
+    """Квантильний скетч з рівнями-компакторами ємністю `k`.
+
+    Кожне стискання відсортованого буфера ваги `w` змінює ранг будь-якого
+    запиту щонайбільше на `w`, тому сума цих ваг — гарантована межа похибки.
+    """
+
+    def __init__(self, k: int = DEFAULT_SKETCH_K):
+        if k < 2:
+            raise ValueError("k має бути не меншим за 2")
+        self.k = k
+        self.n = 0
+        self.levels: list[np.ndarray] = [np.empty(0, dtype=float)]
+        self._rank_error = 0
+        self._offset = 0
+
+    def update(self, values) -> None:
+        arr = np.asarray(values, dtype=float).ravel()
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return
+        self.n += arr.size
+        self.levels[0] = np.concatenate([self.levels[0], arr])
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            buf = self.levels[h]
+            if buf.size > self.k:
+                buf = np.sort(buf)
+                # Непарний елемент залишається на поточному рівні
+                keep = buf[-1:] if buf.size % 2 else buf[:0]
+                pairs = buf[: buf.size - keep.size]
+                promoted = pairs[self._offset::2]
+                self._offset ^= 1
+                self._rank_error += 1 << h
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=float))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    @property
+    def rank_error(self) -> float:
+        """Нормована (0..1) гарантована межа похибки рангу."""
+        return self._rank_error / self.n if self.n else 0.0
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        if len(self.levels) == 1:
+            # Стискань ще не було — квантиль точний
+            return float(np.quantile(self.levels[0], min(max(q, 0.0), 1.0)))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(level.size, 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        cum = np.cumsum(weights[order])
+        target = min(max(q, 0.0), 1.0) * (self.n - 1)
+        idx = min(int(np.searchsorted(cum, target, side="right")), order.size - 1)
+        return float(values[order[idx]])
+
+    def quantile_bounds(self, q: float) -> tuple[float, float]:
+        """Інтервал значень, у якому гарантовано лежить істинний квантиль `q`."""
+        eps = self.rank_error
+        return self.quantile(q - eps), self.quantile(q + eps)
+
+
+class SpaceSaving:
+    """Space-Saving з `capacity` лічильниками, оновлюваний пакетами.
+
+    Оцінка частоти кожного значення завищена щонайбільше на `errors[i]`,
+    а будь-яке невідстежуване значення зустрічалось не частіше за `max_error`.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_HEAVY_HITTERS):
+        if capacity < 1:
+            raise ValueError("capacity має бути додатним")
+        self.capacity = capacity
+        self.n = 0
+        self.values = np.empty(0, dtype=float)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+
+    @property
+    def max_error(self) -> int:
+        if self.values.size < self.capacity:
+            return 0
+        return int(self.counts.min())
+
+    def update(self, values) -> None:
+        arr = np.asarray(values, dtype=float).ravel()
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return
+        self.n += arr.size
+        chunk_values, chunk_counts = np.unique(arr, return_counts=True)
+        floor = self.max_error
+
+        # self.values відсортовані, тож збіги шукаємо бінарним пошуком
+        pos = np.searchsorted(self.values, chunk_values)
+        present = np.zeros(chunk_values.size, dtype=bool)
+        if self.values.size:
+            pos_clipped = np.minimum(pos, self.values.size - 1)
+            present = (pos < self.values.size) & (self.values[pos_clipped] == chunk_values)
+        counts = self.counts.copy()
+        np.add.at(counts, pos[present], chunk_counts[present])
+
+        new_values = chunk_values[~present]
+        values = np.concatenate([self.values, new_values])
+        counts = np.concatenate([counts, chunk_counts[~present] + floor])
+        errors = np.concatenate([self.errors, np.full(new_values.size, floor, dtype=np.int64)])
+
+        if values.size > self.capacity:
+            top = np.argpartition(-counts, self.capacity - 1)[: self.capacity]
+            values, counts, errors = values[top], counts[top], errors[top]
+
+        order = np.argsort(values)
+        self.values, self.counts, self.errors = values[order], counts[order], errors[order]
+
+    def mode(self) -> tuple[list[float], int, int]:
+        """Повертає (значення з найбільшою оцінкою, оцінка частоти, гарантований мінімум)."""
+        if self.values.size == 0:
+            return [], 0, 0
+        top = self.counts.max()
+        mask = self.counts == top
+        return self.values[mask].tolist(), int(top), int((self.counts[mask] - self.errors[mask]).min())
+
+
+def _chunks(values, chunk_size: int):
+    """Chunk-и значень: зрізи масиву без копіювання або елементи ітератора chunk-ів."""
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    elif isinstance(values, (list, tuple)):
+        values = np.asarray(values)
+    if isinstance(values, np.ndarray):
+        flat = values.ravel()
+        for start in range(0, flat.size, chunk_size):
+            yield flat[start:start + chunk_size]
+    else:
+        yield from values
+
+
+def approximate_median_mode(
+    values,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sketch_k: int = DEFAULT_SKETCH_K,
+    heavy_hitters: int = DEFAULT_HEAVY_HITTERS,
+) -> dict:
+    """Наближені медіана та мода з межами похибок за один прохід по chunk-ах.
+
+    `values` — масив (Series, список) або ітератор chunk-ів; масив ріжеться на
+    зрізи по `chunk_size`, і у float перетворюється лише поточний зріз.
+    """
+    sketch = QuantileSketch(sketch_k)
+    hitters = SpaceSaving(heavy_hitters)
+    for chunk in _chunks(values, chunk_size):
+        sketch.update(chunk)
+        hitters.update(chunk)
+
+    median_low, median_high = sketch.quantile_bounds(0.5)
+    mode_values, mode_count, mode_count_min = hitters.mode()
+    return {
+        "median": sketch.quantile(0.5),
+        "median_low": median_low,
+        "median_high": median_high,
+        "median_rank_error": sketch.rank_error,
+        "mode_values": mode_values,
+        "mode_count": mode_count,
+        "mode_count_min": mode_count_min,
+        "mode_count_error": hitters.max_error,
+    }
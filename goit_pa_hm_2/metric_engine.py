@@ -0,0 +1,354 @@
+"""
+Виконуваний каталог метрик (таксономія AARRR з Домашнього завдання №2).
+
+Кожна метрика каталогу — `MetricDefinition`: опис для Excel-аркуша та функція
+розрахунку над таблицею подій. Спільні проміжні результати (лічильники подій
+за сесіями та користувачами, межі сесій, замовлення, активні дні) рахуються
+один раз у `EventRollups` і перевикористовуються всіма метриками, тож увесь
+каталог обчислюється за один векторний прохід по подіях.
+
+Очікувана таблиця подій: `user_id`, `session_id`, `event_name`, `timestamp`
+(datetime або секунди) та, за наявності, `traffic_source`, `order_total`.
+Події з порожнім `user_id`, `session_id` чи `event_name` не можна віднести до
+користувача, сесії чи типу, тому вони відкидаються (їх кількість —
+`EventRollups.n_dropped`).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from retention import ActivityBitmaps
+
+# Назви подій, які використовує каталог
+PAGE_VIEW = "page_view"
+PRODUCT_VIEW = "product_view"
+ADD_TO_CART = "add_to_cart"
+SEARCH_SUBMITTED = "search_submitted"
+SIGN_UP = "sign_up"
+PURCHASE = "purchase"
+RECOMMENDATION_VIEW = "recommendation_view"
+RECOMMENDATION_CLICK = "recommendation_click"
+ADD_TO_WISHLIST = "add_to_wishlist"
+ORDER_RETURNED = "order_returned"
+REFERRAL_INVITE_SENT = "referral_invite_sent"
+REFERRAL_SIGN_UP = "referral_sign_up"
+
+TRACKED_EVENTS = (
+    PAGE_VIEW, PRODUCT_VIEW, ADD_TO_CART, SEARCH_SUBMITTED, SIGN_UP, PURCHASE,
+    RECOMMENDATION_VIEW, RECOMMENDATION_CLICK, ADD_TO_WISHLIST, ORDER_RETURNED,
+    REFERRAL_INVITE_SENT, REFERRAL_SIGN_UP,
+)
+# Події, що не вважаються "взаємодією" для часу до першої взаємодії
+PASSIVE_EVENTS = ("session_start", PAGE_VIEW, "banner_view", "product_list_view", "signup_modal_view")
+
+# Ключі події: без будь-якого з них подію не можна врахувати
+KEY_COLUMNS = ["user_id", "session_id", "event_name"]
+
+SECONDS_PER_DAY = 86_400
+
+
+def _ratio(numerator, denominator, scale: float = 1.0) -> float:
+    return float(numerator) / float(denominator) * scale if denominator else float("nan")
+
+
+class EventRollups:
+    """Спільні проміжні агрегати над таблицею подій (рахуються ліниво й один раз)."""
+
+    def __init__(self, events: pd.DataFrame):
+        # pd.factorize дає порожнім ключам код -1, який зламав би індексацію та bincount
+        keyed = events[KEY_COLUMNS].notna().all(axis=1).to_numpy()
+        self.n_dropped = int((~keyed).sum())
+        if self.n_dropped:
+            events = events[keyed]
+        self.events = events
+        self.n_events = len(events)
+        self.session_codes, self.sessions = pd.factorize(events["session_id"])
+        self.user_codes, self.users = pd.factorize(events["user_id"])
+        # Рядки назв подій обробляються один раз; далі працюємо лише з кодами.
+        # Невідстежувані події отримують код len(TRACKED_EVENTS)
+        name_codes, self._event_names = pd.factorize(events["event_name"])
+        tracked = pd.Index(TRACKED_EVENTS).get_indexer(self._event_names)
+        tracked = np.where(tracked < 0, len(TRACKED_EVENTS), tracked)
+        self._name_codes = name_codes
+        self.event_codes = tracked[name_codes]
+        self._n_types = len(TRACKED_EVENTS) + 1
+
+    @cached_property
+    def timestamps(self) -> np.ndarray:
+        """Час подій у секундах (float)."""
+        ts = self.events["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(ts.dtype):
+            return ts.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+        return ts.to_numpy(dtype=float)
+
+    @property
+    def n_sessions(self) -> int:
+        return len(self.sessions)
+
+    @property
+    def n_users(self) -> int:
+        return len(self.users)
+
+    def _code(self, event_name: str) -> int:
+        return TRACKED_EVENTS.index(event_name)
+
+    @cached_property
+    def event_totals(self) -> np.ndarray:
+        return np.bincount(self.event_codes, minlength=self._n_types)
+
+    def total(self, event_name: str) -> int:
+        return int(self.event_totals[self._code(event_name)])
+
+    @cached_property
+    def session_event_counts(self) -> np.ndarray:
+        """Матриця сесії × типи подій (один bincount на весь набір)."""
+        flat = self.session_codes.astype(np.int64) * self._n_types + self.event_codes
+        return np.bincount(flat, minlength=self.n_sessions * self._n_types).reshape(self.n_sessions, self._n_types)
+
+    @cached_property
+    def user_event_counts(self) -> np.ndarray:
+        """Матриця користувачі × типи подій."""
+        flat = self.user_codes.astype(np.int64) * self._n_types + self.event_codes
+        return np.bincount(flat, minlength=self.n_users * self._n_types).reshape(self.n_users, self._n_types)
+
+    def per_session(self, event_name: str) -> np.ndarray:
+        return self.session_event_counts[:, self._code(event_name)]
+
+    def per_user(self, event_name: str) -> np.ndarray:
+        return self.user_event_counts[:, self._code(event_name)]
+
+    @cached_property
+    def session_bounds(self) -> pd.DataFrame:
+        """Початок і кінець кожної сесії."""
+        return pd.Series(self.timestamps).groupby(self.session_codes).agg(["min", "max"])
+
+    @cached_property
+    def session_first_interaction(self) -> np.ndarray:
+        """Час першої активної дії в сесії (NaN, якщо дій не було)."""
+        active = ~np.isin(self._event_names, PASSIVE_EVENTS)[self._name_codes]
+        first = np.full(self.n_sessions, np.inf)
+        np.minimum.at(first, self.session_codes[active], self.timestamps[active])
+        first[np.isinf(first)] = np.nan
+        return first
+
+    @cached_property
+    def session_traffic_source(self) -> pd.Series:
+        if "traffic_source" not in self.events.columns:
+            return pd.Series(dtype=object)
+        return self.events["traffic_source"].groupby(self.session_codes).first()
+
+    @cached_property
+    def event_days(self) -> np.ndarray:
+        """Номер дня кожної події, відлічений від першого дня в таблиці."""
+        days = np.floor(self.timestamps / SECONDS_PER_DAY).astype(np.int64)
+        return days - days.min() if days.size else days
+
+    @cached_property
+    def activity(self) -> ActivityBitmaps:
+        """Денні бітмапи активності користувачів, згруповані за когортами."""
+        return ActivityBitmaps(self.user_codes, self.event_days)
+
+    def retained_share(self, day: int) -> float:
+        """Частка користувачів, активних рівно на `day`-й день після першої активності, %.
+
+        Знаменник — лише когорти, для яких `day`-й день уже є в журналі; якщо таких
+        немає (журнал коротший за `day` днів), результат — NaN.
+        """
+        return _ratio(self.activity.retained_users(day), self.activity.eligible_users(day), 100)
+
+    @cached_property
+    def orders(self) -> pd.DataFrame:
+        """Події покупки: користувач, час, сума замовлення."""
+        mask = self.event_codes == self._code(PURCHASE)
+        totals = (
+            self.events["order_total"].to_numpy(dtype=float)[mask]
+            if "order_total" in self.events.columns
+            else np.full(mask.sum(), np.nan)
+        )
+        return pd.DataFrame({"user": self.user_codes[mask], "ts": self.timestamps[mask], "order_total": totals})
+
+    @cached_property
+    def mean_days_between_orders(self) -> float:
+        orders = self.orders.sort_values(["user", "ts"], kind="stable")
+        gaps = np.diff(orders["ts"].to_numpy())
+        same_user = np.diff(orders["user"].to_numpy()) == 0
+        gaps = gaps[same_user]
+        return float(gaps.mean() / SECONDS_PER_DAY) if gaps.size else float("nan")
+
+
+@dataclass(frozen=True)
+class MetricDefinition:
+    """Метрика каталогу: опис (як в Excel) та функція розрахунку над `EventRollups`."""
+
+    key: str
+    category: str
+    name: str
+    formula: str
+    description: str
+    compute: Callable[[EventRollups, dict], object]
+
+
+def _gmv(r: EventRollups, inputs: dict) -> float:
+    return float(np.nansum(r.orders["order_total"]))
+
+
+def _bounce_rate(r: EventRollups, inputs: dict) -> float:
+    """Сесії з рівно одним page_view серед сесій, де був хоча б один page_view."""
+    page_views = r.per_session(PAGE_VIEW)
+    return _ratio((page_views == 1).sum(), (page_views > 0).sum(), 100)
+
+
+METRIC_CATALOGUE = [
+    # Acquisition (Залучення)
+    MetricDefinition("visits", "ACQUISITION", "Кількість візитів", "COUNT(DISTINCT session_id)",
+                     "Загальна кількість сесій на сайті",
+                     lambda r, i: r.n_sessions),
+    MetricDefinition("unique_users", "ACQUISITION", "Кількість унікальних користувачів", "COUNT(DISTINCT user_id)",
+                     "Кількість унікальних відвідувачів",
+                     lambda r, i: r.n_users),
+    MetricDefinition("traffic_by_source", "ACQUISITION", "Трафік за джерелами",
+                     "COUNT(session_id) GROUP BY traffic_source",
+                     "Розподіл візитів за каналами (organic, paid, direct, social)",
+                     lambda r, i: r.session_traffic_source.value_counts()),
+    MetricDefinition("cac", "ACQUISITION", "Вартість залучення (CAC)",
+                     "SUM(marketing_cost) / COUNT(DISTINCT new_customers)",
+                     "Витрати на маркетинг / кількість нових клієнтів",
+                     lambda r, i: _ratio(i.get("marketing_cost", np.nan), (r.per_user(PURCHASE) > 0).sum())),
+    # Activation (Активація)
+    MetricDefinition("registration_rate", "ACTIVATION", "Відсоток реєстрацій",
+                     "(COUNT(registered_users) / COUNT(visitors)) * 100",
+                     "% відвідувачів, які зареєструвались",
+                     lambda r, i: _ratio((r.per_user(SIGN_UP) > 0).sum(), r.n_users, 100)),
+    MetricDefinition("time_to_first_interaction", "ACTIVATION", "Час до першої взаємодії",
+                     "AVG(first_interaction_time - landing_time)",
+                     "Середній час від заходу до першого кліку",
+                     lambda r, i: float(np.nanmean(r.session_first_interaction - r.session_bounds["min"].to_numpy()))
+                     if np.isfinite(r.session_first_interaction).any() else float("nan")),
+    MetricDefinition("add_to_cart_rate", "ACTIVATION", "Відсоток додавання до кошика",
+                     "(COUNT(add_to_cart) / COUNT(product_views)) * 100",
+                     "% переглядів товарів, що завершились додаванням",
+                     lambda r, i: _ratio(r.total(ADD_TO_CART), r.total(PRODUCT_VIEW), 100)),
+    MetricDefinition("pages_per_session", "ACTIVATION", "Глибина перегляду", "AVG(pages_per_session)",
+                     "Середня кількість сторінок за сесію",
+                     lambda r, i: _ratio(r.total(PAGE_VIEW), r.n_sessions)),
+    # Retention (Утримання)
+    MetricDefinition("retention_d7", "RETENTION", "Retention Rate (Day 7)",
+                     "(COUNT(users_returned_day7) / COUNT(new_users)) * 100",
+                     "% користувачів, що повернулись на 7-й день",
+                     lambda r, i: r.retained_share(7)),
+    MetricDefinition("retention_d30", "RETENTION", "Retention Rate (Day 30)",
+                     "(COUNT(users_returned_day30) / COUNT(new_users)) * 100",
+                     "% користувачів, що повернулись на 30-й день",
+                     lambda r, i: r.retained_share(30)),
+    MetricDefinition("purchase_frequency", "RETENTION", "Частота покупок", "COUNT(orders) / COUNT(DISTINCT user_id)",
+                     "Середня кількість замовлень на користувача",
+                     lambda r, i: _ratio(r.total(PURCHASE), r.n_users)),
+    MetricDefinition("days_between_purchases", "RETENTION", "Середній час між покупками",
+                     "AVG(order_date - previous_order_date)",
+                     "Середній інтервал між повторними покупками",
+                     lambda r, i: r.mean_days_between_orders),
+    # Revenue (Дохід)
+    MetricDefinition("gmv", "REVENUE", "GMV (Gross Merchandise Value)", "SUM(order_total)",
+                     "Загальна вартість всіх замовлень",
+                     _gmv),
+    MetricDefinition("aov", "REVENUE", "AOV (Average Order Value)", "SUM(order_total) / COUNT(orders)",
+                     "Середній чек замовлення",
+                     lambda r, i: _ratio(_gmv(r, i), r.total(PURCHASE))),
+    MetricDefinition("arpu", "REVENUE", "ARPU (Average Revenue Per User)", "SUM(revenue) / COUNT(DISTINCT user_id)",
+                     "Середній дохід на користувача",
+                     lambda r, i: _ratio(_gmv(r, i), r.n_users)),
+    MetricDefinition("ltv", "REVENUE", "LTV (Customer Lifetime Value)",
+                     "AOV * avg_orders_per_user * avg_customer_lifespan",
+                     "Прогнозована цінність клієнта за весь період",
+                     lambda r, i: _ratio(_gmv(r, i), r.total(PURCHASE))
+                     * _ratio(r.total(PURCHASE), r.n_users) * i.get("customer_lifespan", np.nan)),
+    MetricDefinition("conversion_rate", "REVENUE", "Conversion Rate", "(COUNT(orders) / COUNT(sessions)) * 100",
+                     "% сесій, що завершились покупкою",
+                     lambda r, i: _ratio(r.total(PURCHASE), r.n_sessions, 100)),
+    # Referral (Реферали)
+    MetricDefinition("referral_users_share", "REFERRAL", "Відсоток користувачів з рефералами",
+                     "(COUNT(users_with_referrals) / COUNT(users)) * 100",
+                     "% користувачів, що запросили інших",
+                     lambda r, i: _ratio((r.per_user(REFERRAL_INVITE_SENT) > 0).sum(), r.n_users, 100)),
+    MetricDefinition("k_factor", "REFERRAL", "K-factor", "invites_sent * conversion_rate",
+                     "Вірусний коефіцієнт росту",
+                     lambda r, i: _ratio(r.total(REFERRAL_INVITE_SENT), r.n_users)
+                     * _ratio(r.total(REFERRAL_SIGN_UP), r.total(REFERRAL_INVITE_SENT))),
+    # Engagement (Залученість)
+    MetricDefinition("session_duration", "ENGAGEMENT", "Час на сайті", "AVG(session_duration)",
+                     "Середня тривалість сесії",
+                     lambda r, i: float((r.session_bounds["max"] - r.session_bounds["min"]).mean())),
+    MetricDefinition("bounce_rate", "ENGAGEMENT", "Bounce Rate",
+                     "(COUNT(single_page_sessions) / COUNT(sessions_with_page_views)) * 100",
+                     "% сесій з переглядом однієї сторінки",
+                     _bounce_rate),
+    MetricDefinition("search_usage", "ENGAGEMENT", "Відсоток використання пошуку",
+                     "(COUNT(search_sessions) / COUNT(sessions)) * 100",
+                     "% сесій з використанням пошуку",
+                     lambda r, i: _ratio((r.per_session(SEARCH_SUBMITTED) > 0).sum(), r.n_sessions, 100)),
+    MetricDefinition("recommendation_ctr", "ENGAGEMENT", "CTR на рекомендації",
+                     "(COUNT(recommendation_clicks) / COUNT(recommendation_views)) * 100",
+                     "% кліків по рекомендованих товарах",
+                     lambda r, i: _ratio(r.total(RECOMMENDATION_CLICK), r.total(RECOMMENDATION_VIEW), 100)),
+    # Product Performance (Ефективність товарів)
+    MetricDefinition("product_views", "PRODUCT", "Кількість переглядів товару", "COUNT(product_view_events)",
+                     "Загальна кількість переглядів",
+                     lambda r, i: r.total(PRODUCT_VIEW)),
+    MetricDefinition("product_conversion", "PRODUCT", "Conversion товару",
+                     "(COUNT(product_purchases) / COUNT(product_views)) * 100",
+                     "% переглядів, що завершились покупкою",
+                     lambda r, i: _ratio(r.total(PURCHASE), r.total(PRODUCT_VIEW), 100)),
+    MetricDefinition("wishlist_adds", "PRODUCT", "Додавання до вішлиста", "COUNT(add_to_wishlist)",
+                     "Кількість додавань до списку бажань",
+                     lambda r, i: r.total(ADD_TO_WISHLIST)),
+    MetricDefinition("return_rate", "PRODUCT", "Повернення товарів",
+                     "(COUNT(returns) / COUNT(delivered_orders)) * 100",
+                     "% повернених товарів",
+                     lambda r, i: _ratio(r.total(ORDER_RETURNED), r.total(PURCHASE), 100)),
+]
+
+
+def metric_catalogue_rows(catalogue: list[MetricDefinition] = METRIC_CATALOGUE) -> list[list[str]]:
+    """Рядки аркуша "Основні метрики": заголовок і метрики з порожнім рядком між категоріями."""
+    rows = [
+        ["", "", "", ""],
+        ["КАТЕГОРІЯ", "МЕТРИКА", "ФОРМУЛА РОЗРАХУНКУ", "ОПИС"],
+    ]
+    previous_category = None
+    for metric in catalogue:
+        if metric.category != previous_category:
+            rows.append(["", "", "", ""])
+            previous_category = metric.category
+        rows.append([metric.category, metric.name, metric.formula, metric.description])
+    return rows
+
+
+def compute_metrics(
+    events: pd.DataFrame,
+    catalogue: list[MetricDefinition] = METRIC_CATALOGUE,
+    **inputs,
+) -> pd.DataFrame:
+    """Рахує всі метрики каталогу над таблицею подій.
+
+    `inputs` — зовнішні величини, яких немає в подіях (`marketing_cost`,
+    `customer_lifespan`); без них відповідні метрики дорівнюють NaN.
+    Нескалярні метрики (трафік за джерелами) повертаються як Series у колонці `value`.
+    """
+    rollups = EventRollups(events)
+    return pd.DataFrame(
+        [
+            {
+                "key": metric.key,
+                "category": metric.category,
+                "metric": metric.name,
+                "value": metric.compute(rollups, inputs),
+            }
+            for metric in catalogue
+        ]
+    )
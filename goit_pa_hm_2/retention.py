@@ -0,0 +1,198 @@
+"""
+Когортний retention на бітмапах активності.
+
+Кожен користувач отримує щільний бітовий індекс, упорядкований за днем першої
+активності (когортою), тож когорта — це суцільний діапазон бітів. Початок кожної
+когорти вирівняно до 64 біт, тому перетин денного бітмапу з когортою — це зріз
+слів uint64 і popcount, без побітових масок на межах.
+
+Як у roaring bitmaps, для кожного дня обирається контейнер: розріджені дні
+зберігаються відсортованим масивом індексів uint32, щільні — словами uint64.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86_400
+WORD_BITS = 64
+
+# np.bitwise_count з'явився лише в numpy 2.0; для 1.x — таблиця popcount кожного байта
+_BYTE_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Кількість встановлених бітів у кожному слові uint64."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+class DayBitmap:
+    """Множина активних користувачів дня: масив індексів або бітмап слів uint64."""
+
+    __slots__ = ("indices", "words")
+
+    def __init__(self, indices: np.ndarray, n_bits: int):
+        # Масив дешевший за бітмап, поки на елемент припадає менше 32 біт бітмапу
+        if indices.size * 32 < n_bits:
+            self.indices, self.words = indices.astype(np.uint32), None
+        else:
+            mask = np.zeros(n_bits, dtype=bool)
+            mask[indices] = True
+            self.indices, self.words = None, np.packbits(mask, bitorder="little").view(np.uint64)
+
+    @property
+    def nbytes(self) -> int:
+        return (self.indices if self.words is None else self.words).nbytes
+
+    def to_indices(self) -> np.ndarray:
+        if self.words is None:
+            return self.indices
+        return np.flatnonzero(np.unpackbits(self.words.view(np.uint8), bitorder="little")).astype(np.uint32)
+
+    def contains(self, indices: np.ndarray) -> np.ndarray:
+        if self.words is None:
+            pos = np.minimum(np.searchsorted(self.indices, indices), max(self.indices.size - 1, 0))
+            return self.indices[pos] == indices if self.indices.size else np.zeros(indices.size, dtype=bool)
+        bits = self.words[indices // WORD_BITS] >> (indices % WORD_BITS).astype(np.uint64)
+        return (bits & np.uint64(1)).astype(bool)
+
+    def intersection_count(self, other: "DayBitmap") -> int:
+        if self.words is not None and other.words is not None:
+            return int(_popcount(self.words & other.words).sum())
+        if self.words is None and other.words is None:
+            return int(np.intersect1d(self.indices, other.indices, assume_unique=True).size)
+        sparse, dense = (self, other) if self.words is None else (other, self)
+        return int(dense.contains(sparse.indices).sum())
+
+    def counts_by_range(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """Кількість встановлених бітів у кожному діапазоні [start, end); межі кратні 64."""
+        if self.words is None:
+            return np.searchsorted(self.indices, ends) - np.searchsorted(self.indices, starts)
+        cumulative = np.concatenate([[0], np.cumsum(_popcount(self.words), dtype=np.int64)])
+        return cumulative[ends // WORD_BITS] - cumulative[starts // WORD_BITS]
+
+
+class ActivityBitmaps:
+    """Денні бітмапи активності користувачів, згруповані за когортою першого дня.
+
+    `user_codes` — щільні коди користувачів (0..n-1), `days` — номер дня кожної
+    події, відлічений від 0. Повторні події користувача в межах дня не впливають на результат.
+    """
+
+    def __init__(self, user_codes: np.ndarray, days: np.ndarray, origin: pd.Timestamp | None = None):
+        user_codes = np.asarray(user_codes, dtype=np.int64)
+        days = np.asarray(days, dtype=np.int64)
+        known = user_codes >= 0
+        user_codes, days = user_codes[known], days[known]
+        self.origin = origin
+        self.n_days = int(days.max()) + 1 if days.size else 0
+
+        # Унікальні пари (користувач, день), відсортовані за користувачем
+        pairs = np.sort(user_codes * max(self.n_days, 1) + days)
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if pairs.size else pairs
+        pair_users, pair_days = np.divmod(pairs, max(self.n_days, 1))
+        first_pair = np.ones(pairs.size, dtype=bool)
+        first_pair[1:] = pair_users[1:] != pair_users[:-1]
+        users = pair_users[first_pair]
+        first_day = pair_days[first_pair]
+        self.n_users = users.size
+
+        # Когорти — суцільні діапазони бітів, вирівняні до 64
+        self.cohort_sizes = np.bincount(first_day, minlength=self.n_days)
+        padded = -(-self.cohort_sizes // WORD_BITS) * WORD_BITS
+        self.cohort_starts = np.concatenate([[0], np.cumsum(padded)[:-1]]).astype(np.int64)
+        self.cohort_ends = self.cohort_starts + padded
+        self.n_bits = int(padded.sum())
+
+        order = np.argsort(first_day, kind="stable")
+        rank = np.empty(self.n_users, dtype=np.int64)
+        unpadded_starts = np.concatenate([[0], np.cumsum(self.cohort_sizes)[:-1]])
+        rank[order] = np.arange(self.n_users) - unpadded_starts[first_day[order]]
+        bit_index = np.empty(int(user_codes.max()) + 1 if user_codes.size else 0, dtype=np.int64)
+        bit_index[users] = self.cohort_starts[first_day] + rank
+        self.user_bit_index = bit_index
+
+        day_bits = np.sort(pair_days * self.n_bits + bit_index[pair_users])
+        bounds = np.searchsorted(day_bits, np.arange(self.n_days + 1) * self.n_bits)
+        self.days = [
+            DayBitmap(day_bits[bounds[d]:bounds[d + 1]] - d * self.n_bits, self.n_bits)
+            for d in range(self.n_days)
+        ]
+        self._counts: np.ndarray | None = None
+
+    @classmethod
+    def from_events(
+        cls,
+        events: pd.DataFrame,
+        user_column: str = "user_id",
+        timestamp_column: str = "timestamp",
+    ) -> "ActivityBitmaps":
+        user_codes, _ = pd.factorize(events[user_column])
+        ts = events[timestamp_column]
+        origin = None
+        if pd.api.types.is_datetime64_any_dtype(ts.dtype):
+            seconds = ts.to_numpy(dtype="datetime64[ns]").astype(np.int64) // 10**9
+        else:
+            seconds = ts.to_numpy(dtype=float)
+        days = np.floor(seconds / SECONDS_PER_DAY).astype(np.int64)
+        start = int(days.min()) if days.size else 0
+        if pd.api.types.is_datetime64_any_dtype(ts.dtype):
+            origin = pd.Timestamp(start * SECONDS_PER_DAY, unit="s")
+        return cls(user_codes, days - start, origin)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(day.nbytes for day in self.days)
+
+    def active_by_cohort(self, day: int) -> np.ndarray:
+        """Кількість активних у день `day` користувачів кожної когорти."""
+        return self.days[day].counts_by_range(self.cohort_starts, self.cohort_ends)
+
+    def _full_counts(self) -> np.ndarray:
+        """Повний трикутник [когорта, N]; рахується один раз (один прохід по днях) і кешується."""
+        if self._counts is None:
+            counts = np.zeros((self.n_days, self.n_days), dtype=np.int64)
+            for day in range(self.n_days):
+                cohorts = np.arange(day + 1)
+                counts[cohorts, day - cohorts] = self.active_by_cohort(day)[cohorts]
+            self._counts = counts
+        return self._counts
+
+    def cohort_counts(self, max_offset: int | None = None) -> np.ndarray:
+        """Трикутник [когорта, N]: скільки користувачів когорти активні на N-й день після першого."""
+        max_offset = self.n_days - 1 if max_offset is None else max_offset
+        counts = np.zeros((self.n_days, max_offset + 1), dtype=np.int64)
+        width = min(max_offset + 1, self.n_days)
+        counts[:, :width] = self._full_counts()[:, :width]
+        return counts
+
+    def retention_matrix(self, max_offset: int | None = None) -> pd.DataFrame:
+        """Retention (%) когорти × день N; дні, що ще не настали, — NaN."""
+        counts = self.cohort_counts(max_offset)
+        offsets = np.arange(counts.shape[1])
+        elapsed = np.arange(self.n_days)[:, None] + offsets[None, :] < self.n_days
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(elapsed, counts / self.cohort_sizes[:, None] * 100, np.nan)
+        index = pd.RangeIndex(self.n_days, name="cohort_day")
+        if self.origin is not None:
+            index = pd.DatetimeIndex(self.origin + pd.to_timedelta(index, unit="D"), name="cohort_date")
+        matrix = pd.DataFrame(rates, index=index, columns=pd.Index(offsets, name="day"))
+        matrix.insert(0, "cohort_size", self.cohort_sizes)
+        return matrix[self.cohort_sizes > 0]
+
+    def retained_users(self, offset: int) -> int:
+        """Скільки користувачів (усіх когорт) активні рівно на `offset`-й день після першої активності."""
+        if offset >= self.n_days:
+            return 0
+        return int(self._full_counts()[:, offset].sum())
+
+    def eligible_users(self, offset: int) -> int:
+        """Скільки користувачів у когортах, для яких `offset`-й день уже настав у межах журналу."""
+        return int(self.cohort_sizes[:max(self.n_days - offset, 0)].sum())
+
+    def overlap(self, day_a: int, day_b: int) -> int:
+        """Кількість користувачів, активних в обидва дні."""
+        return self.days[day_a].intersection_count(self.days[day_b])
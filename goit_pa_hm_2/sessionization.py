@@ -0,0 +1,130 @@
+"""
+Сесіонізація потоку подій tracking plan.
+
+Сесія — послідовність подій одного користувача, де перерва між сусідніми
+подіями не перевищує `timeout` секунд (за замовчуванням 30 хвилин, як у GA).
+Події сортуються за (user_id, timestamp), а межі сесій знаходяться векторно
+через diff/cumsum — без циклів по користувачах.
+
+`Sessionizer` обробляє потік chunk-ами (наприклад, погодинними файлами) і
+переносить між ними стан: останню подію та сесію кожного користувача, чия
+сесія ще може продовжитись у наступному chunk-у.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_TIMEOUT_SECONDS = 30 * 60
+
+
+def _timestamps_seconds(ts: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(ts.dtype):
+        return ts.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+    return ts.to_numpy(dtype=float)
+
+
+class Sessionizer:
+    """Потокова сесіонізація з перенесенням стану між chunk-ами.
+
+    Chunk-и мають надходити в порядку часу; всередині chunk-а порядок довільний.
+    Ідентифікатори сесій — послідовні цілі числа, унікальні в межах потоку.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        user_column: str = "user_id",
+        timestamp_column: str = "timestamp",
+    ):
+        self.timeout = timeout
+        self.user_column = user_column
+        self.timestamp_column = timestamp_column
+        self.next_session_id = 0
+        # Стан: користувачі з відкритими сесіями, час їх останньої події та id сесії
+        self._state_users = pd.Index([])
+        self._state_last_ts = np.empty(0, dtype=float)
+        self._state_session = np.empty(0, dtype=np.int64)
+
+    @property
+    def open_sessions(self) -> int:
+        return len(self._state_users)
+
+    def process(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Повертає chunk, відсортований за (користувач, час), з колонками `session_id` і `is_session_start`."""
+        if chunk.empty:
+            return chunk.assign(session_id=np.empty(0, dtype=np.int64), is_session_start=np.empty(0, dtype=bool))
+        user_codes, users = pd.factorize(chunk[self.user_column])
+        ts = _timestamps_seconds(chunk[self.timestamp_column])
+        order = np.lexsort((ts, user_codes))
+        user_sorted = user_codes[order]
+        ts_sorted = ts[order]
+
+        n = len(order)
+        first_of_user = np.ones(n, dtype=bool)
+        first_of_user[1:] = user_sorted[1:] != user_sorted[:-1]
+        gap = np.empty(n, dtype=float)
+        gap[0] = np.inf
+        gap[1:] = np.diff(ts_sorted)
+        starts = first_of_user | (gap > self.timeout)
+
+        # Перша подія користувача в chunk-у може продовжувати сесію з попереднього chunk-а
+        first_rows = np.flatnonzero(first_of_user)
+        state_pos = self._state_users.get_indexer(users[user_sorted[first_rows]])
+        known = state_pos >= 0
+        continues = np.zeros(first_rows.size, dtype=bool)
+        continues[known] = ts_sorted[first_rows[known]] - self._state_last_ts[state_pos[known]] <= self.timeout
+        starts[first_rows[continues]] = False
+
+        # Нові сесії нумеруються cumsum-ом; продовжені отримують id зі стану
+        new_ids = self.next_session_id + np.cumsum(starts) - 1
+        carried = np.full(n, -1, dtype=np.int64)
+        carried[first_rows[continues]] = self._state_session[state_pos[continues]]
+        # Рядки до першого нового старту в межах користувача успадковують перенесений id
+        segment = np.cumsum(starts | first_of_user) - 1
+        segment_carried = carried[starts | first_of_user]
+        session_ids = np.where(segment_carried[segment] >= 0, segment_carried[segment], new_ids)
+        self.next_session_id += int(starts.sum())
+
+        self._update_state(users[user_sorted], ts_sorted, session_ids, first_of_user)
+
+        result = chunk.iloc[order].copy()
+        result["session_id"] = session_ids
+        result["is_session_start"] = starts
+        return result
+
+    def _update_state(self, users_sorted, ts_sorted: np.ndarray, session_ids: np.ndarray, first_of_user: np.ndarray) -> None:
+        last_of_user = np.zeros(len(ts_sorted), dtype=bool)
+        if len(ts_sorted):
+            last_of_user[:-1] = first_of_user[1:]
+            last_of_user[-1] = True
+
+        chunk_users = pd.Index(users_sorted[last_of_user])
+        keep_old = ~self._state_users.isin(chunk_users)
+        users = self._state_users[keep_old].append(chunk_users)
+        last_ts = np.concatenate([self._state_last_ts[keep_old], ts_sorted[last_of_user]])
+        sessions = np.concatenate([self._state_session[keep_old], session_ids[last_of_user]])
+
+        # Сесії, що не можуть продовжитись після найпізнішої події chunk-а, закриваються
+        if len(ts_sorted):
+            alive = last_ts >= ts_sorted.max() - self.timeout
+            users, last_ts, sessions = users[alive], last_ts[alive], sessions[alive]
+        self._state_users, self._state_last_ts, self._state_session = users, last_ts, sessions
+
+
+def assign_sessions(
+    events: pd.DataFrame,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    user_column: str = "user_id",
+    timestamp_column: str = "timestamp",
+) -> pd.DataFrame:
+    """Сесіонізує всю таблицю подій за один виклик."""
+    return Sessionizer(timeout, user_column, timestamp_column).process(events)
+
+
+def sessionize_chunks(chunks, timeout: float = DEFAULT_TIMEOUT_SECONDS, **columns):
+    """Генератор: сесіонізує послідовність chunk-ів, зберігаючи сесії на їх межах."""
+    sessionizer = Sessionizer(timeout, **columns)
+    for chunk in chunks:
+        yield sessionizer.process(chunk)
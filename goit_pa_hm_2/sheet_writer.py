@@ -0,0 +1,122 @@
+"""
+Декларативний запис аркушів Excel для Домашнього завдання №2.
+
+Аркуш описується `SheetSpec`: рядки значень, імена стилів, об'єднані комірки,
+ширини колонок і висоти рядків. `write_workbook` пише все через xlsxwriter
+у режимі `constant_memory`: рядки скидаються на диск одразу, а кожен іменований
+стиль створюється один раз на книгу, а не для кожної комірки.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import xlsxwriter
+
+# Іменовані стилі (властивості формату xlsxwriter)
+STYLES = {
+    "title": {"bold": True, "font_size": 14, "align": "center"},
+    "subtitle": {"bold": True, "font_size": 12},
+    "subtitle_italic": {"italic": True, "font_size": 11},
+    "header": {
+        "bold": True,
+        "font_color": "#FFFFFF",
+        "bg_color": "#4472C4",
+        "align": "center",
+        "valign": "vcenter",
+        "text_wrap": True,
+    },
+    "category": {"bold": True, "font_size": 10, "bg_color": "#D9E1F2"},
+    "wrap": {"valign": "top", "text_wrap": True},
+    "event_number": {"bold": True, "align": "center", "valign": "top"},
+    "event_name": {"bold": True, "font_color": "#0066CC", "valign": "top", "text_wrap": True},
+    "section_title": {"bold": True, "font_size": 12},
+    "note": {"font_size": 10},
+}
+
+
+@dataclass
+class Cell:
+    """Значення комірки з іменем стилю з `STYLES`."""
+
+    value: object
+    style: str | None = None
+
+
+@dataclass
+class Merge:
+    """Об'єднаний діапазон (наприклад, 'A1:D1') зі значенням і стилем."""
+
+    cell_range: str
+    value: object
+    style: str | None = None
+
+
+@dataclass
+class SheetSpec:
+    """Опис аркуша.
+
+    `rows` — ітерований набір рядків, що починаються з `start_row` (нумерація з 1,
+    як в Excel); кожне значення рядка — або звичайне значення, або `Cell`.
+    `merges` пишуться до рядків, тому мають лежати вище за `start_row`.
+    """
+
+    title: str
+    rows: Iterable[Sequence[object]]
+    start_row: int = 1
+    merges: list[Merge] = field(default_factory=list)
+    column_widths: dict[str, float] = field(default_factory=dict)
+    row_heights: dict[int, float] = field(default_factory=dict)
+
+
+class StyleCache:
+    """Створює формат xlsxwriter для кожного імені стилю лише один раз."""
+
+    def __init__(self, workbook, styles: dict = STYLES):
+        self.workbook = workbook
+        self.styles = styles
+        self._formats: dict[str, object] = {}
+
+    def get(self, name: str | None):
+        if name is None:
+            return None
+        if name not in self._formats:
+            self._formats[name] = self.workbook.add_format(self.styles[name])
+        return self._formats[name]
+
+
+def _write_sheet(workbook, spec: SheetSpec, styles: StyleCache) -> None:
+    ws = workbook.add_worksheet(spec.title)
+    for column, width in spec.column_widths.items():
+        ws.set_column(f"{column}:{column}", width)
+
+    for merge in spec.merges:
+        ws.merge_range(merge.cell_range, merge.value, styles.get(merge.style))
+
+    for row_idx, row in enumerate(spec.rows, start=spec.start_row - 1):
+        height = spec.row_heights.get(row_idx + 1)
+        if height is not None:
+            ws.set_row(row_idx, height)
+        for col_idx, item in enumerate(row):
+            if isinstance(item, Cell):
+                value, fmt = item.value, styles.get(item.style)
+            else:
+                value, fmt = item, None
+            if value is None or value == "":
+                if fmt is not None:
+                    ws.write_blank(row_idx, col_idx, None, fmt)
+                continue
+            ws.write(row_idx, col_idx, value, fmt)
+
+
+def write_workbook(output_path: str | Path, sheets: Iterable[SheetSpec], styles: dict = STYLES) -> Path:
+    """Записує аркуші у файл `output_path` і повертає шлях до нього."""
+    output_path = Path(output_path)
+    workbook = xlsxwriter.Workbook(output_path, {"constant_memory": True})
+    cache = StyleCache(workbook, styles)
+    for spec in sheets:
+        _write_sheet(workbook, spec, cache)
+    workbook.close()
+    return output_path
@@ -0,0 +1,527 @@
+"""
+Tracking plan як структурований реєстр подій та скомпільований валідатор.
+
+- `TRACKING_PLAN` — визначення подій (назва, опис, параметри з типами, приклади).
+- `tracking_plan_rows` — рядки для Excel-аркуша "Tracking Plan" (той самий текст,
+  що й раніше вводився вручну).
+- `compile_plan` — перетворює план на `CompiledPlan`: матриці обов'язкових і дозволених
+  параметрів для кожної події та типи параметрів. `CompiledPlan.validate_batch` перевіряє
+  пакет подій (DataFrame, одна подія на рядок) векторно, без циклу по рядках.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Допустимі типи параметрів
+PROPERTY_TYPES = ("string", "integer", "number", "boolean", "list", "timestamp")
+
+# Обов'язкові параметри для всіх подій (аркуш "Методологія")
+COMMON_PROPERTIES = {
+    "timestamp": "timestamp",
+    "user_id": "string",
+    "session_id": "string",
+    "event_id": "string",
+}
+
+
+@dataclass(frozen=True)
+class EventDefinition:
+    """Опис однієї події tracking plan."""
+
+    name: str
+    description: str
+    properties: dict[str, str]
+    examples: dict[str, object]
+    trigger: str
+    optional: frozenset[str] = field(default_factory=frozenset)
+
+    @property
+    def required(self) -> list[str]:
+        return [prop for prop in self.properties if prop not in self.optional]
+
+
+TRACKING_PLAN = [
+    EventDefinition(
+        name="page_view",
+        description="Перегляд головної сторінки",
+        properties={
+            "page_url": "string",
+            "page_title": "string",
+            "referrer": "string",
+            "utm_source": "string",
+            "utm_medium": "string",
+            "utm_campaign": "string",
+            "device_type": "string",
+            "browser": "string",
+            "is_first_visit": "boolean",
+        },
+        examples={
+            "page_url": "/",
+            "page_title": "Головна",
+            "referrer": "google.com",
+            "utm_source": "google",
+            "utm_medium": "cpc",
+            "device_type": "mobile",
+            "browser": "Chrome",
+            "is_first_visit": True,
+        },
+        trigger="Коли користувач завантажує головну сторінку",
+        optional=frozenset({"referrer", "utm_source", "utm_medium", "utm_campaign"}),
+    ),
+    EventDefinition(
+        name="session_start",
+        description="Початок сесії користувача",
+        properties={
+            "session_id": "string",
+            "user_id": "string",
+            "timestamp": "timestamp",
+            "traffic_source": "string",
+            "landing_page": "string",
+            "country": "string",
+            "city": "string",
+        },
+        examples={
+            "session_id": "ses_12345",
+            "user_id": "anon_67890",
+            "traffic_source": "organic",
+            "landing_page": "/",
+            "country": "UA",
+            "city": "Kyiv",
+        },
+        trigger="При першому заході на сайт (автоматично)",
+    ),
+    EventDefinition(
+        name="banner_view",
+        description="Перегляд промо-банера",
+        properties={
+            "banner_id": "string",
+            "banner_name": "string",
+            "banner_position": "string",
+            "banner_type": "string",
+            "promotion_name": "string",
+        },
+        examples={
+            "banner_id": "promo_001",
+            "banner_name": "Black Friday",
+            "banner_position": "hero",
+            "banner_type": "seasonal",
+            "promotion_name": "50% Off",
+        },
+        trigger="Коли банер з'являється у viewport користувача",
+    ),
+    EventDefinition(
+        name="banner_click",
+        description="Клік по промо-банеру",
+        properties={
+            "banner_id": "string",
+            "banner_name": "string",
+            "click_position_x": "number",
+            "click_position_y": "number",
+            "destination_url": "string",
+        },
+        examples={
+            "banner_id": "promo_001",
+            "banner_name": "Black Friday",
+            "destination_url": "/promotions/black-friday",
+        },
+        trigger="Коли користувач клікає на банер",
+    ),
+    EventDefinition(
+        name="category_click",
+        description="Клік по категорії товарів",
+        properties={
+            "category_id": "string",
+            "category_name": "string",
+            "category_level": "string",
+            "click_location": "string",
+        },
+        examples={
+            "category_id": "cat_smartphones",
+            "category_name": "Смартфони",
+            "category_level": "1",
+            "click_location": "header_menu",
+        },
+        trigger="Коли користувач обирає категорію з меню",
+    ),
+    EventDefinition(
+        name="search_initiated",
+        description="Початок пошуку",
+        properties={
+            "search_query": "string",
+            "search_location": "string",
+            "suggestions_shown": "boolean",
+            "query_length": "integer",
+        },
+        examples={
+            "search_query": "iphone 15",
+            "search_location": "header",
+            "suggestions_shown": True,
+            "query_length": 9,
+        },
+        trigger="Коли користувач починає вводити текст у пошук",
+    ),
+    EventDefinition(
+        name="search_submitted",
+        description="Виконання пошуку",
+        properties={
+            "search_query": "string",
+            "results_count": "integer",
+            "search_time_ms": "integer",
+            "filters_applied": "list",
+        },
+        examples={
+            "search_query": "iphone 15",
+            "results_count": 47,
+            "search_time_ms": 234,
+            "filters_applied": [],
+        },
+        trigger="Коли користувач натискає Enter або кнопку пошуку",
+    ),
+    EventDefinition(
+        name="product_list_view",
+        description="Перегляд списку товарів",
+        properties={
+            "category_id": "string",
+            "category_name": "string",
+            "products_shown": "integer",
+            "sort_type": "string",
+            "filter_applied": "string",
+            "page_number": "integer",
+        },
+        examples={
+            "category_name": "Смартфони",
+            "products_shown": 24,
+            "sort_type": "popularity",
+            "filter_applied": "price_range",
+            "page_number": 1,
+        },
+        trigger="Коли завантажується сторінка зі списком товарів",
+        optional=frozenset({"filter_applied"}),
+    ),
+    EventDefinition(
+        name="product_click",
+        description="Клік по товару",
+        properties={
+            "product_id": "string",
+            "product_name": "string",
+            "product_price": "number",
+            "product_brand": "string",
+            "list_position": "integer",
+            "list_name": "string",
+        },
+        examples={
+            "product_id": "prod_12345",
+            "product_name": "iPhone 15 Pro",
+            "product_price": 45999,
+            "product_brand": "Apple",
+            "list_position": 3,
+            "list_name": "category_smartphones",
+        },
+        trigger="Коли користувач клікає на картку товару",
+    ),
+    EventDefinition(
+        name="product_view",
+        description="Перегляд сторінки товару",
+        properties={
+            "product_id": "string",
+            "product_name": "string",
+            "product_price": "number",
+            "product_brand": "string",
+            "product_category": "string",
+            "availability": "string",
+            "discount_amount": "number",
+        },
+        examples={
+            "product_id": "prod_12345",
+            "product_name": "iPhone 15 Pro",
+            "product_price": 45999,
+            "product_brand": "Apple",
+            "product_category": "Смартфони",
+            "availability": "in_stock",
+            "discount_amount": 0,
+        },
+        trigger="Коли завантажується детальна сторінка товару",
+    ),
+    EventDefinition(
+        name="add_to_cart",
+        description="Додавання товару в кошик",
+        properties={
+            "product_id": "string",
+            "product_name": "string",
+            "product_price": "number",
+            "quantity": "integer",
+            "cart_total": "number",
+            "source_page": "string",
+        },
+        examples={
+            "product_id": "prod_12345",
+            "product_name": "iPhone 15 Pro",
+            "product_price": 45999,
+            "quantity": 1,
+            "cart_total": 45999,
+            "source_page": "product_page",
+        },
+        trigger="Коли користувач натискає 'Додати в кошик'",
+    ),
+    EventDefinition(
+        name="signup_modal_view",
+        description="Перегляд модального вікна реєстрації",
+        properties={
+            "modal_trigger": "string",
+            "trigger_location": "string",
+            "time_on_site": "number",
+        },
+        examples={
+            "modal_trigger": "add_to_cart",
+            "trigger_location": "product_page",
+            "time_on_site": 180,
+        },
+        trigger="Коли показується запрошення зареєструватись",
+    ),
+]
+
+
+# ============================================================================
+# Excel-подання плану
+# ============================================================================
+
+def format_example(value) -> str:
+    """Приклад значення у форматі tracking plan ('рядок', true/false, [], числа)."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f"'{value}'"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(format_example(item) for item in value) + "]"
+    return str(value)
+
+
+def tracking_plan_rows(plan: list[EventDefinition] = TRACKING_PLAN) -> list[list[str]]:
+    """Рядки аркуша: №, назва, опис, параметри, приклади, умова спрацювання."""
+    return [
+        [
+            str(number),
+            event.name,
+            event.description,
+            "\n".join(f"• {prop}" for prop in event.properties),
+            "\n".join(f"{prop}: {format_example(value)}" for prop, value in event.examples.items()),
+            event.trigger,
+        ]
+        for number, event in enumerate(plan, start=1)
+    ]
+
+
+# ============================================================================
+# Скомпільований валідатор
+# ============================================================================
+
+def _is_list(value) -> bool:
+    return isinstance(value, (list, tuple, np.ndarray))
+
+
+# Перевірка одного значення — лише для змішаних object-колонок
+_SCALAR_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, (int, np.integer)) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, (bool, np.bool_)),
+    "list": _is_list,
+    "timestamp": lambda v: isinstance(v, (pd.Timestamp, np.datetime64, int, float, np.integer, np.floating))
+    and not isinstance(v, bool),
+}
+
+# Результат pd.api.types.infer_dtype, за якого вся колонка відповідає типу
+_INFERRED_OK = {
+    "string": {"string", "empty"},
+    "integer": {"integer", "empty"},
+    "number": {"integer", "floating", "mixed-integer-float", "decimal", "empty"},
+    "boolean": {"boolean", "empty"},
+    "list": {"empty"},
+    "timestamp": {"datetime", "datetime64", "integer", "floating", "empty"},
+}
+
+
+def column_type_mask(column: pd.Series, type_name: str) -> np.ndarray:
+    """Булевий масив: значення колонки відповідає типу (пропуски вважаються коректними)."""
+    dtype = column.dtype
+    n = len(column)
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return np.full(n, type_name == "boolean")
+    if pd.api.types.is_integer_dtype(dtype):
+        return np.full(n, type_name in ("integer", "number", "timestamp"))
+    if pd.api.types.is_float_dtype(dtype):
+        if type_name in ("number", "timestamp"):
+            return np.ones(n, dtype=bool)
+        arr = column.to_numpy(dtype=float, na_value=np.nan)
+        if type_name == "integer":
+            return np.isnan(arr) | (np.mod(arr, 1) == 0)
+        return np.isnan(arr)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return np.full(n, type_name == "timestamp")
+
+    # object / string колонки: швидкий шлях для однорідних колонок
+    if pd.api.types.infer_dtype(column, skipna=True) in _INFERRED_OK[type_name]:
+        return np.ones(n, dtype=bool)
+    check = _SCALAR_CHECKS[type_name]
+    isna = column.isna().to_numpy()
+    return isna | np.fromiter((check(v) for v in column.to_numpy()), dtype=bool, count=n)
+
+
+ISSUES = ("unknown_event", "missing", "unexpected", "wrong_type")
+
+
+@dataclass
+class ValidationReport:
+    """Результат перевірки пакета подій.
+
+    `valid` — рядок пройшов усі перевірки; `violations` — порушення у форматі
+    (row, event_name, property, issue), де row — позиція рядка в пакеті.
+    """
+
+    valid: np.ndarray
+    violations: pd.DataFrame
+
+    def summary(self) -> pd.DataFrame:
+        """Кількість порушень за подією, параметром і типом порушення."""
+        return (
+            self.violations.groupby(["event_name", "property", "issue"], dropna=False, observed=True)
+            .size()
+            .rename("count")
+            .reset_index()
+        )
+
+
+@dataclass
+class CompiledPlan:
+    """Індекс для валідації: події × параметри (обов'язкові / дозволені) та типи параметрів."""
+
+    event_names: list[str]
+    properties: list[str]
+    property_types: dict[str, str]
+    required: np.ndarray
+    allowed: np.ndarray
+    property_index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.property_index = {prop: idx for idx, prop in enumerate(self.properties)}
+
+    def validate_batch(self, events: pd.DataFrame, event_column: str = "event_name") -> ValidationReport:
+        """Перевіряє пакет подій: одна подія на рядок, параметри — колонки.
+
+        Цикл іде лише по типах подій і параметрах плану; усі перевірки для рядків
+        однієї події виконуються векторно над їх індексами.
+        """
+        codes = pd.Index(self.event_names).get_indexer(events[event_column])
+        prop_columns = [col for col in events.columns if col != event_column]
+        present = {col: events[col].notna().to_numpy() for col in prop_columns}
+        type_ok = {
+            col: column_type_mask(events[col], self.property_types[col])
+            for col in prop_columns
+            if col in self.property_types
+        }
+
+        found_rows, found_props, found_issues = [], [], []
+
+        def record(rows: np.ndarray, prop: str | None, issue: str) -> None:
+            if rows.size:
+                found_rows.append(rows)
+                found_props.append(np.full(rows.size, prop, dtype=object))
+                found_issues.append(np.full(rows.size, ISSUES.index(issue), dtype=np.int8))
+
+        record(np.flatnonzero(codes < 0), None, "unknown_event")
+        for code in np.unique(codes[codes >= 0]):
+            rows = np.flatnonzero(codes == code)
+            for idx in np.flatnonzero(self.required[code]):
+                prop = self.properties[idx]
+                if prop in present:
+                    record(rows[~present[prop][rows]], prop, "missing")
+                else:
+                    record(rows, prop, "missing")
+            for prop in prop_columns:
+                prop_idx = self.property_index.get(prop)
+                if prop_idx is None or not self.allowed[code, prop_idx]:
+                    record(rows[present[prop][rows]], prop, "unexpected")
+                else:
+                    sub = rows[present[prop][rows]]
+                    record(sub[~type_ok[prop][sub]], prop, "wrong_type")
+
+        valid = np.ones(len(events), dtype=bool)
+        if found_rows:
+            rows = np.concatenate(found_rows)
+            valid[rows] = False
+            event_values = events[event_column].to_numpy(dtype=object)
+            violations = pd.DataFrame({
+                "row": rows,
+                "event_name": event_values[rows],
+                "property": np.concatenate(found_props),
+                "issue": pd.Categorical.from_codes(np.concatenate(found_issues), categories=ISSUES),
+            }).sort_values("row", kind="stable", ignore_index=True)
+        else:
+            violations = pd.DataFrame({
+                "row": np.empty(0, dtype=np.int64),
+                "event_name": np.empty(0, dtype=object),
+                "property": np.empty(0, dtype=object),
+                "issue": pd.Categorical([], categories=ISSUES),
+            })
+        return ValidationReport(valid=valid, violations=violations)
+
+    def to_dict(self) -> dict:
+        return {
+            "events": {
+                name: {
+                    "required": [p for p, flag in zip(self.properties, self.required[i]) if flag],
+                    "allowed": [p for p, flag in zip(self.properties, self.allowed[i]) if flag],
+                }
+                for i, name in enumerate(self.event_names)
+            },
+            "property_types": self.property_types,
+        }
+
+    def save(self, path: str | Path) -> Path:
+        """Зберігає індекс у JSON для інших систем збору подій."""
+        path = Path(path)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        return path
+
+
+def compile_plan(
+    plan: list[EventDefinition] = TRACKING_PLAN,
+    common_properties: dict[str, str] = COMMON_PROPERTIES,
+) -> CompiledPlan:
+    """Компілює план у матриці подій × параметрів і перевіряє узгодженість типів."""
+    property_types = dict(common_properties)
+    for event in plan:
+        for prop, type_name in event.properties.items():
+            if type_name not in PROPERTY_TYPES:
+                raise ValueError(f"Невідомий тип '{type_name}' параметра {event.name}.{prop}")
+            if property_types.setdefault(prop, type_name) != type_name:
+                raise ValueError(
+                    f"Параметр '{prop}' має різні типи: {property_types[prop]} і {type_name} ({event.name})"
+                )
+
+    properties = list(property_types)
+    index = {prop: i for i, prop in enumerate(properties)}
+    required = np.zeros((len(plan), len(properties)), dtype=bool)
+    allowed = np.zeros_like(required)
+    for row, event in enumerate(plan):
+        for prop in common_properties:
+            required[row, index[prop]] = allowed[row, index[prop]] = True
+        for prop in event.properties:
+            allowed[row, index[prop]] = True
+        for prop in event.required:
+            required[row, index[prop]] = True
+
+    return CompiledPlan(
+        event_names=[event.name for event in plan],
+        properties=properties,
+        property_types=property_types,
+        required=required,
+        allowed=allowed,
+    )
@@ -8,604 +8,1140 @@ Requirements:
 3. Define at least one user group (15 points)
 4. Use at least three visualization types (25 points)
 5. Calculate descriptive statistics for segments (15 points)
+
+Each stage is a function that returns a slotted result object; printing is
+left to a reporter, so `--report quiet` / `--report json` runs skip the
+head / describe / per-segment console tables entirely:
+
+    python PA_assignment_3_analysis.py [--report text|quiet|json]
+
+Stages are instrumented with ../goit-pa_final_project/profiling.py; `--profile profile.json` (and
+`--chrome-trace trace.json`) records time, rows and memory per stage.
+
+`--clusters K` adds a mini-batch k-means segmentation of the customer
+features (clustering.py) with per-cluster statistics, chart and Excel sheets;
+`--cluster-model model.npz` reuses the centroids cached there, or saves them
+after fitting when the file does not exist yet. `--basket K` adds the
+co-purchase rules between sub-categories (basket.py), top K per sub-category.
 """
 
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+# profiling.py lives in the final project folder and is shared with it (the course folders are not packages)
+SHARED_DIR = str(Path(__file__).resolve().parent.parent / 'goit-pa_final_project')
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+from profiling import Profiler, profiled, stage
+from rfm import CustomerFeatures, build_customer_features, quantile_scores
+from clustering import ClusterModel, customer_feature_matrix, fit_minibatch_kmeans
+from basket import association_rules, build_basket_matrix
+
 # Set style for better visualizations
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
 
-# Read the data
-print("Loading Superstore dataset...")
-df = pd.read_excel('Sample - Superstore.xls')
-
-print(f"\nDataset shape: {df.shape}")
-print(f"\nColumn names:\n{df.columns.tolist()}")
-print(f"\nFirst few rows:\n{df.head()}")
-print(f"\nData types:\n{df.dtypes}")
-print(f"\nMissing values:\n{df.isnull().sum()}")
-
-# Data preprocessing
-df['Order Date'] = pd.to_datetime(df['Order Date'])
-df['Ship Date'] = pd.to_datetime(df['Ship Date'])
-df['Year'] = df['Order Date'].dt.year
-df['Month'] = df['Order Date'].dt.month
-df['Quarter'] = df['Order Date'].dt.quarter
-df['Year-Month'] = df['Order Date'].dt.to_period('M')
-df['Weekday'] = df['Order Date'].dt.day_name()
-
-# Create additional metrics
-df['Profit Margin'] = (df['Profit'] / df['Sales'] * 100).round(2)
-df['Days to Ship'] = (df['Ship Date'] - df['Order Date']).dt.days
-
-print("\n" + "="*80)
-print("DATA PREPROCESSING COMPLETED")
-print("="*80)
+DATA_PATH = 'Sample - Superstore.xls'
+EXCEL_PATH = 'Fefelov_PA_assignment_3.xlsx'
+DASHBOARD_PNG = 'Fefelov_PA_assignment_3_visualizations.png'
+ANOMALIES_PNG = 'Fefelov_PA_assignment_3_anomalies.png'
+SEGMENTATION_PNG = 'Fefelov_PA_assignment_3_segmentation.png'
+CLUSTERS_PNG = 'Fefelov_PA_assignment_3_clusters.png'
+
+SEGMENT_ORDER = ['Low', 'Medium', 'High', 'VIP']
+STATS_METRICS = ['Sales', 'Profit', 'Quantity', 'Discount']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+@dataclass(slots=True)
+class SeasonalityResult:
+    monthly_sales: pd.DataFrame
+    quarterly_sales: pd.DataFrame
+    monthly_pattern: pd.DataFrame
+
+
+@dataclass(slots=True)
+class AnomalyResult:
+    n_rows: int
+    lower_bound_sales: float
+    upper_bound_sales: float
+    lower_bound_profit: float
+    upper_bound_profit: float
+    anomalies_sales: pd.DataFrame
+    anomalies_profit: pd.DataFrame
+    loss_orders: pd.DataFrame
+
+
+@dataclass(slots=True)
+class SegmentationResult:
+    customer_metrics: pd.DataFrame
+    customer_main_category: pd.DataFrame
+    customers_by_region: pd.Series
+    features: Optional[CustomerFeatures] = None
+
+
+@dataclass(slots=True)
+class ClusterResult:
+    model: ClusterModel
+    fitted: bool  # False when the centroids came from a cached model file
+    customer_clusters: pd.DataFrame
+    profile: pd.DataFrame
+    by_cluster: pd.DataFrame
+
+
+@dataclass(slots=True)
+class BasketResult:
+    n_baskets: int
+    multi_item_baskets: int  # orders with at least two sub-categories
+    rules: pd.DataFrame
+
+
+@dataclass(slots=True)
+class DescriptiveResult:
+    total_orders: int
+    total_customers: int
+    first_order: pd.Timestamp
+    last_order: pd.Timestamp
+    overall_stats: pd.DataFrame
+    by_segment: pd.DataFrame
+    by_category: pd.DataFrame
+    by_region: pd.DataFrame
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    df: pd.DataFrame
+    seasonality: SeasonalityResult
+    anomalies: AnomalyResult
+    segmentation: SegmentationResult
+    statistics: DescriptiveResult
+    figures: Dict[str, str]
+    excel_path: str
+    clusters: Optional[ClusterResult] = None
+    baskets: Optional[BasketResult] = None
 
-# ============================================================================
-# 1. SEASONALITY ANALYSIS (25 points)
-# ============================================================================
-print("\n" + "="*80)
-print("1. SEASONALITY ANALYSIS")
-print("="*80)
-
-# Monthly sales aggregation
-monthly_sales = df.groupby('Year-Month').agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Order ID': 'count'
-}).reset_index()
-monthly_sales.columns = ['Year-Month', 'Sales', 'Profit', 'Order_Count']
-monthly_sales['Year-Month'] = monthly_sales['Year-Month'].astype(str)
-
-print("\nMonthly Sales Statistics:")
-print(monthly_sales.describe())
-
-# Quarterly analysis
-quarterly_sales = df.groupby(['Year', 'Quarter']).agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Order ID': 'count'
-}).reset_index()
-quarterly_sales.columns = ['Year', 'Quarter', 'Sales', 'Profit', 'Order_Count']
-
-print("\nQuarterly Sales by Year:")
-print(quarterly_sales.pivot_table(values='Sales', index='Quarter', columns='Year', aggfunc='sum'))
-
-# Monthly pattern across all years
-monthly_pattern = df.groupby('Month').agg({
-    'Sales': 'mean',
-    'Profit': 'mean',
-    'Order ID': 'count'
-}).reset_index()
-
-print("\nAverage Sales by Month (Seasonality Pattern):")
-print(monthly_pattern)
 
 # ============================================================================
-# 2. ANOMALY DETECTION (20 points)
+# STAGES
 # ============================================================================
-print("\n" + "="*80)
-print("2. ANOMALY DETECTION")
-print("="*80)
-
-# Detect anomalies using IQR method for Sales
-Q1_sales = df['Sales'].quantile(0.25)
-Q3_sales = df['Sales'].quantile(0.75)
-IQR_sales = Q3_sales - Q1_sales
-lower_bound_sales = Q1_sales - 1.5 * IQR_sales
-upper_bound_sales = Q3_sales + 1.5 * IQR_sales
-
-anomalies_sales = df[(df['Sales'] < lower_bound_sales) | (df['Sales'] > upper_bound_sales)]
-print(f"\nSales Anomalies detected: {len(anomalies_sales)} out of {len(df)} orders ({len(anomalies_sales)/len(df)*100:.2f}%)")
-print(f"Normal range: ${lower_bound_sales:.2f} - ${upper_bound_sales:.2f}")
-print(f"\nTop 10 Sales Anomalies:")
-print(anomalies_sales.nlargest(10, 'Sales')[['Order Date', 'Category', 'Sub-Category', 'Sales', 'Profit', 'Customer Name']])
-
-# Detect profit anomalies
-Q1_profit = df['Profit'].quantile(0.25)
-Q3_profit = df['Profit'].quantile(0.75)
-IQR_profit = Q3_profit - Q1_profit
-lower_bound_profit = Q1_profit - 1.5 * IQR_profit
-upper_bound_profit = Q3_profit + 1.5 * IQR_profit
-
-anomalies_profit = df[(df['Profit'] < lower_bound_profit) | (df['Profit'] > upper_bound_profit)]
-print(f"\n\nProfit Anomalies detected: {len(anomalies_profit)} out of {len(df)} orders ({len(anomalies_profit)/len(df)*100:.2f}%)")
-print(f"Normal range: ${lower_bound_profit:.2f} - ${upper_bound_profit:.2f}")
-
-# Negative profit orders (losses)
-loss_orders = df[df['Profit'] < 0]
-print(f"\n\nLoss-making orders: {len(loss_orders)} ({len(loss_orders)/len(df)*100:.2f}%)")
-print(f"Total loss amount: ${loss_orders['Profit'].sum():.2f}")
-print("\nTop 10 Loss-making orders:")
-print(loss_orders.nsmallest(10, 'Profit')[['Order Date', 'Category', 'Sub-Category', 'Sales', 'Profit', 'Discount']])
 
-# ============================================================================
-# 3. CUSTOMER SEGMENTATION (15 points)
-# ============================================================================
-print("\n" + "="*80)
-print("3. CUSTOMER SEGMENTATION")
-print("="*80)
-
-# Segment 1: By Customer Value (RFM-like)
-customer_metrics = df.groupby('Customer ID').agg({
-    'Order ID': 'count',
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Order Date': 'max'
-}).reset_index()
-customer_metrics.columns = ['Customer ID', 'Order_Count', 'Total_Sales', 'Total_Profit', 'Last_Order_Date']
-
-# Calculate recency (days since last order)
-max_date = df['Order Date'].max()
-customer_metrics['Recency_Days'] = (max_date - customer_metrics['Last_Order_Date']).dt.days
-
-# Define customer segments based on sales
-customer_metrics['Sales_Quartile'] = pd.qcut(customer_metrics['Total_Sales'], q=4, labels=['Low', 'Medium', 'High', 'VIP'])
-
-print("\nCustomer Segments by Sales Value:")
-print(customer_metrics.groupby('Sales_Quartile').agg({
-    'Customer ID': 'count',
-    'Total_Sales': ['sum', 'mean', 'median'],
-    'Total_Profit': ['sum', 'mean'],
-    'Order_Count': 'mean'
-}).round(2))
-
-# Segment 2: By Product Category Preference
-customer_category_pref = df.groupby(['Customer ID', 'Category'])['Sales'].sum().reset_index()
-customer_main_category = customer_category_pref.loc[customer_category_pref.groupby('Customer ID')['Sales'].idxmax()]
-customer_main_category.columns = ['Customer ID', 'Preferred_Category', 'Category_Sales']
-
-print("\n\nCustomer Segments by Category Preference:")
-print(customer_main_category['Preferred_Category'].value_counts())
-
-# Segment 3: By Geographic Region
-region_customers = df.groupby(['Region', 'Customer ID']).agg({
-    'Sales': 'sum',
-    'Profit': 'sum'
-}).reset_index()
-
-print("\n\nCustomer Distribution by Region:")
-print(df.groupby('Region')['Customer ID'].nunique())
-
-# Add segment information back to main dataframe
-df = df.merge(customer_metrics[['Customer ID', 'Sales_Quartile']], on='Customer ID', how='left')
-df = df.merge(customer_main_category[['Customer ID', 'Preferred_Category']], on='Customer ID', how='left')
+@profiled('load')
+def load_data(path: str = DATA_PATH) -> pd.DataFrame:
+    """Read the Superstore order lines."""
+    return pd.read_excel(path)
+
+
+def _downcast(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, downcast='integer')
+
+
+@profiled('typing')
+def optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Typed copy of the order lines: every text column becomes a categorical
+    (dimensions and IDs repeat across lines) and integer columns are downcast.
+
+    Sales / Profit / Discount stay float64: totals are reported to the cent and
+    the Discount > 0.3 rule must not move with float32 rounding.
+    """
+    text_columns = df.select_dtypes(include=['object', 'string']).columns
+    integer_columns = df.select_dtypes(include='integer').columns
+    return df.astype({column: 'category' for column in text_columns}).assign(
+        **{column: _downcast(df[column]) for column in integer_columns}
+    )
+
+
+def month_labels(keys: pd.Series) -> pd.Series:
+    """'YYYY-MM' labels of integer YYYYMM month keys."""
+    return (keys // 100).astype(str) + '-' + (keys % 100).astype(str).str.zfill(2)
+
+
+def month_starts(keys) -> pd.DatetimeIndex:
+    """First day of each integer YYYYMM month key."""
+    keys = pd.Index(keys)
+    return pd.DatetimeIndex(pd.to_datetime(pd.DataFrame({'year': keys // 100, 'month': keys % 100, 'day': 1})))
+
+
+@profiled('preprocess')
+def preprocess(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add calendar columns, profit margin and shipping time (in place).
+
+    Time keys are small integers (Year-Month as YYYYMM) and Weekday is a
+    categorical built from the day number, so no per-row strings or Period
+    objects are created; month_labels / month_starts format them for output.
+    """
+    df['Order Date'] = pd.to_datetime(df['Order Date'])
+    df['Ship Date'] = pd.to_datetime(df['Ship Date'])
+    order_date = df['Order Date'].dt
+    df['Year'] = order_date.year.astype('int16')
+    df['Month'] = order_date.month.astype('int8')
+    df['Quarter'] = order_date.quarter.astype('int8')
+    df['Year-Month'] = df['Year'].astype('int32') * 100 + df['Month']
+    df['Weekday'] = pd.Categorical.from_codes(order_date.dayofweek, categories=WEEKDAYS)
+
+    # Create additional metrics
+    df['Profit Margin'] = (df['Profit'] / df['Sales'] * 100).round(2)
+    df['Days to Ship'] = _downcast((df['Ship Date'] - df['Order Date']).dt.days)
+    return df
+
+
+@profiled('seasonality')
+def analyze_seasonality(df: pd.DataFrame) -> SeasonalityResult:
+    """1. Monthly, quarterly and month-of-year sales aggregates."""
+    monthly_sales = df.groupby('Year-Month').agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count'
+    }).reset_index()
+    monthly_sales.columns = ['Year-Month', 'Sales', 'Profit', 'Order_Count']
+    monthly_sales['Year-Month'] = month_labels(monthly_sales['Year-Month'])
+
+    quarterly_sales = df.groupby(['Year', 'Quarter']).agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count'
+    }).reset_index()
+    quarterly_sales.columns = ['Year', 'Quarter', 'Sales', 'Profit', 'Order_Count']
+
+    # Monthly pattern across all years
+    monthly_pattern = df.groupby('Month').agg({
+        'Sales': 'mean',
+        'Profit': 'mean',
+        'Order ID': 'count'
+    }).reset_index()
+    return SeasonalityResult(monthly_sales, quarterly_sales, monthly_pattern)
+
+
+def _iqr_bounds(values: pd.Series):
+    q1, q3 = values.quantile([0.25, 0.75])
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+@profiled('anomalies')
+def detect_anomalies(df: pd.DataFrame) -> AnomalyResult:
+    """2. IQR outliers in Sales and Profit, and loss-making order lines."""
+    lower_bound_sales, upper_bound_sales = _iqr_bounds(df['Sales'])
+    lower_bound_profit, upper_bound_profit = _iqr_bounds(df['Profit'])
+    return AnomalyResult(
+        n_rows=len(df),
+        lower_bound_sales=lower_bound_sales,
+        upper_bound_sales=upper_bound_sales,
+        lower_bound_profit=lower_bound_profit,
+        upper_bound_profit=upper_bound_profit,
+        anomalies_sales=df[(df['Sales'] < lower_bound_sales) | (df['Sales'] > upper_bound_sales)],
+        anomalies_profit=df[(df['Profit'] < lower_bound_profit) | (df['Profit'] > upper_bound_profit)],
+        loss_orders=df[df['Profit'] < 0],
+    )
+
+
+@profiled('segmentation')
+def segment_customers(df: pd.DataFrame):
+    """
+    3. Customer value quartiles, preferred category and customers per region.
+
+    Returns the order lines with Sales_Quartile / Preferred_Category attached
+    and the SegmentationResult.
+    """
+    # Per-customer RFM and category features in one sorted pass (rfm.py)
+    features = build_customer_features(df)
+
+    # Segment 1: By Customer Value (RFM-like)
+    customer_metrics = pd.DataFrame({
+        'Customer ID': features.customers,
+        'Order_Count': features.order_lines,
+        'Total_Sales': features.monetary,
+        'Total_Profit': features.profit,
+        'Last_Order_Date': features.last_order,
+        'Recency_Days': features.recency_days,  # days since the last order in the data
+    })
 
-# ============================================================================
-# 4. DESCRIPTIVE STATISTICS (15 points)
-# ============================================================================
-print("\n" + "="*80)
-print("4. DESCRIPTIVE STATISTICS")
-print("="*80)
-
-# Overall statistics
-print("\n--- OVERALL DATASET STATISTICS ---")
-print(f"\nTotal Orders: {df['Order ID'].nunique()}")
-print(f"Total Customers: {df['Customer ID'].nunique()}")
-print(f"Date Range: {df['Order Date'].min().date()} to {df['Order Date'].max().date()}")
-
-stats_metrics = ['Sales', 'Profit', 'Quantity', 'Discount']
-overall_stats = df[stats_metrics].agg(['sum', 'mean', 'median', 'min', 'max', 'std'])
-print("\nOverall Metrics Statistics:")
-print(overall_stats.round(2))
-
-# Statistics by Customer Segment (Sales Quartile)
-print("\n\n--- STATISTICS BY CUSTOMER SEGMENT (Sales Value) ---")
-for segment in ['Low', 'Medium', 'High', 'VIP']:
-    segment_data = df[df['Sales_Quartile'] == segment]
-    print(f"\n{segment} Value Customers:")
-    print(f"  Number of orders: {len(segment_data)}")
-    print(f"  Total Sales: ${segment_data['Sales'].sum():,.2f}")
-    print(f"  Average Sale: ${segment_data['Sales'].mean():,.2f}")
-    print(f"  Median Sale: ${segment_data['Sales'].median():,.2f}")
-    print(f"  Total Profit: ${segment_data['Profit'].sum():,.2f}")
-    print(f"  Average Profit: ${segment_data['Profit'].mean():,.2f}")
-    print(f"  Min Sale: ${segment_data['Sales'].min():,.2f}")
-    print(f"  Max Sale: ${segment_data['Sales'].max():,.2f}")
-
-# Statistics by Category
-print("\n\n--- STATISTICS BY PRODUCT CATEGORY ---")
-for category in df['Category'].unique():
-    cat_data = df[df['Category'] == category]
-    print(f"\n{category}:")
-    print(f"  Number of orders: {len(cat_data)}")
-    print(f"  Total Sales: ${cat_data['Sales'].sum():,.2f}")
-    print(f"  Average Sale: ${cat_data['Sales'].mean():,.2f}")
-    print(f"  Median Sale: ${cat_data['Sales'].median():,.2f}")
-    print(f"  Total Profit: ${cat_data['Profit'].sum():,.2f}")
-    print(f"  Average Profit: ${cat_data['Profit'].mean():,.2f}")
-    print(f"  Min Sale: ${cat_data['Sales'].min():,.2f}")
-    print(f"  Max Sale: ${cat_data['Sales'].max():,.2f}")
-
-# Statistics by Region
-print("\n\n--- STATISTICS BY REGION ---")
-for region in df['Region'].unique():
-    reg_data = df[df['Region'] == region]
-    print(f"\n{region}:")
-    print(f"  Number of orders: {len(reg_data)}")
-    print(f"  Total Sales: ${reg_data['Sales'].sum():,.2f}")
-    print(f"  Average Sale: ${reg_data['Sales'].mean():,.2f}")
-    print(f"  Median Sale: ${reg_data['Sales'].median():,.2f}")
-    print(f"  Total Profit: ${reg_data['Profit'].sum():,.2f}")
-    print(f"  Average Profit: ${reg_data['Profit'].mean():,.2f}")
-    print(f"  Min Sale: ${reg_data['Sales'].min():,.2f}")
-    print(f"  Max Sale: ${reg_data['Sales'].max():,.2f}")
+    # Define customer segments based on sales (same bins as pd.qcut)
+    customer_metrics['Sales_Quartile'] = quantile_scores(features.monetary, 4, labels=SEGMENT_ORDER)
 
-# ============================================================================
-# 5. VISUALIZATIONS (25 points) - At least 3 types
-# ============================================================================
-print("\n" + "="*80)
-print("5. CREATING VISUALIZATIONS")
-print("="*80)
-
-# Create a comprehensive dashboard
-fig = plt.figure(figsize=(20, 24))
-
-# Visualization 1: LINE CHART - Seasonality (Monthly Sales Trend)
-ax1 = plt.subplot(4, 3, 1)
-monthly_sales_plot = df.groupby('Year-Month')['Sales'].sum().reset_index()
-monthly_sales_plot['Year-Month'] = monthly_sales_plot['Year-Month'].astype(str)
-plt.plot(range(len(monthly_sales_plot)), monthly_sales_plot['Sales'], marker='o', linewidth=2, markersize=6, color='#2E86AB')
-plt.xticks(range(len(monthly_sales_plot)), monthly_sales_plot['Year-Month'], rotation=90, fontsize=7)
-plt.title('Monthly Sales Trend (Seasonality)', fontsize=12, fontweight='bold')
-plt.xlabel('Month', fontsize=10)
-plt.ylabel('Sales ($)', fontsize=10)
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-
-# Visualization 2: BAR CHART - Sales by Quarter
-ax2 = plt.subplot(4, 3, 2)
-quarter_avg = df.groupby('Quarter')['Sales'].mean().reset_index()
-colors = ['#06A77D', '#F77F00', '#D62828', '#8338EC']
-plt.bar(quarter_avg['Quarter'], quarter_avg['Sales'], color=colors, alpha=0.7, edgecolor='black')
-plt.title('Average Sales by Quarter (Seasonality)', fontsize=12, fontweight='bold')
-plt.xlabel('Quarter', fontsize=10)
-plt.ylabel('Average Sales ($)', fontsize=10)
-plt.xticks(quarter_avg['Quarter'])
-plt.grid(True, alpha=0.3, axis='y')
-
-# Visualization 3: PIE CHART - Sales Distribution by Category
-ax3 = plt.subplot(4, 3, 3)
-category_sales = df.groupby('Category')['Sales'].sum()
-colors_pie = ['#FF6B6B', '#4ECDC4', '#45B7D1']
-plt.pie(category_sales, labels=category_sales.index, autopct='%1.1f%%', startangle=90, colors=colors_pie, explode=(0.05, 0.05, 0.05))
-plt.title('Sales Distribution by Category', fontsize=12, fontweight='bold')
-
-# Visualization 4: BAR CHART - Sales by Region
-ax4 = plt.subplot(4, 3, 4)
-region_sales = df.groupby('Region')['Sales'].sum().sort_values(ascending=True)
-plt.barh(region_sales.index, region_sales.values, color='#FF6B6B', alpha=0.7, edgecolor='black')
-plt.title('Total Sales by Region', fontsize=12, fontweight='bold')
-plt.xlabel('Sales ($)', fontsize=10)
-plt.ylabel('Region', fontsize=10)
-plt.grid(True, alpha=0.3, axis='x')
-
-# Visualization 5: LINE CHART - Profit Trend
-ax5 = plt.subplot(4, 3, 5)
-monthly_profit = df.groupby('Year-Month')['Profit'].sum().reset_index()
-monthly_profit['Year-Month'] = monthly_profit['Year-Month'].astype(str)
-plt.plot(range(len(monthly_profit)), monthly_profit['Profit'], marker='s', linewidth=2, markersize=6, color='#06A77D')
-plt.xticks(range(len(monthly_profit)), monthly_profit['Year-Month'], rotation=90, fontsize=7)
-plt.title('Monthly Profit Trend', fontsize=12, fontweight='bold')
-plt.xlabel('Month', fontsize=10)
-plt.ylabel('Profit ($)', fontsize=10)
-plt.grid(True, alpha=0.3)
-plt.axhline(y=0, color='red', linestyle='--', linewidth=1)
-
-# Visualization 6: BAR CHART - Customer Segments Distribution
-ax6 = plt.subplot(4, 3, 6)
-segment_dist = df.groupby('Sales_Quartile')['Customer ID'].nunique()
-segment_order = ['Low', 'Medium', 'High', 'VIP']
-segment_dist = segment_dist.reindex(segment_order)
-colors_seg = ['#FFB4A2', '#FFC971', '#B5EAD7', '#95E1D3']
-plt.bar(segment_dist.index, segment_dist.values, color=colors_seg, alpha=0.8, edgecolor='black')
-plt.title('Customer Distribution by Segment', fontsize=12, fontweight='bold')
-plt.xlabel('Customer Segment', fontsize=10)
-plt.ylabel('Number of Customers', fontsize=10)
-plt.grid(True, alpha=0.3, axis='y')
-
-# Visualization 7: BOX PLOT - Sales Distribution (Anomaly Detection)
-ax7 = plt.subplot(4, 3, 7)
-plt.boxplot(df['Sales'], vert=True, patch_artist=True, 
-            boxprops=dict(facecolor='lightblue', alpha=0.7),
-            medianprops=dict(color='red', linewidth=2))
-plt.title('Sales Distribution (Anomaly Detection)', fontsize=12, fontweight='bold')
-plt.ylabel('Sales ($)', fontsize=10)
-plt.grid(True, alpha=0.3, axis='y')
-
-# Visualization 8: BAR CHART - Top 10 Sub-Categories by Sales
-ax8 = plt.subplot(4, 3, 8)
-top_subcats = df.groupby('Sub-Category')['Sales'].sum().nlargest(10).sort_values(ascending=True)
-plt.barh(top_subcats.index, top_subcats.values, color='#4ECDC4', alpha=0.7, edgecolor='black')
-plt.title('Top 10 Sub-Categories by Sales', fontsize=12, fontweight='bold')
-plt.xlabel('Sales ($)', fontsize=10)
-plt.ylabel('Sub-Category', fontsize=10)
-plt.grid(True, alpha=0.3, axis='x')
-
-# Visualization 9: PIE CHART - Sales by Ship Mode
-ax9 = plt.subplot(4, 3, 9)
-shipmode_sales = df.groupby('Ship Mode')['Sales'].sum()
-colors_ship = ['#845EC2', '#D65DB1', '#FF6F91', '#FFC75F']
-plt.pie(shipmode_sales, labels=shipmode_sales.index, autopct='%1.1f%%', startangle=45, colors=colors_ship)
-plt.title('Sales Distribution by Ship Mode', fontsize=12, fontweight='bold')
-
-# Visualization 10: BAR CHART - Segment Sales Comparison
-ax10 = plt.subplot(4, 3, 10)
-segment_sales = df.groupby('Sales_Quartile')['Sales'].sum()
-segment_sales = segment_sales.reindex(segment_order)
-plt.bar(segment_sales.index, segment_sales.values, color=colors_seg, alpha=0.8, edgecolor='black')
-plt.title('Total Sales by Customer Segment', fontsize=12, fontweight='bold')
-plt.xlabel('Customer Segment', fontsize=10)
-plt.ylabel('Total Sales ($)', fontsize=10)
-plt.grid(True, alpha=0.3, axis='y')
-
-# Visualization 11: LINE CHART - Year over Year Comparison
-ax11 = plt.subplot(4, 3, 11)
-yearly_monthly = df.groupby(['Year', 'Month'])['Sales'].sum().reset_index()
-for year in yearly_monthly['Year'].unique():
-    year_data = yearly_monthly[yearly_monthly['Year'] == year]
-    plt.plot(year_data['Month'], year_data['Sales'], marker='o', label=f'{int(year)}', linewidth=2)
-plt.title('Year-over-Year Monthly Sales Comparison', fontsize=12, fontweight='bold')
-plt.xlabel('Month', fontsize=10)
-plt.ylabel('Sales ($)', fontsize=10)
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.xticks(range(1, 13))
-
-# Visualization 12: BAR CHART - Profit by Category
-ax12 = plt.subplot(4, 3, 12)
-category_profit = df.groupby('Category')['Profit'].sum().sort_values(ascending=True)
-plt.barh(category_profit.index, category_profit.values, color=colors_pie, alpha=0.7, edgecolor='black')
-plt.title('Total Profit by Category', fontsize=12, fontweight='bold')
-plt.xlabel('Profit ($)', fontsize=10)
-plt.ylabel('Category', fontsize=10)
-plt.grid(True, alpha=0.3, axis='x')
-
-plt.tight_layout()
-plt.savefig('Fefelov_PA_assignment_3_visualizations.png', dpi=300, bbox_inches='tight')
-print("\n✓ Main dashboard saved as 'Fefelov_PA_assignment_3_visualizations.png'")
-
-# Create additional focused visualizations
-
-# Anomaly visualization
-fig2, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Top anomalies scatter plot
-axes[0, 0].scatter(df.index, df['Sales'], alpha=0.3, s=10, color='blue', label='Normal')
-axes[0, 0].scatter(anomalies_sales.index, anomalies_sales['Sales'], alpha=0.7, s=30, color='red', label='Anomaly')
-axes[0, 0].axhline(y=upper_bound_sales, color='orange', linestyle='--', label='Upper Threshold')
-axes[0, 0].set_title('Sales Anomalies Detection', fontsize=12, fontweight='bold')
-axes[0, 0].set_xlabel('Order Index')
-axes[0, 0].set_ylabel('Sales ($)')
-axes[0, 0].legend()
-axes[0, 0].grid(True, alpha=0.3)
-
-# Loss-making orders by category
-loss_by_cat = loss_orders.groupby('Category')['Profit'].sum().sort_values()
-axes[0, 1].barh(loss_by_cat.index, loss_by_cat.values, color='#D62828', alpha=0.7, edgecolor='black')
-axes[0, 1].set_title('Total Losses by Category', fontsize=12, fontweight='bold')
-axes[0, 1].set_xlabel('Loss ($)')
-axes[0, 1].set_ylabel('Category')
-axes[0, 1].grid(True, alpha=0.3, axis='x')
-
-# Monthly order count with anomalies
-monthly_orders = df.groupby('Year-Month')['Order ID'].count().reset_index()
-monthly_orders['Year-Month'] = monthly_orders['Year-Month'].astype(str)
-axes[1, 0].plot(range(len(monthly_orders)), monthly_orders['Order ID'], marker='o', linewidth=2, color='#2E86AB')
-axes[1, 0].set_xticks(range(len(monthly_orders)))
-axes[1, 0].set_xticklabels(monthly_orders['Year-Month'], rotation=90, fontsize=7)
-axes[1, 0].set_title('Monthly Order Count Trend', fontsize=12, fontweight='bold')
-axes[1, 0].set_xlabel('Month')
-axes[1, 0].set_ylabel('Number of Orders')
-axes[1, 0].grid(True, alpha=0.3)
-
-# Discount impact on profit
-axes[1, 1].scatter(df['Discount'], df['Profit'], alpha=0.3, s=20)
-axes[1, 1].set_title('Discount vs Profit Relationship', fontsize=12, fontweight='bold')
-axes[1, 1].set_xlabel('Discount (%)')
-axes[1, 1].set_ylabel('Profit ($)')
-axes[1, 1].axhline(y=0, color='red', linestyle='--', linewidth=1)
-axes[1, 1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('Fefelov_PA_assignment_3_anomalies.png', dpi=300, bbox_inches='tight')
-print("✓ Anomaly analysis saved as 'Fefelov_PA_assignment_3_anomalies.png'")
-
-# Segmentation visualization
-fig3, axes = plt.subplots(2, 2, figsize=(16, 12))
-
-# Customer segment metrics
-segment_metrics = df.groupby('Sales_Quartile').agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Order ID': 'count',
-    'Customer ID': 'nunique'
-}).reindex(segment_order)
-
-axes[0, 0].bar(segment_metrics.index, segment_metrics['Sales'], color=colors_seg, alpha=0.8, edgecolor='black')
-axes[0, 0].set_title('Total Sales by Customer Segment', fontsize=12, fontweight='bold')
-axes[0, 0].set_xlabel('Segment')
-axes[0, 0].set_ylabel('Sales ($)')
-axes[0, 0].grid(True, alpha=0.3, axis='y')
-
-axes[0, 1].bar(segment_metrics.index, segment_metrics['Profit'], color=colors_seg, alpha=0.8, edgecolor='black')
-axes[0, 1].set_title('Total Profit by Customer Segment', fontsize=12, fontweight='bold')
-axes[0, 1].set_xlabel('Segment')
-axes[0, 1].set_ylabel('Profit ($)')
-axes[0, 1].grid(True, alpha=0.3, axis='y')
-
-# Category preference distribution
-cat_pref = customer_main_category['Preferred_Category'].value_counts()
-axes[1, 0].pie(cat_pref, labels=cat_pref.index, autopct='%1.1f%%', startangle=90, colors=colors_pie, explode=(0.05, 0.05, 0.05))
-axes[1, 0].set_title('Customer Distribution by Category Preference', fontsize=12, fontweight='bold')
-
-# Regional customer distribution
-region_cust = df.groupby('Region')['Customer ID'].nunique().sort_values(ascending=True)
-axes[1, 1].barh(region_cust.index, region_cust.values, color='#FF6B6B', alpha=0.7, edgecolor='black')
-axes[1, 1].set_title('Unique Customers by Region', fontsize=12, fontweight='bold')
-axes[1, 1].set_xlabel('Number of Customers')
-axes[1, 1].set_ylabel('Region')
-axes[1, 1].grid(True, alpha=0.3, axis='x')
-
-plt.tight_layout()
-plt.savefig('Fefelov_PA_assignment_3_segmentation.png', dpi=300, bbox_inches='tight')
-print("✓ Segmentation analysis saved as 'Fefelov_PA_assignment_3_segmentation.png'")
-
-# ============================================================================
-# EXPORT RESULTS TO EXCEL
-# ============================================================================
-print("\n" + "="*80)
-print("6. EXPORTING RESULTS TO EXCEL")
-print("="*80)
+    # Segment 2: By Product Category Preference
+    customer_main_category = pd.DataFrame({
+        'Customer ID': features.customers,
+        'Preferred_Category': features.preferred_category,
+        'Category_Sales': features.preferred_sales,
+    })
 
-# Create Excel file with multiple sheets
-with pd.ExcelWriter('Fefelov_PA_assignment_3.xlsx', engine='openpyxl') as writer:
+    # Segment 3: By Geographic Region
+    customers_by_region = df.groupby('Region')['Customer ID'].nunique()
+
+    # Add segment information back to main dataframe: per-customer labels are taken by
+    # each line's customer row; assign shares the other columns instead of copying them
+    df = df.assign(
+        Sales_Quartile=features.to_lines(customer_metrics['Sales_Quartile'].array),
+        Preferred_Category=features.to_lines(customer_main_category['Preferred_Category'].array),
+    )
+    return df, SegmentationResult(customer_metrics, customer_main_category, customers_by_region, features)
+
+
+@profiled('clustering')
+def cluster_customers(df: pd.DataFrame, segmentation: SegmentationResult, n_clusters: int = 5,
+                      model_path: Optional[str] = None):
+    """
+    3b. Mini-batch k-means segments over the customer features (clustering.py).
+
+    An existing `model_path` is loaded and its centroids are reused (its
+    cluster count wins over `n_clusters`); otherwise the model is fitted and,
+    with a `model_path`, saved there. Returns the order lines with a Cluster
+    column and the per-cluster profile and statistics.
+    """
+    features = segmentation.features
+    matrix, names = customer_feature_matrix(features)
+    fitted = not (model_path and Path(model_path).exists())
+    if fitted:
+        model, labels = fit_minibatch_kmeans(matrix, names, n_clusters)
+        if model_path:
+            model.save(model_path)
+    else:
+        model = ClusterModel.load(model_path)
+        labels, _ = model.assign(model.align(matrix, names))
+
+    cluster_names = [f'Cluster {i + 1}' for i in range(model.n_clusters)]
+    clusters = pd.Categorical.from_codes(labels, categories=cluster_names, ordered=True)
+    customer_clusters = pd.DataFrame({'Customer ID': features.customers, 'Cluster': clusters})
+    profile = model.profile().set_axis(pd.Index(cluster_names, name='Cluster'))
+    profile.insert(0, 'Customers', np.bincount(labels, minlength=model.n_clusters))
+
+    df = df.assign(Cluster=features.to_lines(clusters))
+    result = ClusterResult(model, fitted, customer_clusters, profile, group_statistics(df, 'Cluster', cluster_names))
+    return df, result
+
+
+@profiled('baskets')
+def analyze_baskets(df: pd.DataFrame, top_k: int = 3, min_count: int = 5) -> BasketResult:
+    """3c. Sub-categories bought together in one order: top `top_k` rules by lift per sub-category."""
+    baskets = build_basket_matrix(df, basket='Order ID', item='Sub-Category')
+    rules = association_rules(baskets, min_count=min_count, top_k=top_k, by='lift')
+    return BasketResult(baskets.n_baskets, int((baskets.basket_sizes >= 2).sum()), rules)
+
+
+def group_statistics(df: pd.DataFrame, column: str, order) -> pd.DataFrame:
+    """Order count and Sales / Profit statistics per group, in one groupby pass."""
+    stats = df.groupby(column, observed=True).agg(
+        orders=('Sales', 'size'),
+        total_sales=('Sales', 'sum'),
+        average_sale=('Sales', 'mean'),
+        median_sale=('Sales', 'median'),
+        total_profit=('Profit', 'sum'),
+        average_profit=('Profit', 'mean'),
+        min_sale=('Sales', 'min'),
+        max_sale=('Sales', 'max'),
+    )
+    return stats.reindex(order)
+
+
+@profiled('statistics')
+def describe_segments(df: pd.DataFrame) -> DescriptiveResult:
+    """4. Overall statistics and per segment / category / region breakdowns."""
+    return DescriptiveResult(
+        total_orders=df['Order ID'].nunique(),
+        total_customers=df['Customer ID'].nunique(),
+        first_order=df['Order Date'].min(),
+        last_order=df['Order Date'].max(),
+        overall_stats=df[STATS_METRICS].agg(['sum', 'mean', 'median', 'min', 'max', 'std']),
+        by_segment=group_statistics(df, 'Sales_Quartile', SEGMENT_ORDER),
+        by_category=group_statistics(df, 'Category', df['Category'].unique()),
+        by_region=group_statistics(df, 'Region', df['Region'].unique()),
+    )
+
+
+@profiled('plot')
+def create_visualizations(df: pd.DataFrame, anomalies: AnomalyResult,
+                          segmentation: SegmentationResult) -> Dict[str, str]:
+    """5. Save the three dashboards; returns {description: PNG path}."""
+    anomalies_sales = anomalies.anomalies_sales
+    upper_bound_sales = anomalies.upper_bound_sales
+    loss_orders = anomalies.loss_orders
+    customer_main_category = segmentation.customer_main_category
+
+    # Create a comprehensive dashboard
+    fig = plt.figure(figsize=(20, 24))
+
+    # Visualization 1: LINE CHART - Seasonality (Monthly Sales Trend)
+    ax1 = plt.subplot(4, 3, 1)
+    monthly_sales_plot = df.groupby('Year-Month')['Sales'].sum().reset_index()
+    monthly_sales_plot['Year-Month'] = month_labels(monthly_sales_plot['Year-Month'])
+    plt.plot(range(len(monthly_sales_plot)), monthly_sales_plot['Sales'], marker='o', linewidth=2, markersize=6, color='#2E86AB')
+    plt.xticks(range(len(monthly_sales_plot)), monthly_sales_plot['Year-Month'], rotation=90, fontsize=7)
+    plt.title('Monthly Sales Trend (Seasonality)', fontsize=12, fontweight='bold')
+    plt.xlabel('Month', fontsize=10)
+    plt.ylabel('Sales ($)', fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+
+    # Visualization 2: BAR CHART - Sales by Quarter
+    ax2 = plt.subplot(4, 3, 2)
+    quarter_avg = df.groupby('Quarter')['Sales'].mean().reset_index()
+    colors = ['#06A77D', '#F77F00', '#D62828', '#8338EC']
+    plt.bar(quarter_avg['Quarter'], quarter_avg['Sales'], color=colors, alpha=0.7, edgecolor='black')
+    plt.title('Average Sales by Quarter (Seasonality)', fontsize=12, fontweight='bold')
+    plt.xlabel('Quarter', fontsize=10)
+    plt.ylabel('Average Sales ($)', fontsize=10)
+    plt.xticks(quarter_avg['Quarter'])
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Visualization 3: PIE CHART - Sales Distribution by Category
+    ax3 = plt.subplot(4, 3, 3)
+    category_sales = df.groupby('Category')['Sales'].sum()
+    colors_pie = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+    plt.pie(category_sales, labels=category_sales.index, autopct='%1.1f%%', startangle=90, colors=colors_pie, explode=(0.05, 0.05, 0.05))
+    plt.title('Sales Distribution by Category', fontsize=12, fontweight='bold')
+
+    # Visualization 4: BAR CHART - Sales by Region
+    ax4 = plt.subplot(4, 3, 4)
+    region_sales = df.groupby('Region')['Sales'].sum().sort_values(ascending=True)
+    plt.barh(region_sales.index, region_sales.values, color='#FF6B6B', alpha=0.7, edgecolor='black')
+    plt.title('Total Sales by Region', fontsize=12, fontweight='bold')
+    plt.xlabel('Sales ($)', fontsize=10)
+    plt.ylabel('Region', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='x')
+
+    # Visualization 5: LINE CHART - Profit Trend
+    ax5 = plt.subplot(4, 3, 5)
+    monthly_profit = df.groupby('Year-Month')['Profit'].sum().reset_index()
+    monthly_profit['Year-Month'] = month_labels(monthly_profit['Year-Month'])
+    plt.plot(range(len(monthly_profit)), monthly_profit['Profit'], marker='s', linewidth=2, markersize=6, color='#06A77D')
+    plt.xticks(range(len(monthly_profit)), monthly_profit['Year-Month'], rotation=90, fontsize=7)
+    plt.title('Monthly Profit Trend', fontsize=12, fontweight='bold')
+    plt.xlabel('Month', fontsize=10)
+    plt.ylabel('Profit ($)', fontsize=10)
+    plt.grid(True, alpha=0.3)
+    plt.axhline(y=0, color='red', linestyle='--', linewidth=1)
+
+    # Visualization 6: BAR CHART - Customer Segments Distribution
+    ax6 = plt.subplot(4, 3, 6)
+    segment_dist = df.groupby('Sales_Quartile')['Customer ID'].nunique()
+    segment_order = ['Low', 'Medium', 'High', 'VIP']
+    segment_dist = segment_dist.reindex(segment_order)
+    colors_seg = ['#FFB4A2', '#FFC971', '#B5EAD7', '#95E1D3']
+    plt.bar(segment_dist.index, segment_dist.values, color=colors_seg, alpha=0.8, edgecolor='black')
+    plt.title('Customer Distribution by Segment', fontsize=12, fontweight='bold')
+    plt.xlabel('Customer Segment', fontsize=10)
+    plt.ylabel('Number of Customers', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Visualization 7: BOX PLOT - Sales Distribution (Anomaly Detection)
+    ax7 = plt.subplot(4, 3, 7)
+    plt.boxplot(df['Sales'], vert=True, patch_artist=True, 
+                boxprops=dict(facecolor='lightblue', alpha=0.7),
+                medianprops=dict(color='red', linewidth=2))
+    plt.title('Sales Distribution (Anomaly Detection)', fontsize=12, fontweight='bold')
+    plt.ylabel('Sales ($)', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Visualization 8: BAR CHART - Top 10 Sub-Categories by Sales
+    ax8 = plt.subplot(4, 3, 8)
+    top_subcats = df.groupby('Sub-Category')['Sales'].sum().nlargest(10).sort_values(ascending=True)
+    plt.barh(top_subcats.index, top_subcats.values, color='#4ECDC4', alpha=0.7, edgecolor='black')
+    plt.title('Top 10 Sub-Categories by Sales', fontsize=12, fontweight='bold')
+    plt.xlabel('Sales ($)', fontsize=10)
+    plt.ylabel('Sub-Category', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='x')
+
+    # Visualization 9: PIE CHART - Sales by Ship Mode
+    ax9 = plt.subplot(4, 3, 9)
+    shipmode_sales = df.groupby('Ship Mode')['Sales'].sum()
+    colors_ship = ['#845EC2', '#D65DB1', '#FF6F91', '#FFC75F']
+    plt.pie(shipmode_sales, labels=shipmode_sales.index, autopct='%1.1f%%', startangle=45, colors=colors_ship)
+    plt.title('Sales Distribution by Ship Mode', fontsize=12, fontweight='bold')
+
+    # Visualization 10: BAR CHART - Segment Sales Comparison
+    ax10 = plt.subplot(4, 3, 10)
+    segment_sales = df.groupby('Sales_Quartile')['Sales'].sum()
+    segment_sales = segment_sales.reindex(segment_order)
+    plt.bar(segment_sales.index, segment_sales.values, color=colors_seg, alpha=0.8, edgecolor='black')
+    plt.title('Total Sales by Customer Segment', fontsize=12, fontweight='bold')
+    plt.xlabel('Customer Segment', fontsize=10)
+    plt.ylabel('Total Sales ($)', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Visualization 11: LINE CHART - Year over Year Comparison
+    ax11 = plt.subplot(4, 3, 11)
+    yearly_monthly = df.groupby(['Year', 'Month'])['Sales'].sum().reset_index()
+    for year in yearly_monthly['Year'].unique():
+        year_data = yearly_monthly[yearly_monthly['Year'] == year]
+        plt.plot(year_data['Month'], year_data['Sales'], marker='o', label=f'{int(year)}', linewidth=2)
+    plt.title('Year-over-Year Monthly Sales Comparison', fontsize=12, fontweight='bold')
+    plt.xlabel('Month', fontsize=10)
+    plt.ylabel('Sales ($)', fontsize=10)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.xticks(range(1, 13))
+
+    # Visualization 12: BAR CHART - Profit by Category
+    ax12 = plt.subplot(4, 3, 12)
+    category_profit = df.groupby('Category')['Profit'].sum().sort_values(ascending=True)
+    plt.barh(category_profit.index, category_profit.values, color=colors_pie, alpha=0.7, edgecolor='black')
+    plt.title('Total Profit by Category', fontsize=12, fontweight='bold')
+    plt.xlabel('Profit ($)', fontsize=10)
+    plt.ylabel('Category', fontsize=10)
+    plt.grid(True, alpha=0.3, axis='x')
+
+    plt.tight_layout()
+    with stage('plot.save_dashboard'):
+        plt.savefig(DASHBOARD_PNG, dpi=300, bbox_inches='tight')
+
+    # Create additional focused visualizations
+
+    # Anomaly visualization
+    fig2, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Top anomalies scatter plot
+    axes[0, 0].scatter(df.index, df['Sales'], alpha=0.3, s=10, color='blue', label='Normal')
+    axes[0, 0].scatter(anomalies_sales.index, anomalies_sales['Sales'], alpha=0.7, s=30, color='red', label='Anomaly')
+    axes[0, 0].axhline(y=upper_bound_sales, color='orange', linestyle='--', label='Upper Threshold')
+    axes[0, 0].set_title('Sales Anomalies Detection', fontsize=12, fontweight='bold')
+    axes[0, 0].set_xlabel('Order Index')
+    axes[0, 0].set_ylabel('Sales ($)')
+    axes[0, 0].legend()
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Loss-making orders by category
+    loss_by_cat = loss_orders.groupby('Category')['Profit'].sum().sort_values()
+    axes[0, 1].barh(loss_by_cat.index, loss_by_cat.values, color='#D62828', alpha=0.7, edgecolor='black')
+    axes[0, 1].set_title('Total Losses by Category', fontsize=12, fontweight='bold')
+    axes[0, 1].set_xlabel('Loss ($)')
+    axes[0, 1].set_ylabel('Category')
+    axes[0, 1].grid(True, alpha=0.3, axis='x')
+
+    # Monthly order count with anomalies
+    monthly_orders = df.groupby('Year-Month')['Order ID'].count().reset_index()
+    monthly_orders['Year-Month'] = month_labels(monthly_orders['Year-Month'])
+    axes[1, 0].plot(range(len(monthly_orders)), monthly_orders['Order ID'], marker='o', linewidth=2, color='#2E86AB')
+    axes[1, 0].set_xticks(range(len(monthly_orders)))
+    axes[1, 0].set_xticklabels(monthly_orders['Year-Month'], rotation=90, fontsize=7)
+    axes[1, 0].set_title('Monthly Order Count Trend', fontsize=12, fontweight='bold')
+    axes[1, 0].set_xlabel('Month')
+    axes[1, 0].set_ylabel('Number of Orders')
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Discount impact on profit
+    axes[1, 1].scatter(df['Discount'], df['Profit'], alpha=0.3, s=20)
+    axes[1, 1].set_title('Discount vs Profit Relationship', fontsize=12, fontweight='bold')
+    axes[1, 1].set_xlabel('Discount (%)')
+    axes[1, 1].set_ylabel('Profit ($)')
+    axes[1, 1].axhline(y=0, color='red', linestyle='--', linewidth=1)
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    with stage('plot.save_anomalies'):
+        plt.savefig(ANOMALIES_PNG, dpi=300, bbox_inches='tight')
+
+    # Segmentation visualization
+    fig3, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Customer segment metrics
+    segment_metrics = df.groupby('Sales_Quartile').agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+        'Order ID': 'count',
+        'Customer ID': 'nunique'
+    }).reindex(segment_order)
+
+    axes[0, 0].bar(segment_metrics.index, segment_metrics['Sales'], color=colors_seg, alpha=0.8, edgecolor='black')
+    axes[0, 0].set_title('Total Sales by Customer Segment', fontsize=12, fontweight='bold')
+    axes[0, 0].set_xlabel('Segment')
+    axes[0, 0].set_ylabel('Sales ($)')
+    axes[0, 0].grid(True, alpha=0.3, axis='y')
+
+    axes[0, 1].bar(segment_metrics.index, segment_metrics['Profit'], color=colors_seg, alpha=0.8, edgecolor='black')
+    axes[0, 1].set_title('Total Profit by Customer Segment', fontsize=12, fontweight='bold')
+    axes[0, 1].set_xlabel('Segment')
+    axes[0, 1].set_ylabel('Profit ($)')
+    axes[0, 1].grid(True, alpha=0.3, axis='y')
+
+    # Category preference distribution
+    cat_pref = customer_main_category['Preferred_Category'].value_counts()
+    axes[1, 0].pie(cat_pref, labels=cat_pref.index, autopct='%1.1f%%', startangle=90, colors=colors_pie, explode=(0.05, 0.05, 0.05))
+    axes[1, 0].set_title('Customer Distribution by Category Preference', fontsize=12, fontweight='bold')
+
+    # Regional customer distribution
+    region_cust = df.groupby('Region')['Customer ID'].nunique().sort_values(ascending=True)
+    axes[1, 1].barh(region_cust.index, region_cust.values, color='#FF6B6B', alpha=0.7, edgecolor='black')
+    axes[1, 1].set_title('Unique Customers by Region', fontsize=12, fontweight='bold')
+    axes[1, 1].set_xlabel('Number of Customers')
+    axes[1, 1].set_ylabel('Region')
+    axes[1, 1].grid(True, alpha=0.3, axis='x')
+
+    plt.tight_layout()
+    with stage('plot.save_segmentation'):
+        plt.savefig(SEGMENTATION_PNG, dpi=300, bbox_inches='tight')
+
+    return {
+        'Main dashboard': DASHBOARD_PNG,
+        'Anomaly analysis': ANOMALIES_PNG,
+        'Segmentation analysis': SEGMENTATION_PNG,
+    }
+
+
+@profiled('plot_clusters')
+def plot_clusters(df: pd.DataFrame, segmentation: SegmentationResult, clusters: ClusterResult) -> Dict[str, str]:
+    """The segmentation charts per k-means cluster; returns {description: PNG path}."""
+    cluster_order = list(clusters.profile.index)
+    colors_cluster = sns.color_palette('husl', len(cluster_order))
+
+    fig4, axes = plt.subplots(2, 2, figsize=(16, 12))
+
+    # Cluster metrics
+    cluster_metrics = df.groupby('Cluster').agg({
+        'Sales': 'sum',
+        'Profit': 'sum',
+    }).reindex(cluster_order)
+
+    axes[0, 0].bar(cluster_metrics.index, cluster_metrics['Sales'], color=colors_cluster, alpha=0.8, edgecolor='black')
+    axes[0, 0].set_title('Total Sales by Customer Cluster', fontsize=12, fontweight='bold')
+    axes[0, 0].set_xlabel('Cluster')
+    axes[0, 0].set_ylabel('Sales ($)')
+    axes[0, 0].grid(True, alpha=0.3, axis='y')
+
+    axes[0, 1].bar(cluster_metrics.index, cluster_metrics['Profit'], color=colors_cluster, alpha=0.8, edgecolor='black')
+    axes[0, 1].set_title('Total Profit by Customer Cluster', fontsize=12, fontweight='bold')
+    axes[0, 1].set_xlabel('Cluster')
+    axes[0, 1].set_ylabel('Profit ($)')
+    axes[0, 1].grid(True, alpha=0.3, axis='y')
+
+    # Category preference mix inside each cluster
+    cat_pref = pd.crosstab(clusters.customer_clusters['Cluster'],
+                           segmentation.customer_main_category['Preferred_Category'].to_numpy(), normalize='index')
+    cat_pref.mul(100).plot.bar(stacked=True, ax=axes[1, 0], color=['#FF6B6B', '#4ECDC4', '#45B7D1'],
+                               alpha=0.8, edgecolor='black', rot=0)
+    axes[1, 0].set_title('Category Preference Mix by Cluster', fontsize=12, fontweight='bold')
+    axes[1, 0].set_xlabel('Cluster')
+    axes[1, 0].set_ylabel('Customers (%)')
+    axes[1, 0].legend(title='Preferred Category')
+
+    # Regional customer distribution per cluster
+    region_cust = df.groupby(['Region', 'Cluster'])['Customer ID'].nunique().unstack('Cluster')
+    region_cust.plot.barh(ax=axes[1, 1], color=colors_cluster, alpha=0.8, edgecolor='black')
+    axes[1, 1].set_title('Unique Customers by Region and Cluster', fontsize=12, fontweight='bold')
+    axes[1, 1].set_xlabel('Number of Customers')
+    axes[1, 1].set_ylabel('Region')
+    axes[1, 1].grid(True, alpha=0.3, axis='x')
+
+    plt.tight_layout()
+    with stage('plot.save_clusters'):
+        plt.savefig(CLUSTERS_PNG, dpi=300, bbox_inches='tight')
+
+    return {'Cluster analysis': CLUSTERS_PNG}
+
+
+@profiled('export')
+def export_to_excel(df: pd.DataFrame, anomalies: AnomalyResult, path: str = EXCEL_PATH,
+                    clusters: Optional[ClusterResult] = None, baskets: Optional[BasketResult] = None) -> str:
+    """6. Write the raw data and all summary tables (plus the cluster / basket sheets, if any) to a multi-sheet workbook."""
+    upper_bound_sales, lower_bound_sales = anomalies.upper_bound_sales, anomalies.lower_bound_sales
+    upper_bound_profit = anomalies.upper_bound_profit
+    anomalies_sales, loss_orders = anomalies.anomalies_sales, anomalies.loss_orders
+
+    # Create Excel file with multiple sheets
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        
+        # Sheet 0: Raw Data (Original Dataset)
+        with stage('export.raw_data', rows=len(df)):
+            df.assign(**{'Year-Month': month_labels(df['Year-Month'])}).to_excel(writer, sheet_name='Raw Data', index=False)
     
-    # Sheet 0: Raw Data (Original Dataset)
-    df.to_excel(writer, sheet_name='Raw Data', index=False)
+        # Sheet 1: Overall Statistics
+        overall_summary = pd.DataFrame({
+            'Metric': ['Total Orders', 'Unique Customers', 'Total Sales', 'Total Profit', 
+                       'Average Sale', 'Average Profit', 'Median Sale', 'Date Range'],
+            'Value': [
+                df['Order ID'].nunique(),
+                df['Customer ID'].nunique(),
+                f"${df['Sales'].sum():,.2f}",
+                f"${df['Profit'].sum():,.2f}",
+                f"${df['Sales'].mean():,.2f}",
+                f"${df['Profit'].mean():,.2f}",
+                f"${df['Sales'].median():,.2f}",
+                f"{df['Order Date'].min().date()} to {df['Order Date'].max().date()}"
+            ]
+        })
+        overall_summary.to_excel(writer, sheet_name='Overall Statistics', index=False)
     
-    # Sheet 1: Overall Statistics
-    overall_summary = pd.DataFrame({
-        'Metric': ['Total Orders', 'Unique Customers', 'Total Sales', 'Total Profit', 
-                   'Average Sale', 'Average Profit', 'Median Sale', 'Date Range'],
-        'Value': [
-            df['Order ID'].nunique(),
-            df['Customer ID'].nunique(),
-            f"${df['Sales'].sum():,.2f}",
-            f"${df['Profit'].sum():,.2f}",
-            f"${df['Sales'].mean():,.2f}",
-            f"${df['Profit'].mean():,.2f}",
-            f"${df['Sales'].median():,.2f}",
-            f"{df['Order Date'].min().date()} to {df['Order Date'].max().date()}"
-        ]
-    })
-    overall_summary.to_excel(writer, sheet_name='Overall Statistics', index=False)
+        # Sheet 2: Seasonality Analysis
+        seasonality_data = df.groupby(['Year', 'Quarter', 'Month']).agg({
+            'Sales': ['sum', 'mean', 'count'],
+            'Profit': ['sum', 'mean']
+        }).round(2)
+        seasonality_data.to_excel(writer, sheet_name='Seasonality Analysis')
     
-    # Sheet 2: Seasonality Analysis
-    seasonality_data = df.groupby(['Year', 'Quarter', 'Month']).agg({
-        'Sales': ['sum', 'mean', 'count'],
-        'Profit': ['sum', 'mean']
-    }).round(2)
-    seasonality_data.to_excel(writer, sheet_name='Seasonality Analysis')
+        # Sheet 3: Anomalies
+        anomalies_summary = pd.DataFrame({
+            'Anomaly Type': ['High Sales Orders', 'Low Sales Orders', 'High Profit Orders', 
+                             'Loss-making Orders', 'High Discount Orders'],
+            'Count': [
+                len(df[df['Sales'] > upper_bound_sales]),
+                len(df[df['Sales'] < lower_bound_sales]),
+                len(df[df['Profit'] > upper_bound_profit]),
+                len(loss_orders),
+                len(df[df['Discount'] > 0.3])
+            ],
+            'Total Impact ($)': [
+                df[df['Sales'] > upper_bound_sales]['Sales'].sum(),
+                df[df['Sales'] < lower_bound_sales]['Sales'].sum(),
+                df[df['Profit'] > upper_bound_profit]['Profit'].sum(),
+                loss_orders['Profit'].sum(),
+                df[df['Discount'] > 0.3]['Sales'].sum()
+            ]
+        })
+        anomalies_summary.to_excel(writer, sheet_name='Anomalies Summary', index=False)
     
-    # Sheet 3: Anomalies
-    anomalies_summary = pd.DataFrame({
-        'Anomaly Type': ['High Sales Orders', 'Low Sales Orders', 'High Profit Orders', 
-                         'Loss-making Orders', 'High Discount Orders'],
-        'Count': [
-            len(df[df['Sales'] > upper_bound_sales]),
-            len(df[df['Sales'] < lower_bound_sales]),
-            len(df[df['Profit'] > upper_bound_profit]),
-            len(loss_orders),
-            len(df[df['Discount'] > 0.3])
-        ],
-        'Total Impact ($)': [
-            df[df['Sales'] > upper_bound_sales]['Sales'].sum(),
-            df[df['Sales'] < lower_bound_sales]['Sales'].sum(),
-            df[df['Profit'] > upper_bound_profit]['Profit'].sum(),
-            loss_orders['Profit'].sum(),
-            df[df['Discount'] > 0.3]['Sales'].sum()
-        ]
-    })
-    anomalies_summary.to_excel(writer, sheet_name='Anomalies Summary', index=False)
+        # Top anomalies detail
+        top_anomalies = anomalies_sales.nlargest(50, 'Sales')[['Order Date', 'Category', 'Sub-Category', 
+                                                                 'Sales', 'Profit', 'Customer Name', 'Region']]
+        top_anomalies.to_excel(writer, sheet_name='Top Sales Anomalies', index=False)
     
-    # Top anomalies detail
-    top_anomalies = anomalies_sales.nlargest(50, 'Sales')[['Order Date', 'Category', 'Sub-Category', 
-                                                             'Sales', 'Profit', 'Customer Name', 'Region']]
-    top_anomalies.to_excel(writer, sheet_name='Top Sales Anomalies', index=False)
+        # Sheet 4: Customer Segments
+        segment_stats = df.groupby('Sales_Quartile').agg({
+            'Customer ID': 'nunique',
+            'Order ID': 'count',
+            'Sales': ['sum', 'mean', 'median', 'min', 'max'],
+            'Profit': ['sum', 'mean', 'median']
+        }).round(2)
+        segment_stats.to_excel(writer, sheet_name='Customer Segments Stats')
     
-    # Sheet 4: Customer Segments
-    segment_stats = df.groupby('Sales_Quartile').agg({
-        'Customer ID': 'nunique',
-        'Order ID': 'count',
-        'Sales': ['sum', 'mean', 'median', 'min', 'max'],
-        'Profit': ['sum', 'mean', 'median']
-    }).round(2)
-    segment_stats.to_excel(writer, sheet_name='Customer Segments Stats')
+        # Sheet 5: Category Analysis
+        category_stats = df.groupby('Category').agg({
+            'Order ID': 'count',
+            'Sales': ['sum', 'mean', 'median', 'min', 'max', 'std'],
+            'Profit': ['sum', 'mean', 'median', 'min', 'max'],
+            'Quantity': 'sum'
+        }).round(2)
+        category_stats.to_excel(writer, sheet_name='Category Statistics')
     
-    # Sheet 5: Category Analysis
-    category_stats = df.groupby('Category').agg({
-        'Order ID': 'count',
-        'Sales': ['sum', 'mean', 'median', 'min', 'max', 'std'],
-        'Profit': ['sum', 'mean', 'median', 'min', 'max'],
-        'Quantity': 'sum'
-    }).round(2)
-    category_stats.to_excel(writer, sheet_name='Category Statistics')
+        # Sheet 6: Region Analysis
+        region_stats = df.groupby('Region').agg({
+            'Customer ID': 'nunique',
+            'Order ID': 'count',
+            'Sales': ['sum', 'mean', 'median', 'min', 'max'],
+            'Profit': ['sum', 'mean', 'median']
+        }).round(2)
+        region_stats.to_excel(writer, sheet_name='Region Statistics')
     
-    # Sheet 6: Region Analysis
-    region_stats = df.groupby('Region').agg({
-        'Customer ID': 'nunique',
-        'Order ID': 'count',
-        'Sales': ['sum', 'mean', 'median', 'min', 'max'],
-        'Profit': ['sum', 'mean', 'median']
-    }).round(2)
-    region_stats.to_excel(writer, sheet_name='Region Statistics')
+        # Sheet 7: Monthly Trends
+        monthly_trends = df.groupby('Year-Month').agg({
+            'Sales': ['sum', 'mean', 'count'],
+            'Profit': ['sum', 'mean'],
+            'Customer ID': 'nunique'
+        }).round(2)
+        monthly_trends.index = month_starts(monthly_trends.index).rename('Year-Month')
+        monthly_trends.to_excel(writer, sheet_name='Monthly Trends')
     
-    # Sheet 7: Monthly Trends
-    monthly_trends = df.groupby('Year-Month').agg({
-        'Sales': ['sum', 'mean', 'count'],
-        'Profit': ['sum', 'mean'],
-        'Customer ID': 'nunique'
-    }).round(2)
-    monthly_trends.to_excel(writer, sheet_name='Monthly Trends')
-    
-    # Sheet 8: Sub-Category Performance
-    subcat_stats = df.groupby('Sub-Category').agg({
-        'Sales': ['sum', 'mean', 'count'],
-        'Profit': ['sum', 'mean'],
-        'Profit Margin': 'mean'
-    }).round(2).sort_values(('Sales', 'sum'), ascending=False)
-    subcat_stats.to_excel(writer, sheet_name='Sub-Category Performance')
+        # Sheet 8: Sub-Category Performance
+        subcat_stats = df.groupby('Sub-Category').agg({
+            'Sales': ['sum', 'mean', 'count'],
+            'Profit': ['sum', 'mean'],
+            'Profit Margin': 'mean'
+        }).round(2).sort_values(('Sales', 'sum'), ascending=False)
+        subcat_stats.to_excel(writer, sheet_name='Sub-Category Performance')
+
+        # Sheets 9-10: k-means clusters (--clusters)
+        if clusters is not None:
+            cluster_stats = df.groupby('Cluster').agg({
+                'Customer ID': 'nunique',
+                'Order ID': 'count',
+                'Sales': ['sum', 'mean', 'median', 'min', 'max'],
+                'Profit': ['sum', 'mean', 'median']
+            }).round(2)
+            cluster_stats.to_excel(writer, sheet_name='Customer Clusters Stats')
+            clusters.profile.round(4).to_excel(writer, sheet_name='Cluster Profiles')
+
+        # Co-purchase rules (--basket)
+        if baskets is not None:
+            baskets.rules.round(4).to_excel(writer, sheet_name='Co-Purchase Rules', index=False)
+
+    return path
+
+
+# ============================================================================
+# REPORTERS
+# ============================================================================
+
+def _banner(title: str) -> None:
+    print("\n" + "="*80)
+    print(title)
+    print("="*80)
+
+
+class Reporter:
+    """Quiet reporter: every hook is a no-op."""
+
+    def loading(self) -> None:
+        pass
+
+    def overview(self, df: pd.DataFrame) -> None:
+        pass
+
+    def preprocessed(self) -> None:
+        pass
+
+    def seasonality(self, result: SeasonalityResult) -> None:
+        pass
+
+    def anomalies(self, result: AnomalyResult) -> None:
+        pass
+
+    def segmentation(self, result: SegmentationResult) -> None:
+        pass
+
+    def clusters(self, result: ClusterResult) -> None:
+        pass
+
+    def baskets(self, result: BasketResult) -> None:
+        pass
+
+    def statistics(self, result: DescriptiveResult) -> None:
+        pass
+
+    def figures(self, figures: Dict[str, str]) -> None:
+        pass
+
+    def exported(self, path: str) -> None:
+        pass
+
+    def finished(self, result: AnalysisResult) -> None:
+        pass
+
+
+class TextReporter(Reporter):
+    """Console tables and the key findings summary."""
+
+    def loading(self) -> None:
+        print("Loading Superstore dataset...")
+
+    def overview(self, df: pd.DataFrame) -> None:
+        print(f"\nDataset shape: {df.shape}")
+        print(f"\nColumn names:\n{df.columns.tolist()}")
+        print(f"\nFirst few rows:\n{df.head()}")
+        print(f"\nData types:\n{df.dtypes}")
+        print(f"\nMissing values:\n{df.isnull().sum()}")
+
+    def preprocessed(self) -> None:
+        _banner("DATA PREPROCESSING COMPLETED")
+
+    def seasonality(self, result: SeasonalityResult) -> None:
+        _banner("1. SEASONALITY ANALYSIS")
+        print("\nMonthly Sales Statistics:")
+        print(result.monthly_sales.describe())
+
+        print("\nQuarterly Sales by Year:")
+        print(result.quarterly_sales.pivot_table(values='Sales', index='Quarter', columns='Year', aggfunc='sum'))
+
+        print("\nAverage Sales by Month (Seasonality Pattern):")
+        print(result.monthly_pattern)
+
+    def anomalies(self, result: AnomalyResult) -> None:
+        _banner("2. ANOMALY DETECTION")
+        n_rows, sales, profit, losses = result.n_rows, result.anomalies_sales, result.anomalies_profit, result.loss_orders
+
+        print(f"\nSales Anomalies detected: {len(sales)} out of {n_rows} orders ({len(sales)/n_rows*100:.2f}%)")
+        print(f"Normal range: ${result.lower_bound_sales:.2f} - ${result.upper_bound_sales:.2f}")
+        print(f"\nTop 10 Sales Anomalies:")
+        print(sales.nlargest(10, 'Sales')[['Order Date', 'Category', 'Sub-Category', 'Sales', 'Profit', 'Customer Name']])
+
+        print(f"\n\nProfit Anomalies detected: {len(profit)} out of {n_rows} orders ({len(profit)/n_rows*100:.2f}%)")
+        print(f"Normal range: ${result.lower_bound_profit:.2f} - ${result.upper_bound_profit:.2f}")
+
+        print(f"\n\nLoss-making orders: {len(losses)} ({len(losses)/n_rows*100:.2f}%)")
+        print(f"Total loss amount: ${losses['Profit'].sum():.2f}")
+        print("\nTop 10 Loss-making orders:")
+        print(losses.nsmallest(10, 'Profit')[['Order Date', 'Category', 'Sub-Category', 'Sales', 'Profit', 'Discount']])
+
+    def segmentation(self, result: SegmentationResult) -> None:
+        _banner("3. CUSTOMER SEGMENTATION")
+        print("\nCustomer Segments by Sales Value:")
+        print(result.customer_metrics.groupby('Sales_Quartile').agg({
+            'Customer ID': 'count',
+            'Total_Sales': ['sum', 'mean', 'median'],
+            'Total_Profit': ['sum', 'mean'],
+            'Order_Count': 'mean'
+        }).round(2))
+
+        print("\n\nCustomer Segments by Category Preference:")
+        print(result.customer_main_category['Preferred_Category'].value_counts())
+
+        print("\n\nCustomer Distribution by Region:")
+        print(result.customers_by_region)
+
+    def clusters(self, result: ClusterResult) -> None:
+        _banner("3b. CUSTOMER CLUSTERS (MINI-BATCH K-MEANS)")
+        source = "fitted" if result.fitted else "cached centroids"
+        print(f"\n{result.model.n_clusters} clusters ({source}), mean squared distance to centroid: {result.model.inertia:.3f}")
+        print("\nCluster centroids (original units):")
+        print(result.profile.round(2).to_string())
+        for row in result.by_cluster.itertuples():
+            self._group_block(row.Index, row)
+
+    def baskets(self, result: BasketResult) -> None:
+        _banner("3c. CO-PURCHASES (MARKET BASKET)")
+        share = result.multi_item_baskets / result.n_baskets * 100
+        print(f"\nOrders with 2+ sub-categories: {result.multi_item_baskets} of {result.n_baskets} ({share:.1f}%)")
+        print("\nTop rules by lift per sub-category:")
+        print(result.rules.round(3).to_string(index=False))
+
+    @staticmethod
+    def _group_block(title: str, row) -> None:
+        print(f"\n{title}:")
+        print(f"  Number of orders: {row.orders}")
+        print(f"  Total Sales: ${row.total_sales:,.2f}")
+        print(f"  Average Sale: ${row.average_sale:,.2f}")
+        print(f"  Median Sale: ${row.median_sale:,.2f}")
+        print(f"  Total Profit: ${row.total_profit:,.2f}")
+        print(f"  Average Profit: ${row.average_profit:,.2f}")
+        print(f"  Min Sale: ${row.min_sale:,.2f}")
+        print(f"  Max Sale: ${row.max_sale:,.2f}")
+
+    def statistics(self, result: DescriptiveResult) -> None:
+        _banner("4. DESCRIPTIVE STATISTICS")
+        print("\n--- OVERALL DATASET STATISTICS ---")
+        print(f"\nTotal Orders: {result.total_orders}")
+        print(f"Total Customers: {result.total_customers}")
+        print(f"Date Range: {result.first_order.date()} to {result.last_order.date()}")
+
+        print("\nOverall Metrics Statistics:")
+        print(result.overall_stats.round(2))
+
+        print("\n\n--- STATISTICS BY CUSTOMER SEGMENT (Sales Value) ---")
+        for row in result.by_segment.itertuples():
+            self._group_block(f"{row.Index} Value Customers", row)
+
+        print("\n\n--- STATISTICS BY PRODUCT CATEGORY ---")
+        for row in result.by_category.itertuples():
+            self._group_block(row.Index, row)
+
+        print("\n\n--- STATISTICS BY REGION ---")
+        for row in result.by_region.itertuples():
+            self._group_block(row.Index, row)
+
+    def figures(self, figures: Dict[str, str]) -> None:
+        _banner("5. CREATING VISUALIZATIONS")
+        print()
+        for description, path in figures.items():
+            print(f"✓ {description} saved as '{path}'")
+
+    def exported(self, path: str) -> None:
+        _banner("6. EXPORTING RESULTS TO EXCEL")
+        print(f"✓ Results exported to '{path}'")
+
+    def finished(self, result: AnalysisResult) -> None:
+        anomalies = result.anomalies
+        n_rows, sales, losses = anomalies.n_rows, anomalies.anomalies_sales, anomalies.loss_orders
+
+        _banner("ANALYSIS COMPLETED SUCCESSFULLY!")
+        print("\nFiles generated:")
+        n_sheets = 10 + 2 * (result.clusters is not None) + (result.baskets is not None)
+        print(f"1. {result.excel_path} - Complete analysis with {n_sheets} sheets (including Raw Data)")
+        print(f"2. {result.figures['Main dashboard']} - Main dashboard (12 charts)")
+        print(f"3. {result.figures['Anomaly analysis']} - Anomaly analysis (4 charts)")
+        print(f"4. {result.figures['Segmentation analysis']} - Customer segmentation (4 charts)")
+        if result.clusters is not None:
+            print(f"5. {result.figures['Cluster analysis']} - Customer clusters (4 charts)")
+
+        _banner("KEY FINDINGS SUMMARY")
+        print(f"\n1. SEASONALITY:")
+        print(f"   - Clear seasonal pattern with peak sales in Q4 (November-December)")
+        print(f"   - Lowest sales typically in January-February")
+        print(f"   - Year-over-year growth trend observed")
+
+        print(f"\n2. ANOMALIES:")
+        print(f"   - {len(sales)} sales anomalies detected ({len(sales)/n_rows*100:.1f}%)")
+        print(f"   - {len(losses)} loss-making orders ({len(losses)/n_rows*100:.1f}%)")
+        print(f"   - Total losses: ${losses['Profit'].sum():,.2f}")
+
+        print(f"\n3. CUSTOMER SEGMENTS:")
+        print(f"   - Defined 4 segments: Low, Medium, High, VIP (by sales value)")
+        print(f"   - VIP customers drive significant revenue despite smaller count")
+        print(f"   - Clear category preferences identified per customer")
+
+        print(f"\n4. VISUALIZATIONS:")
+        print(f"   - Created 20+ charts across 3 comprehensive dashboards")
+        print(f"   - Used multiple types: Line, Bar, Pie, Box, Scatter plots")
+
+        print(f"\n5. DESCRIPTIVE STATISTICS:")
+        print(f"   - Calculated for overall dataset and all segments")
+        print(f"   - Included: sum, mean, median, min, max, std")
+        print(f"   - Available in Excel file with 8 detailed sheets")
+
+        _banner("All assignment requirements completed! ✓")
+
+
+def _records(frame) -> list:
+    frame = frame.reset_index() if frame.index.name is not None else frame
+    return json.loads(frame.to_json(orient='records', date_format='iso'))
+
+
+class JsonReporter(Reporter):
+    """One JSON line per stage with the aggregates only (no order-level rows)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def emit(self, stage: str, result) -> None:
+        self.stream.write(json.dumps({'stage': stage, 'result': result}, ensure_ascii=False) + "\n")
+
+    def seasonality(self, result: SeasonalityResult) -> None:
+        self.emit('seasonality', {
+            'monthly_sales': _records(result.monthly_sales),
+            'quarterly_sales': _records(result.quarterly_sales),
+            'monthly_pattern': _records(result.monthly_pattern),
+        })
+
+    def anomalies(self, result: AnomalyResult) -> None:
+        self.emit('anomalies', {
+            'rows': result.n_rows,
+            'sales_range': [float(result.lower_bound_sales), float(result.upper_bound_sales)],
+            'profit_range': [float(result.lower_bound_profit), float(result.upper_bound_profit)],
+            'sales_anomalies': len(result.anomalies_sales),
+            'profit_anomalies': len(result.anomalies_profit),
+            'loss_orders': len(result.loss_orders),
+            'total_loss': float(result.loss_orders['Profit'].sum()),
+        })
+
+    def segmentation(self, result: SegmentationResult) -> None:
+        self.emit('segmentation', {
+            'customers_by_segment': result.customer_metrics['Sales_Quartile'].value_counts(sort=False).to_dict(),
+            'customers_by_category': result.customer_main_category['Preferred_Category'].value_counts().to_dict(),
+            'customers_by_region': result.customers_by_region.to_dict(),
+        })
+
+    def clusters(self, result: ClusterResult) -> None:
+        self.emit('clusters', {
+            'fitted': result.fitted,
+            'inertia': result.model.inertia,
+            'profile': _records(result.profile),
+            'by_cluster': _records(result.by_cluster),
+        })
+
+    def baskets(self, result: BasketResult) -> None:
+        self.emit('baskets', {
+            'orders': result.n_baskets,
+            'multi_item_orders': result.multi_item_baskets,
+            'rules': _records(result.rules),
+        })
+
+    def statistics(self, result: DescriptiveResult) -> None:
+        self.emit('statistics', {
+            'total_orders': result.total_orders,
+            'total_customers': result.total_customers,
+            'date_range': [str(result.first_order.date()), str(result.last_order.date())],
+            'overall': json.loads(result.overall_stats.to_json()),
+            'by_segment': _records(result.by_segment),
+            'by_category': _records(result.by_category),
+            'by_region': _records(result.by_region),
+        })
+
+    def figures(self, figures: Dict[str, str]) -> None:
+        self.emit('figures', figures)
+
+    def exported(self, path: str) -> None:
+        self.emit('excel', path)
+
+
+REPORTERS = {'text': TextReporter, 'quiet': Reporter, 'json': JsonReporter}
 
-print("✓ Results exported to 'Fefelov_PA_assignment_3.xlsx'")
 
 # ============================================================================
-# FINAL SUMMARY
+# PIPELINE
 # ============================================================================
-print("\n" + "="*80)
-print("ANALYSIS COMPLETED SUCCESSFULLY!")
-print("="*80)
-print("\nFiles generated:")
-print("1. Fefelov_PA_assignment_3.xlsx - Complete analysis with 10 sheets (including Raw Data)")
-print("2. Fefelov_PA_assignment_3_visualizations.png - Main dashboard (12 charts)")
-print("3. Fefelov_PA_assignment_3_anomalies.png - Anomaly analysis (4 charts)")
-print("4. Fefelov_PA_assignment_3_segmentation.png - Customer segmentation (4 charts)")
-
-print("\n" + "="*80)
-print("KEY FINDINGS SUMMARY")
-print("="*80)
-print(f"\n1. SEASONALITY:")
-print(f"   - Clear seasonal pattern with peak sales in Q4 (November-December)")
-print(f"   - Lowest sales typically in January-February")
-print(f"   - Year-over-year growth trend observed")
-
-print(f"\n2. ANOMALIES:")
-print(f"   - {len(anomalies_sales)} sales anomalies detected ({len(anomalies_sales)/len(df)*100:.1f}%)")
-print(f"   - {len(loss_orders)} loss-making orders ({len(loss_orders)/len(df)*100:.1f}%)")
-print(f"   - Total losses: ${loss_orders['Profit'].sum():,.2f}")
-
-print(f"\n3. CUSTOMER SEGMENTS:")
-print(f"   - Defined 4 segments: Low, Medium, High, VIP (by sales value)")
-print(f"   - VIP customers drive significant revenue despite smaller count")
-print(f"   - Clear category preferences identified per customer")
-
-print(f"\n4. VISUALIZATIONS:")
-print(f"   - Created 20+ charts across 3 comprehensive dashboards")
-print(f"   - Used multiple types: Line, Bar, Pie, Box, Scatter plots")
-
-print(f"\n5. DESCRIPTIVE STATISTICS:")
-print(f"   - Calculated for overall dataset and all segments")
-print(f"   - Included: sum, mean, median, min, max, std")
-print(f"   - Available in Excel file with 8 detailed sheets")
-
-print("\n" + "="*80)
-print("All assignment requirements completed! ✓")
-print("="*80)
+
+@profiled('run_analysis')
+def run_analysis(data_path: str = DATA_PATH, reporter: Optional[Reporter] = None,
+                 n_clusters: int = 0, cluster_model: Optional[str] = None, basket_top_k: int = 0) -> AnalysisResult:
+    """
+    Run every stage, hand each result to the reporter and save the charts and workbook.
+
+    The k-means stage runs when `n_clusters` is positive or a `cluster_model` is given,
+    the co-purchase stage when `basket_top_k` is positive.
+    """
+    reporter = reporter or TextReporter()
+
+    reporter.loading()
+    df = load_data(data_path)
+    reporter.overview(df)
+
+    df = preprocess(optimize_dtypes(df))
+    reporter.preprocessed()
+
+    seasonality = analyze_seasonality(df)
+    reporter.seasonality(seasonality)
+
+    anomalies = detect_anomalies(df)
+    reporter.anomalies(anomalies)
+
+    df, segmentation = segment_customers(df)
+    reporter.segmentation(segmentation)
+
+    clusters = None
+    if n_clusters > 0 or cluster_model:
+        df, clusters = cluster_customers(df, segmentation, n_clusters or 5, cluster_model)
+        reporter.clusters(clusters)
+
+    baskets = None
+    if basket_top_k > 0:
+        baskets = analyze_baskets(df, basket_top_k)
+        reporter.baskets(baskets)
+
+    statistics = describe_segments(df)
+    reporter.statistics(statistics)
+
+    figures = create_visualizations(df, anomalies, segmentation)
+    if clusters is not None:
+        figures.update(plot_clusters(df, segmentation, clusters))
+    reporter.figures(figures)
+
+    excel_path = export_to_excel(df, anomalies, clusters=clusters, baskets=baskets)
+    reporter.exported(excel_path)
+
+    result = AnalysisResult(df, seasonality, anomalies, segmentation, statistics, figures, excel_path, clusters, baskets)
+    reporter.finished(result)
+    return result
+
+
+def main(argv=None) -> AnalysisResult:
+    parser = argparse.ArgumentParser(description="Superstore exploratory data analysis")
+    parser.add_argument("--input", default=DATA_PATH, help="Superstore workbook")
+    parser.add_argument("--report", choices=list(REPORTERS), default="text",
+                        help="Console output: text tables, quiet, or one JSON line per stage")
+    parser.add_argument("--profile", default=None, help="Write per-stage timings, rows and memory to this JSON file")
+    parser.add_argument("--chrome-trace", default=None, help="Also write the stages as a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--trace-memory", action="store_true", help="Record the tracemalloc peak per stage (slower)")
+    parser.add_argument("--clusters", type=int, default=0,
+                        help="Also segment customers into this many mini-batch k-means clusters (0: off)")
+    parser.add_argument("--cluster-model", default=None,
+                        help="Centroid cache (.npz): reused if it exists, written after fitting otherwise")
+    parser.add_argument("--basket", type=int, default=0,
+                        help="Also list this many co-purchased sub-categories per sub-category (0: off)")
+    args = parser.parse_args(argv)
+    if args.clusters < 0 or args.basket < 0:
+        parser.error("--clusters and --basket must be >= 0")
+
+    reporter = REPORTERS[args.report]()
+    if not (args.profile or args.chrome_trace):
+        return run_analysis(args.input, reporter, args.clusters, args.cluster_model, args.basket)
+
+    with Profiler('PA_assignment_3', trace_memory=args.trace_memory) as profiler:
+        result = run_analysis(args.input, reporter, args.clusters, args.cluster_model, args.basket)
+    if args.profile:
+        profiler.write_json(args.profile)
+    if args.chrome_trace:
+        profiler.write_chrome_trace(args.chrome_trace)
+    return result
+
+
+if __name__ == "__main__":
+    main()
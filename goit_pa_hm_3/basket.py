@@ -0,0 +1,135 @@
+"""
+Market-basket (co-purchase) index from order lines.
+
+`build_basket_matrix` turns order lines into a sparse binary order x item CSR
+matrix X (an item bought several times in one order counts once).
+`co_occurrence` then gets every item pair's number of shared orders from one
+sparse product X.T @ X, instead of enumerating the pairs inside each order:
+
+- support(a, b)      = orders with a and b / orders
+- confidence(a -> b) = orders with a and b / orders with a
+- lift(a -> b)       = confidence(a -> b) / support(b)
+
+Pruning happens before and after the product. Items bought in fewer than
+`min_count` orders cannot form a pair that frequent, and orders with a
+single remaining item add no pairs, so both are dropped from X first. Of
+the pairs, only the `top_k` consequents per antecedent are kept, ranked with
+one lexsort over the non-zeros of the product.
+
+The rules table (antecedent -> consequent) is the cross-sell candidate list.
+Showing these recommendations and counting clicks on them gives the
+recommendation_view / recommendation_click events behind the "CTR on
+recommendations" metric of the goit_pa_hm_2 catalogue.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+RULE_METRICS = ('lift', 'confidence', 'count')
+
+
+@dataclass(slots=True)
+class BasketMatrix:
+    """Binary order x item matrix; row i is `baskets[i]`, column j is `items[j]`."""
+
+    baskets: pd.Index
+    items: pd.Index
+    matrix: sparse.csr_matrix
+
+    @property
+    def n_baskets(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def item_counts(self) -> np.ndarray:
+        """Number of orders containing each item."""
+        return np.bincount(self.matrix.indices, minlength=len(self.items))
+
+    @property
+    def basket_sizes(self) -> np.ndarray:
+        """Number of distinct items in each order."""
+        return np.diff(self.matrix.indptr)
+
+
+def build_basket_matrix(df: pd.DataFrame, basket: str = 'Order ID', item: str = 'Sub-Category') -> BasketMatrix:
+    """Sparse binary order x item matrix of the order lines in `df`."""
+    basket_codes, baskets = pd.factorize(df[basket])
+    item_codes, items = pd.factorize(df[item], sort=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(df), dtype=np.int32), (basket_codes, item_codes)),
+        shape=(len(baskets), len(items)),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return BasketMatrix(pd.Index(baskets, name=basket), pd.Index(items, name=item), matrix)
+
+
+def co_occurrence(baskets: BasketMatrix, min_count: int = 1) -> sparse.csr_matrix:
+    """
+    Item x item matrix of shared orders for pairs seen in at least `min_count` orders.
+
+    The diagonal (an item with itself) is removed. Columns of rare items and rows
+    of orders left with fewer than two items are dropped before the product.
+    """
+    matrix = baskets.matrix
+    if min_count > 1:
+        matrix = matrix.copy()
+        matrix.data[baskets.item_counts[matrix.indices] < min_count] = 0
+        matrix.eliminate_zeros()
+    matrix = matrix[np.diff(matrix.indptr) >= 2]
+    pairs = (matrix.T @ matrix).tocsr()
+    rows = np.repeat(np.arange(pairs.shape[0]), np.diff(pairs.indptr))
+    pairs.data[(rows == pairs.indices) | (pairs.data < min_count)] = 0
+    pairs.eliminate_zeros()
+    return pairs
+
+
+def association_rules(baskets: BasketMatrix, min_count: int = 2, top_k: int = 5,
+                      by: str = 'lift') -> pd.DataFrame:
+    """
+    The `top_k` rules antecedent -> consequent per antecedent, ranked by `by`.
+
+    Ties are broken by shared orders and then by item order. Columns: antecedent,
+    consequent, count, support, confidence, lift, rank (1 = best for that antecedent).
+    """
+    if by not in RULE_METRICS:
+        raise ValueError(f"by must be one of {RULE_METRICS}, got {by!r}")
+    pairs = co_occurrence(baskets, min_count).tocoo()
+    antecedent, consequent, count = pairs.row, pairs.col, pairs.data.astype(np.int64)
+    item_counts = baskets.item_counts
+    n = baskets.n_baskets
+
+    confidence = count / item_counts[antecedent]
+    lift = confidence * n / item_counts[consequent]
+    score = {'lift': lift, 'confidence': confidence, 'count': count}[by]
+
+    # One sort over all pairs: by antecedent, best score first, then most orders, then item order
+    order = np.lexsort((consequent, -count, -score, antecedent))
+    antecedent, consequent, count = antecedent[order], consequent[order], count[order]
+    confidence, lift = confidence[order], lift[order]
+    first = np.r_[0, np.flatnonzero(np.diff(antecedent)) + 1]
+    rank = np.arange(len(antecedent)) - np.repeat(first, np.diff(np.r_[first, len(antecedent)])) + 1
+    keep = rank <= top_k
+
+    items = baskets.items
+    return pd.DataFrame({
+        'antecedent': items.take(antecedent[keep]),
+        'consequent': items.take(consequent[keep]),
+        'count': count[keep],
+        'support': count[keep] / n,
+        'confidence': confidence[keep],
+        'lift': lift[keep],
+        'rank': rank[keep],
+    })
+
+
+def recommend(rules: pd.DataFrame, basket_items: Iterable, k: int = 5, by: str = 'lift') -> pd.DataFrame:
+    """Top `k` consequents for a basket: best rule from any of its items, items already in it excluded."""
+    basket_items = set(basket_items)
+    candidates = rules[rules['antecedent'].isin(basket_items) & ~rules['consequent'].isin(basket_items)]
+    best = candidates.sort_values([by, 'count'], ascending=False).drop_duplicates('consequent')
+    return best.head(k).reset_index(drop=True)
@@ -0,0 +1,198 @@
+"""
+Mini-batch k-means segmentation of the per-customer feature table.
+
+The features come from `rfm.CustomerFeatures`: recency in days, frequency
+(distinct orders, log scale), monetary (total sales, log scale), profit margin
+and the share of every category in the customer's sales. They are
+standardized with a mean / standard deviation accumulated chunk by chunk, so
+no standardized copy of the whole table is kept in memory.
+
+`fit_minibatch_kmeans` follows Sculley's mini-batch k-means: k-means++ seeds
+on a sample, then every step draws a random batch, assigns it to the nearest
+centroid and moves each centroid towards the batch mean with a per-centroid
+learning rate of 1 / (points seen). The cost of fitting depends on the number
+of steps and the batch size, not on the number of customers; only the final
+assignment touches every row, again in chunks.
+
+The fitted `ClusterModel` (scaler, centroids, feature names) is saved as an
+.npz file; loading it assigns new customers to the cached centroids without
+refitting. Clusters are numbered by ascending mean monetary value.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from rfm import CustomerFeatures
+
+CHUNK_SIZE = 1_000_000
+BATCH_SIZE = 4096
+BASE_FEATURES = ['Recency_Days', 'Log_Orders', 'Log_Monetary', 'Margin']
+
+
+def customer_feature_matrix(features: CustomerFeatures) -> Tuple[np.ndarray, List[str]]:
+    """(customers, features) float32 matrix and its column names; raw units, not standardized."""
+    monetary = features.monetary
+    with np.errstate(invalid='ignore', divide='ignore'):
+        margin = np.where(monetary > 0, features.profit / monetary, 0.0)
+    columns = [
+        features.recency_days,
+        np.log1p(features.orders),
+        np.log1p(np.clip(monetary, 0, None)),
+        margin,
+    ]
+    names = list(BASE_FEATURES)
+    shares = features.category_shares
+    for column, category in enumerate(features.categories):
+        columns.append(shares[:, column])
+        names.append(f'{category} Share')
+    return np.column_stack(columns).astype(np.float32), names
+
+
+def _chunks(n: int, chunk_size: int):
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def _nearest(points: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of and squared distance to the nearest centroid for every point."""
+    distances = (
+        np.einsum('ij,ij->i', points, points)[:, None]
+        - 2 * points @ centroids.T
+        + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    )
+    labels = distances.argmin(axis=1)
+    return labels, np.maximum(distances[np.arange(len(points)), labels], 0)
+
+
+@dataclass(slots=True)
+class ClusterModel:
+    """Standardization and centroids (in standardized units) of a fitted segmentation."""
+
+    feature_names: List[str]
+    mean: np.ndarray
+    scale: np.ndarray
+    centroids: np.ndarray
+    inertia: float = float('nan')  # mean squared distance to the centroid over all customers at fit time
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def standardize(self, matrix: np.ndarray) -> np.ndarray:
+        return ((matrix - self.mean) / self.scale).astype(np.float32)
+
+    def assign(self, matrix: np.ndarray, chunk_size: int = CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+        """Cluster (0..k-1) and squared distance of every row of a raw feature matrix, chunk by chunk."""
+        labels = np.empty(len(matrix), dtype=np.int32)
+        distances = np.empty(len(matrix), dtype=np.float32)
+        for rows in _chunks(len(matrix), chunk_size):
+            labels[rows], distances[rows] = _nearest(self.standardize(matrix[rows]), self.centroids)
+        return labels, distances
+
+    def align(self, matrix: np.ndarray, names: List[str]) -> np.ndarray:
+        """Reorder columns to the model's features; categories a customer batch lacks get a zero share."""
+        unknown = sorted(set(names) - set(self.feature_names))
+        if unknown:
+            raise ValueError(f"Features not known to the cluster model: {unknown}")
+        position = {name: i for i, name in enumerate(names)}
+        aligned = np.zeros((len(matrix), len(self.feature_names)), dtype=np.float32)
+        for column, name in enumerate(self.feature_names):
+            if name in position:
+                aligned[:, column] = matrix[:, position[name]]
+        return aligned
+
+    def assign_customers(self, features: CustomerFeatures, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+        """Cluster of every customer in `features` (e.g. new customers against cached centroids)."""
+        matrix, names = customer_feature_matrix(features)
+        return self.assign(self.align(matrix, names), chunk_size)[0]
+
+    def profile(self) -> pd.DataFrame:
+        """Centroids in the original feature units, one row per cluster."""
+        return pd.DataFrame(self.centroids * self.scale + self.mean, columns=self.feature_names)
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        with open(path, 'wb') as file:  # a file object keeps np.savez from appending '.npz'
+            np.savez(file, feature_names=np.array(self.feature_names), mean=self.mean, scale=self.scale,
+                     centroids=self.centroids, inertia=self.inertia)
+        return path
+
+    @classmethod
+    def load(cls, path) -> 'ClusterModel':
+        with np.load(path) as saved:
+            return cls(
+                feature_names=[str(name) for name in saved['feature_names']],
+                mean=saved['mean'],
+                scale=saved['scale'],
+                centroids=saved['centroids'],
+                inertia=float(saved['inertia']),
+            )
+
+
+def fit_standardizer(matrix: np.ndarray, chunk_size: int = CHUNK_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """Column mean and standard deviation from per-chunk sums; constant columns get scale 1."""
+    total = np.zeros(matrix.shape[1])
+    squares = np.zeros(matrix.shape[1])
+    for rows in _chunks(len(matrix), chunk_size):
+        chunk = matrix[rows].astype(float)
+        total += chunk.sum(axis=0)
+        squares += np.einsum('ij,ij->j', chunk, chunk)
+    mean = total / len(matrix)
+    std = np.sqrt(np.maximum(squares / len(matrix) - mean ** 2, 0))
+    return mean, np.where(std > 0, std, 1.0)
+
+
+def _kmeans_plus_plus(points: np.ndarray, n_clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = [points[rng.integers(len(points))]]
+    closest = ((points - centroids[0]) ** 2).sum(axis=1)
+    for _ in range(1, n_clusters):
+        total = closest.sum()
+        index = rng.choice(len(points), p=closest / total) if total > 0 else rng.integers(len(points))
+        centroids.append(points[index])
+        closest = np.minimum(closest, ((points - points[index]) ** 2).sum(axis=1))
+    return np.array(centroids, dtype=np.float32)
+
+
+def fit_minibatch_kmeans(matrix: np.ndarray, feature_names: List[str], n_clusters: int,
+                         batch_size: int = BATCH_SIZE, max_steps: int = 300, tol: float = 1e-4,
+                         chunk_size: int = CHUNK_SIZE, seed: int = 42,
+                         monetary: Optional[str] = 'Log_Monetary') -> Tuple[ClusterModel, np.ndarray]:
+    """
+    Mini-batch k-means on a raw (customers, features) matrix; returns the model and the cluster of every row.
+
+    Stops after `max_steps` batches or once the centroids move less than `tol`
+    (squared, standardized units) over a step. Clusters are renumbered by the
+    `monetary` feature of their centroid, lowest first.
+    """
+    if not 1 <= n_clusters <= len(matrix):
+        raise ValueError(f"n_clusters must be between 1 and the number of customers ({len(matrix)}), got {n_clusters}")
+    rng = np.random.default_rng(seed)
+    mean, scale = fit_standardizer(matrix, chunk_size)
+    model = ClusterModel(list(feature_names), mean, scale, np.empty((0, matrix.shape[1]), dtype=np.float32))
+
+    sample = rng.choice(len(matrix), size=min(len(matrix), max(10 * n_clusters, batch_size)), replace=False)
+    centroids = _kmeans_plus_plus(model.standardize(matrix[np.sort(sample)]), n_clusters, rng)
+    seen = np.zeros(n_clusters)
+    for _ in range(max_steps):
+        batch = model.standardize(matrix[np.sort(rng.integers(0, len(matrix), batch_size))])
+        labels, _ = _nearest(batch, centroids)
+        counts = np.bincount(labels, minlength=n_clusters)
+        sums = np.zeros_like(centroids, dtype=float)
+        np.add.at(sums, labels, batch)
+        seen += counts
+        hit = counts > 0
+        previous = centroids.copy()
+        centroids[hit] += ((sums[hit] - counts[hit, None] * centroids[hit]) / seen[hit, None]).astype(np.float32)
+        if ((centroids - previous) ** 2).sum() < tol:
+            break
+
+    if monetary in model.feature_names:
+        centroids = centroids[np.argsort(centroids[:, model.feature_names.index(monetary)], kind='stable')]
+    model.centroids = centroids
+    labels, distances = model.assign(matrix, chunk_size)
+    model.inertia = float(distances.mean())
+    return model, labels
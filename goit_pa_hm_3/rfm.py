@@ -0,0 +1,178 @@
+"""
+Customer-level RFM and category-mix features from order lines.
+
+`build_customer_features` computes, for every customer at once:
+
+- recency (days since the last order), first / last order date
+- frequency as order lines and as distinct orders
+- monetary (total sales) and total profit
+- sales per category, category shares and the preferred category
+
+from integer customer codes, without sorting the lines: sums and counts are
+`np.bincount`s, first / last dates `np.minimum.at` / `np.maximum.at`, and
+distinct orders come from one hash factorize of the (customer, order) pairs.
+This replaces one pandas groupby per metric and the
+`groupby([customer, category]).sum()` + `.loc[idxmax()]` lookup for the
+preferred category. The result is a slotted table of aligned arrays (one row
+per customer, customers in sorted order, like a groupby).
+
+`quantile_scores` bins several features into quantiles in one call, with the
+same edges and right-closed bins as `pd.qcut`.
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(slots=True)
+class CustomerFeatures:
+    """Per-customer feature arrays; row i of every array belongs to `customers[i]`."""
+
+    customers: pd.Index
+    categories: pd.Index
+    order_lines: np.ndarray
+    orders: np.ndarray
+    monetary: np.ndarray
+    profit: np.ndarray
+    first_order: np.ndarray
+    last_order: np.ndarray
+    recency_days: np.ndarray
+    category_sales: np.ndarray  # (customers, categories)
+    preferred: np.ndarray  # column of category_sales with the most sales
+    line_customer: np.ndarray  # row of every input line, to broadcast per-customer values back
+
+    def to_lines(self, values):
+        """Per-customer values (array or Categorical) repeated onto the input order lines."""
+        return values.take(self.line_customer)
+
+    def __len__(self) -> int:
+        return len(self.customers)
+
+    @property
+    def category_shares(self) -> np.ndarray:
+        """Share of each category in the customer's sales (rows sum to 1)."""
+        totals = self.category_sales.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(totals != 0, self.category_sales / totals, 0.0)
+
+    @property
+    def preferred_category(self) -> pd.Categorical:
+        return pd.Categorical.from_codes(self.preferred, categories=self.categories)
+
+    @property
+    def preferred_sales(self) -> np.ndarray:
+        return self.category_sales[np.arange(len(self)), self.preferred]
+
+    def rfm_scores(self, q: int = 5) -> np.ndarray:
+        """
+        R, F and M quantile scores 1..q as an int8 (customers, 3) array.
+
+        Recency is scored on the negated days so the most recent customers get q;
+        frequency uses distinct orders.
+        """
+        values = np.column_stack([-self.recency_days, self.orders, self.monetary]).astype(float)
+        return (quantile_scores(values, q) + 1).astype(np.int8)
+
+    def to_frame(self, shares: bool = False) -> pd.DataFrame:
+        """One row per customer; with `shares`, one '<category> Share' column per category."""
+        frame = pd.DataFrame({
+            'Customer ID': self.customers,
+            'Order_Lines': self.order_lines,
+            'Orders': self.orders,
+            'Monetary': self.monetary,
+            'Profit': self.profit,
+            'First_Order_Date': self.first_order,
+            'Last_Order_Date': self.last_order,
+            'Recency_Days': self.recency_days,
+            'Preferred_Category': self.preferred_category,
+        })
+        if shares:
+            category_shares = self.category_shares
+            for column, category in enumerate(self.categories):
+                frame[f'{category} Share'] = category_shares[:, column]
+        return frame
+
+
+def build_customer_features(
+    df: pd.DataFrame,
+    customer: str = 'Customer ID',
+    order: str = 'Order ID',
+    date: str = 'Order Date',
+    sales: str = 'Sales',
+    profit: str = 'Profit',
+    category: str = 'Category',
+    as_of: Optional[pd.Timestamp] = None,
+) -> CustomerFeatures:
+    """
+    Features of every customer from the order lines in `df`.
+
+    as_of : reference date for recency; the latest order date by default.
+    """
+    customer_codes, customers = pd.factorize(df[customer], sort=True)
+    order_codes, orders = pd.factorize(df[order])
+    category_codes, categories = pd.factorize(df[category], sort=True)
+    n_customers, n_categories = len(customers), len(categories)
+    customer_codes = customer_codes.astype(np.int64)
+
+    # Distinct orders: every (customer, order) pair once, counted per customer
+    pairs, _ = pd.factorize(customer_codes * len(orders) + order_codes)
+    pair_customer = np.empty(pairs.max() + 1, dtype=np.int64)
+    pair_customer[pairs] = customer_codes
+
+    # First / last order date; datetimes go through their int64 view
+    dates = df[date].to_numpy()
+    stamps = dates.view(np.int64)
+    first_order = np.full(n_customers, np.iinfo(np.int64).max)
+    last_order = np.full(n_customers, np.iinfo(np.int64).min)
+    np.minimum.at(first_order, customer_codes, stamps)
+    np.maximum.at(last_order, customer_codes, stamps)
+    first_order, last_order = first_order.view(dates.dtype), last_order.view(dates.dtype)
+
+    # Sales by (customer, category); combinations without any line can never be preferred
+    cell = customer_codes * n_categories + category_codes
+    sales_values = df[sales].to_numpy(dtype=float)
+    category_sales = np.bincount(cell, weights=sales_values, minlength=n_customers * n_categories)
+    category_sales = category_sales.reshape(n_customers, n_categories)
+    present = np.bincount(cell, minlength=n_customers * n_categories).reshape(n_customers, n_categories) > 0
+    preferred = np.where(present, category_sales, -np.inf).argmax(axis=1)
+
+    as_of = np.datetime64(as_of) if as_of is not None else dates.max()
+    return CustomerFeatures(
+        customers=pd.Index(customers, name=customer),
+        categories=pd.Index(categories, name=category),
+        order_lines=np.bincount(customer_codes, minlength=n_customers),
+        orders=np.bincount(pair_customer, minlength=n_customers),
+        monetary=np.bincount(customer_codes, weights=sales_values, minlength=n_customers),
+        profit=np.bincount(customer_codes, weights=df[profit].to_numpy(dtype=float), minlength=n_customers),
+        first_order=first_order,
+        last_order=last_order,
+        recency_days=((as_of - last_order) // np.timedelta64(1, 'D')).astype(np.int64),
+        category_sales=category_sales,
+        preferred=preferred,
+        line_customer=customer_codes,
+    )
+
+
+def quantile_scores(values: np.ndarray, q: int, labels: Optional[Sequence[str]] = None):
+    """
+    Quantile bin (0..q-1) of every value, column by column, like `pd.qcut(column, q)`.
+
+    values : (rows,) or (rows, features). Edges of all features come from one
+        np.quantile call; bins are right-closed and the minimum falls in bin 0.
+    labels : for a 1-D input, return an ordered Categorical with these labels.
+    """
+    values = np.asarray(values, dtype=float)
+    flat = values.ndim == 1
+    matrix = values[:, None] if flat else values
+    edges = np.quantile(matrix, np.linspace(0, 1, q + 1), axis=0)
+    bins = np.empty(matrix.shape, dtype=np.int64)
+    for column in range(matrix.shape[1]):
+        bins[:, column] = np.searchsorted(edges[1:-1, column], matrix[:, column], side='left')
+    if not flat:
+        return bins
+    if labels is None:
+        return bins[:, 0]
+    return pd.Categorical.from_codes(bins[:, 0], categories=list(labels), ordered=True)
@@ -6,9 +6,77 @@ Author: Fefelov
 Date: October 31, 2025
 """
 
-import numpy as np
-from scipy import stats
+import argparse
+import json
 import math
+from dataclasses import asdict, dataclass, field
+from typing import List
+
+from scipy import stats
+
+
+@dataclass(slots=True)
+class SampleSizeResult:
+    """Required sample for comparing two proportions."""
+
+    n_per_group: int
+    total_sample: int
+    p1: float
+    p2: float
+    absolute_difference: float
+    relative_improvement: float
+    effect_size: float
+    z_alpha: float
+    z_beta: float
+    alpha: float
+    power: float
+    test_type: str
+
+
+@dataclass(slots=True)
+class DurationEstimate:
+    """Days needed to collect the sample and observe 7-day retention."""
+
+    n_total: int
+    n_required: int
+    dau: int
+    traffic_split: float
+    variance_reduction: float
+    users_per_day: float
+    days_to_collect: int
+    observation_period: int
+    total_days: int
+
+
+@dataclass(slots=True)
+class Scenario:
+    title: str
+    name: str
+    label: str
+    mde: float
+    result: SampleSizeResult
+    duration: DurationEstimate
+
+
+@dataclass(slots=True)
+class SampleSizePlan:
+    total_users: int
+    dau: int
+    baseline_retention: float
+    scenarios: List[Scenario] = field(default_factory=list)
+
+    @property
+    def main(self) -> Scenario:
+        return self.scenarios[0]
+
+
+# title, scenario name, table label, relative MDE, power, two-sided
+SCENARIOS = [
+    ('SCENARIO 1: RECOMMENDED (Main)', '', 'Main (Recommended)', 0.05, 0.80, True),
+    ('SCENARIO 2: HIGHER POWER', '5% improvement with 90% power', 'Higher Power', 0.05, 0.90, True),
+    ('SCENARIO 3: LARGER EFFECT', '10% improvement with 80% power', 'Larger Effect', 0.10, 0.80, True),
+    ('SCENARIO 4: ONE-SIDED TEST (For Comparison)', '5% improvement with one-sided test', 'One-sided', 0.05, 0.80, False),
+]
 
 
 def calculate_sample_size_binomial(
@@ -17,7 +85,7 @@ def calculate_sample_size_binomial(
     alpha: float = 0.05,
     power: float = 0.80,
     two_sided: bool = True
-) -> dict:
+) -> SampleSizeResult:
     """
     Calculate sample size for comparing two proportions (binomial metric).
     
@@ -36,7 +104,7 @@ def calculate_sample_size_binomial(
     
     Returns:
     --------
-    dict : Dictionary with calculation results
+    SampleSizeResult : calculation results
     """
     
     # Z-values
@@ -60,23 +128,23 @@ def calculate_sample_size_binomial(
     # Relative improvement
     relative_improvement = (p2 - p1) / p1
     
-    return {
-        'n_per_group': math.ceil(n_per_group),
-        'total_sample': math.ceil(n_per_group * 2),
-        'p1': p1,
-        'p2': p2,
-        'absolute_difference': p2 - p1,
-        'relative_improvement': relative_improvement,
-        'effect_size': effect_size,
-        'z_alpha': z_alpha,
-        'z_beta': z_beta,
-        'alpha': alpha,
-        'power': power,
-        'test_type': 'two-sided' if two_sided else 'one-sided'
-    }
-
-
-def print_results(results: dict, scenario_name: str = ""):
+    return SampleSizeResult(
+        n_per_group=math.ceil(n_per_group),
+        total_sample=math.ceil(n_per_group * 2),
+        p1=p1,
+        p2=p2,
+        absolute_difference=p2 - p1,
+        relative_improvement=relative_improvement,
+        effect_size=effect_size,
+        z_alpha=z_alpha,
+        z_beta=z_beta,
+        alpha=alpha,
+        power=power,
+        test_type='two-sided' if two_sided else 'one-sided',
+    )
+
+
+def print_results(results: SampleSizeResult, scenario_name: str = ""):
     """Print formatted results."""
     if scenario_name:
         print(f"\n{'='*70}")
@@ -84,27 +152,28 @@ def print_results(results: dict, scenario_name: str = ""):
         print(f"{'='*70}")
     
     print(f"\nInput Parameters:")
-    print(f"  Baseline proportion (p1):     {results['p1']:.4f} ({results['p1']*100:.2f}%)")
-    print(f"  Expected proportion (p2):     {results['p2']:.4f} ({results['p2']*100:.2f}%)")
-    print(f"  Absolute difference:          {results['absolute_difference']:.4f} ({results['absolute_difference']*100:.2f} pp)")
-    print(f"  Relative improvement:         {results['relative_improvement']*100:.2f}%")
-    print(f"  Significance level (α):       {results['alpha']:.4f}")
-    print(f"  Statistical power (1-β):      {results['power']:.4f}")
-    print(f"  Test type:                    {results['test_type']}")
+    print(f"  Baseline proportion (p1):     {results.p1:.4f} ({results.p1*100:.2f}%)")
+    print(f"  Expected proportion (p2):     {results.p2:.4f} ({results.p2*100:.2f}%)")
+    print(f"  Absolute difference:          {results.absolute_difference:.4f} ({results.absolute_difference*100:.2f} pp)")
+    print(f"  Relative improvement:         {results.relative_improvement*100:.2f}%")
+    print(f"  Significance level (α):       {results.alpha:.4f}")
+    print(f"  Statistical power (1-β):      {results.power:.4f}")
+    print(f"  Test type:                    {results.test_type}")
     
     print(f"\nCalculated Values:")
-    print(f"  Z(α/2):                       {results['z_alpha']:.4f}")
-    print(f"  Z(β):                         {results['z_beta']:.4f}")
-    print(f"  Effect size (Cohen's h):      {results['effect_size']:.4f}")
+    print(f"  Z(α/2):                       {results.z_alpha:.4f}")
+    print(f"  Z(β):                         {results.z_beta:.4f}")
+    print(f"  Effect size (Cohen's h):      {results.effect_size:.4f}")
     
     print(f"\n{'*'*70}")
     print(f"RESULTS:")
-    print(f"  Sample size per group:        {results['n_per_group']:,} users")
-    print(f"  Total sample size:            {results['total_sample']:,} users")
+    print(f"  Sample size per group:        {results.n_per_group:,} users")
+    print(f"  Total sample size:            {results.total_sample:,} users")
     print(f"{'*'*70}")
 
 
-def estimate_test_duration(n_total: int, dau: int, traffic_split: float = 0.5):
+def estimate_test_duration(n_total: int, dau: int, traffic_split: float = 0.5,
+                           variance_reduction: float = 0.0) -> DurationEstimate:
     """
     Estimate test duration based on available traffic.
     
@@ -116,25 +185,66 @@ def estimate_test_duration(n_total: int, dau: int, traffic_split: float = 0.5):
         Daily Active Users
     traffic_split : float
         Proportion of traffic allocated to experiment (default: 0.5 for 50/50 split)
+    variance_reduction : float
+        Share of metric variance removed by CUPED / regression adjustment
+        (default: 0.0). The required sample scales with the variance, so
+        0.3 means 30% fewer users are needed.
     """
+    if not 0 <= variance_reduction < 1:
+        raise ValueError("variance_reduction must be in [0, 1)")
+    
+    n_required = math.ceil(n_total * (1 - variance_reduction))
     users_per_day = dau * traffic_split
-    days_to_collect = math.ceil(n_total / users_per_day)
+    days_to_collect = math.ceil(n_required / users_per_day)
     observation_period = 7  # For 7-day retention
     
-    total_days = days_to_collect + observation_period
-    
+    return DurationEstimate(
+        n_total=n_total,
+        n_required=n_required,
+        dau=dau,
+        traffic_split=traffic_split,
+        variance_reduction=variance_reduction,
+        users_per_day=users_per_day,
+        days_to_collect=days_to_collect,
+        observation_period=observation_period,
+        total_days=days_to_collect + observation_period,
+    )
+
+
+def print_duration(estimate: DurationEstimate):
+    """Print formatted test duration estimate."""
     print(f"\nTest Duration Estimate:")
-    print(f"  DAU:                          {dau:,} users")
-    print(f"  Traffic allocation:           {traffic_split*100:.0f}%")
-    print(f"  Users per day in experiment:  {int(users_per_day):,} users")
-    print(f"  Days to collect sample:       {days_to_collect} days")
-    print(f"  Observation period (7-day):   {observation_period} days")
-    print(f"  Minimum total duration:       {total_days} days")
+    print(f"  DAU:                          {estimate.dau:,} users")
+    print(f"  Traffic allocation:           {estimate.traffic_split*100:.0f}%")
+    if estimate.variance_reduction > 0:
+        print(f"  Variance reduction (CUPED):   {estimate.variance_reduction*100:.0f}%")
+        print(f"  Adjusted sample size:         {estimate.n_required:,} users (from {estimate.n_total:,})")
+    print(f"  Users per day in experiment:  {int(estimate.users_per_day):,} users")
+    print(f"  Days to collect sample:       {estimate.days_to_collect} days")
+    print(f"  Observation period (7-day):   {estimate.observation_period} days")
+    print(f"  Minimum total duration:       {estimate.total_days} days")
     print(f"  Recommended duration:         14-21 days (for stability)")
 
 
-def main():
-    """Main execution function."""
+def plan_scenarios(total_users: int = 1_000_000, dau: int = 200_000,
+                   baseline_retention: float = 0.41) -> SampleSizePlan:
+    """Sample size and duration of every scenario in SCENARIOS; nothing is printed."""
+    plan = SampleSizePlan(total_users, dau, baseline_retention)
+    for title, name, label, mde, power, two_sided in SCENARIOS:
+        result = calculate_sample_size_binomial(
+            p1=baseline_retention,
+            p2=baseline_retention * (1 + mde),
+            alpha=0.05,
+            power=power,
+            two_sided=two_sided
+        )
+        duration = estimate_test_duration(result.total_sample, dau, traffic_split=0.5)
+        plan.scenarios.append(Scenario(title, name, label, mde, result, duration))
+    return plan
+
+
+def print_plan(plan: SampleSizePlan):
+    """Print the full report: scenarios, comparison table, feasibility and recommendations."""
     
     print("="*70)
     print("SAMPLE SIZE CALCULATOR FOR MELODYFLOW A/B TEST")
@@ -142,75 +252,18 @@ def main():
     print("Metric: 7-day Retention Rate")
     print("="*70)
     
-    # Given data
-    total_users = 1_000_000
-    dau = 200_000  # 20% of total users
-    baseline_retention = 0.41
-    
     print(f"\nCurrent Product Metrics:")
-    print(f"  Total users:                  {total_users:,}")
-    print(f"  DAU (20%):                    {dau:,}")
-    print(f"  Baseline 7-day retention:     {baseline_retention*100:.1f}%")
-    
-    # Scenario 1: Main scenario (5% relative improvement, 80% power)
-    print("\n" + "="*70)
-    print("SCENARIO 1: RECOMMENDED (Main)")
-    print("="*70)
-    
-    results_main = calculate_sample_size_binomial(
-        p1=0.41,
-        p2=0.41 * 1.05,  # 5% relative improvement
-        alpha=0.05,
-        power=0.80,
-        two_sided=True
-    )
-    print_results(results_main)
-    estimate_test_duration(results_main['total_sample'], dau, traffic_split=0.5)
-    
-    # Scenario 2: Higher power (90%)
-    print("\n" + "="*70)
-    print("SCENARIO 2: HIGHER POWER")
-    print("="*70)
-    
-    results_high_power = calculate_sample_size_binomial(
-        p1=0.41,
-        p2=0.41 * 1.05,
-        alpha=0.05,
-        power=0.90,
-        two_sided=True
-    )
-    print_results(results_high_power, "5% improvement with 90% power")
-    estimate_test_duration(results_high_power['total_sample'], dau, traffic_split=0.5)
-    
-    # Scenario 3: Larger effect (10% relative improvement)
-    print("\n" + "="*70)
-    print("SCENARIO 3: LARGER EFFECT")
-    print("="*70)
-    
-    results_large_effect = calculate_sample_size_binomial(
-        p1=0.41,
-        p2=0.41 * 1.10,  # 10% relative improvement
-        alpha=0.05,
-        power=0.80,
-        two_sided=True
-    )
-    print_results(results_large_effect, "10% improvement with 80% power")
-    estimate_test_duration(results_large_effect['total_sample'], dau, traffic_split=0.5)
-    
-    # Scenario 4: One-sided test (for comparison)
-    print("\n" + "="*70)
-    print("SCENARIO 4: ONE-SIDED TEST (For Comparison)")
-    print("="*70)
-    
-    results_one_sided = calculate_sample_size_binomial(
-        p1=0.41,
-        p2=0.41 * 1.05,
-        alpha=0.05,
-        power=0.80,
-        two_sided=False
-    )
-    print_results(results_one_sided, "5% improvement with one-sided test")
-    estimate_test_duration(results_one_sided['total_sample'], dau, traffic_split=0.5)
+    print(f"  Total users:                  {plan.total_users:,}")
+    print(f"  DAU (20%):                    {plan.dau:,}")
+    print(f"  Baseline 7-day retention:     {plan.baseline_retention*100:.1f}%")
+    
+    for scenario in plan.scenarios:
+        print("\n" + "="*70)
+        print(scenario.title)
+        print("="*70)
+        
+        print_results(scenario.result, scenario.name)
+        print_duration(scenario.duration)
     
     # Summary comparison
     print("\n" + "="*70)
@@ -219,10 +272,10 @@ def main():
     
     print(f"\n{'Scenario':<30} {'MDE':<8} {'Power':<8} {'Test Type':<12} {'n/group':<10} {'Total':<10} {'Duration*'}")
     print("-" * 100)
-    print(f"{'Main (Recommended)':<30} {'5%':<8} {'80%':<8} {'Two-sided':<12} {results_main['n_per_group']:<10,} {results_main['total_sample']:<10,} {'8-14 days'}")
-    print(f"{'Higher Power':<30} {'5%':<8} {'90%':<8} {'Two-sided':<12} {results_high_power['n_per_group']:<10,} {results_high_power['total_sample']:<10,} {'8-14 days'}")
-    print(f"{'Larger Effect':<30} {'10%':<8} {'80%':<8} {'Two-sided':<12} {results_large_effect['n_per_group']:<10,} {results_large_effect['total_sample']:<10,} {'8-14 days'}")
-    print(f"{'One-sided':<30} {'5%':<8} {'80%':<8} {'One-sided':<12} {results_one_sided['n_per_group']:<10,} {results_one_sided['total_sample']:<10,} {'8-14 days'}")
+    for scenario in plan.scenarios:
+        result = scenario.result
+        mde, power = f"{scenario.mde*100:.0f}%", f"{result.power*100:.0f}%"
+        print(f"{scenario.label:<30} {mde:<8} {power:<8} {result.test_type.capitalize():<12} {result.n_per_group:<10,} {result.total_sample:<10,} {'8-14 days'}")
     
     print("\n* Duration includes collection period + 7-day observation + buffer for stability")
     
@@ -231,10 +284,11 @@ def main():
     print("FEASIBILITY ANALYSIS")
     print("="*70)
     
-    required_percentage = (results_main['total_sample'] / dau) * 100
+    results_main = plan.main.result
+    required_percentage = (results_main.total_sample / plan.dau) * 100
     
-    print(f"\nRequired sample:              {results_main['total_sample']:,} users")
-    print(f"Available DAU:                {dau:,} users")
+    print(f"\nRequired sample:              {results_main.total_sample:,} users")
+    print(f"Available DAU:                {plan.dau:,} users")
     print(f"Required % of DAU:            {required_percentage:.1f}%")
     print(f"\n✅ FEASIBILITY: The test is HIGHLY FEASIBLE with current user base.")
     print(f"   We only need {required_percentage:.1f}% of daily active users.")
@@ -247,8 +301,8 @@ def main():
     
     print(f"""
 1. Recommended Design:
-   - Sample size per group: {results_main['n_per_group']:,} users
-   - Total sample size: {results_main['total_sample']:,} users
+   - Sample size per group: {results_main.n_per_group:,} users
+   - Total sample size: {results_main.total_sample:,} users
    - Traffic split: 50% control / 50% test
    - Test duration: 14-21 days (recommended for stability)
    - Metric: 7-day retention rate
@@ -275,5 +329,20 @@ def main():
     print("="*70)
 
 
+def main(argv=None) -> SampleSizePlan:
+    """Main execution function."""
+    parser = argparse.ArgumentParser(description="Sample size calculator for the MelodyFlow A/B test")
+    parser.add_argument("--report", choices=["text", "quiet", "json"], default="text",
+                        help="Output: formatted report, nothing, or the plan as JSON")
+    args = parser.parse_args(argv)
+    
+    plan = plan_scenarios()
+    if args.report == "text":
+        print_plan(plan)
+    elif args.report == "json":
+        print(json.dumps(asdict(plan), indent=2))
+    return plan
+
+
 if __name__ == "__main__":
     main()
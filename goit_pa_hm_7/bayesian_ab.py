@@ -0,0 +1,190 @@
+"""
+Bayesian Beta-Binomial comparison of conversions for many A/B cells at once.
+
+Each cell (experiment x metric x segment) has a Beta posterior per variant:
+Beta(prior_alpha + successes, prior_beta + failures). Daily counts update the
+posteriors in place, since the Beta prior is conjugate to the binomial.
+
+Summaries per cell:
+- posterior means and equal-tailed credible intervals
+- P(B > A) and expected loss of choosing A or B
+- credible interval of the difference B - A (Cornish-Fisher, closed form)
+
+When both posteriors are concentrated (alpha, beta >= NORMAL_THRESHOLD) the
+comparison uses the normal approximation in closed form. Other cells integrate
+over B's posterior density with Gauss-Legendre nodes shared by every cell,
+while the A side is exact given B = b:
+
+    P(A < b) = I_b(alpha_A, beta_A)
+    E[A; A < b] = mean_A * I_b(alpha_A + 1, beta_A)
+
+This is deterministic and far more accurate than joint (A, B) Monte Carlo
+draws at the same cost.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import special, stats
+
+NORMAL_THRESHOLD = 100
+QUADRATURE_NODES = 64
+
+
+class BetaBinomialCells:
+    """Beta posteriors for variants A and B in `n_cells` independent cells."""
+
+    def __init__(
+        self,
+        n_cells: int,
+        prior_alpha: float = 1.0,
+        prior_beta: float = 1.0,
+        n_nodes: int = QUADRATURE_NODES,
+    ):
+        self.alpha = np.full((2, n_cells), prior_alpha, dtype=float)
+        self.beta = np.full((2, n_cells), prior_beta, dtype=float)
+        self.nodes, self.weights = np.polynomial.legendre.leggauss(n_nodes)
+
+    @property
+    def n_cells(self) -> int:
+        return self.alpha.shape[1]
+
+    def update(self, successes_a, trials_a, successes_b, trials_b) -> None:
+        """Add new counts (e.g. one day of traffic) to the posteriors of all cells."""
+        shape = (self.n_cells,)
+        successes = np.array([np.broadcast_to(successes_a, shape), np.broadcast_to(successes_b, shape)], dtype=float)
+        trials = np.array([np.broadcast_to(trials_a, shape), np.broadcast_to(trials_b, shape)], dtype=float)
+        self.alpha += successes
+        self.beta += trials - successes
+
+    def posterior_mean(self) -> np.ndarray:
+        return self.alpha / (self.alpha + self.beta)
+
+    def posterior_var(self) -> np.ndarray:
+        total = self.alpha + self.beta
+        return self.alpha * self.beta / (total ** 2 * (total + 1))
+
+    def credible_interval(self, level: float = 0.95):
+        """
+        Equal-tailed credible interval of each variant's conversion, shape (2, n_cells) each.
+
+        Exact Beta quantiles for small posteriors; concentrated ones use the
+        Cornish-Fisher expansion, which is accurate there and much cheaper.
+        """
+        a, b = self.alpha, self.beta
+        mean, sd = self.posterior_mean(), np.sqrt(self.posterior_var())
+        skew = 2 * (b - a) * np.sqrt(a + b + 1) / ((a + b + 2) * np.sqrt(a * b))
+        concentrated = np.minimum(a, b) >= NORMAL_THRESHOLD
+
+        bounds = []
+        for q in ((1 - level) / 2, (1 + level) / 2):
+            z = stats.norm.ppf(q)
+            bound = mean + sd * (z + (z ** 2 - 1) * skew / 6)
+            bound[~concentrated] = special.betaincinv(a[~concentrated], b[~concentrated], q)
+            bounds.append(bound)
+        return bounds[0], bounds[1]
+
+    def difference_interval(self, level: float = 0.95):
+        """
+        Credible interval of B - A via the Cornish-Fisher expansion.
+
+        Cumulants of a difference of independent variables add (odd ones change
+        sign for A), and Beta cumulants are closed-form, so skewed small-sample
+        posteriors get accurate tails without sampling.
+        """
+        a, b = self.alpha, self.beta
+        total = a + b
+        var = self.posterior_var()
+        skew = 2 * (b - a) * np.sqrt(total + 1) / ((total + 2) * np.sqrt(a * b))
+        excess = 6 * ((a - b) ** 2 * (total + 1) - a * b * (total + 2)) / (a * b * (total + 2) * (total + 3))
+
+        mean = self.posterior_mean()
+        m = mean[1] - mean[0]
+        v = var[0] + var[1]
+        s = np.sqrt(v)
+        g = (skew[1] * var[1] ** 1.5 - skew[0] * var[0] ** 1.5) / s ** 3
+        k = (excess[0] * var[0] ** 2 + excess[1] * var[1] ** 2) / v ** 2
+
+        bounds = []
+        for q in ((1 - level) / 2, (1 + level) / 2):
+            z = stats.norm.ppf(q)
+            w = z + (z ** 2 - 1) * g / 6 + (z ** 3 - 3 * z) * k / 24 - (2 * z ** 3 - 5 * z) * g ** 2 / 36
+            bounds.append(m + s * w)
+        return bounds[0], bounds[1]
+
+    def _normal_cells(self) -> np.ndarray:
+        return (np.minimum(self.alpha, self.beta) >= NORMAL_THRESHOLD).all(axis=0)
+
+    def compare(self, level: float = 0.95, cells: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        P(B > A), expected losses and the credible interval of B - A for each cell.
+
+        expected_loss_a = E[max(B - A, 0)] (cost of shipping A), and vice versa.
+        """
+        mean = self.posterior_mean()
+        var = self.posterior_var()
+        tail = (1 - level) / 2
+
+        prob_b = np.empty(self.n_cells)
+        loss_a = np.empty(self.n_cells)
+        loss_b = np.empty(self.n_cells)
+        diff_low, diff_high = self.difference_interval(level)
+
+        # Closed form: B - A ~ N(m, s^2)
+        normal = self._normal_cells()
+        m = mean[1, normal] - mean[0, normal]
+        s = np.sqrt(var[0, normal] + var[1, normal])
+        z = m / s
+        prob_b[normal] = stats.norm.cdf(z)
+        loss_a[normal] = s * stats.norm.pdf(z) + m * stats.norm.cdf(z)
+        loss_b[normal] = s * stats.norm.pdf(z) - m * stats.norm.cdf(-z)
+
+        # Quadrature over B's density with the exact conditional distribution of A
+        small = ~normal
+        if small.any():
+            a_alpha, a_beta = self.alpha[0, small, None], self.beta[0, small, None]
+            b_alpha, b_beta = self.alpha[1, small, None], self.beta[1, small, None]
+            spread = 12 * np.sqrt(var[1, small, None])
+            lo = np.clip(mean[1, small, None] - spread, 0, 1)
+            hi = np.clip(mean[1, small, None] + spread, 0, 1)
+            b = lo + (hi - lo) * (self.nodes + 1) / 2
+            with np.errstate(divide='ignore', invalid='ignore'):
+                log_pdf = (b_alpha - 1) * np.log(b) + (b_beta - 1) * np.log1p(-b) - special.betaln(b_alpha, b_beta)
+            weights = self.weights * np.nan_to_num(np.exp(log_pdf))
+            weights /= weights.sum(axis=1, keepdims=True)
+
+            a_below = special.betainc(a_alpha, a_beta, b)
+            a_mass_below = mean[0, small, None] * special.betainc(a_alpha + 1, a_beta, b)
+            prob_b[small] = (weights * a_below).sum(axis=1)
+            loss_a[small] = (weights * (b * a_below - a_mass_below)).sum(axis=1)
+            loss_b[small] = loss_a[small] - (mean[1, small] - mean[0, small])
+
+        ci_low, ci_high = self.credible_interval(level)
+        result = pd.DataFrame({
+            'mean_a': mean[0],
+            'mean_b': mean[1],
+            'ci_a_lower': ci_low[0],
+            'ci_a_upper': ci_high[0],
+            'ci_b_lower': ci_low[1],
+            'ci_b_upper': ci_high[1],
+            'prob_b_beats_a': prob_b,
+            'expected_loss_a': loss_a,
+            'expected_loss_b': loss_b,
+            'diff_lower': diff_low,
+            'diff_upper': diff_high,
+            'method': np.where(normal, 'normal', 'quadrature'),
+        })
+        return result if cells is None else result.iloc[cells]
+
+def compare_conversions(
+    successes_a, trials_a, successes_b, trials_b,
+    prior_alpha: float = 1.0, prior_beta: float = 1.0, level: float = 0.95,
+) -> pd.DataFrame:
+    """One-shot Bayesian comparison for arrays of cells (or scalars for a single test)."""
+    successes_a, trials_a, successes_b, trials_b = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(v, dtype=float)) for v in (successes_a, trials_a, successes_b, trials_b))
+    )
+    cells = BetaBinomialCells(successes_a.size, prior_alpha, prior_beta)
+    cells.update(successes_a, trials_a, successes_b, trials_b)
+    return cells.compare(level)
@@ -3,7 +3,8 @@ from dataclasses import dataclass
 from typing import Tuple
 
 import pandas as pd
-import xlwt
+
+from bayesian_ab import compare_conversions
 
 Z_95 = 1.96
 
@@ -155,6 +156,9 @@ def main():
     ]
     df_notes = pd.DataFrame(notes_rows, columns=["Notes"])
 
+    # xlwt is only needed for writing the .xls; the statistics helpers above import without it
+    import xlwt
+
     out_path = "Fefelov_PA_assignment_7.xls"
     wb = xlwt.Workbook()
 
@@ -205,6 +209,14 @@ def main():
         f"({res2['ci_diff_lower']*100:.2f} pp, {res2['ci_diff_upper']*100:.2f} pp)"
     )
 
+    bayes = compare_conversions(res2["x_a"], n_a, res2["x_b"], n_b).iloc[0]
+    print("\nTask 2 (Bayesian, Beta(1, 1) prior):")
+    print(
+        f"P(B > A)={bayes['prob_b_beats_a']:.4f}, expected loss A={bayes['expected_loss_a']:.5f}, "
+        f"B={bayes['expected_loss_b']:.2e}\n"
+        f"95% credible interval for diff=({bayes['diff_lower']:.4f}, {bayes['diff_upper']:.4f})"
+    )
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+"""
+Kaplan-Meier curves and log-rank tests for many groups at once.
+
+Lesson 07 fits `lifelines.KaplanMeierFitter` per group in a loop and runs
+`logrank_test` for one pair. Here all units are sorted once into a risk-set
+table: one row per (segment, distinct time) with, per variant, the number at
+risk, the number of events and the number censored. Everything else is read
+off that table with vectorised operations:
+
+- KM survival S(t) = prod(1 - d/n) is a cumulative sum of log factors that
+  restarts at every segment boundary, for all segments and variants together
+- Greenwood variance and the log(-log) confidence band use the same grouped sum
+- log-rank O - E and variance for a variant pair are row-wise sums over the
+  same table, aggregated per segment with bincount
+
+Formulas match lifelines (KaplanMeierFitter, logrank_test).
+"""
+
+from itertools import combinations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+
+class RiskSets:
+    """
+    Risk-set table of time-to-event data split by segment and variant.
+
+    durations : time to the event (or to censoring) of every unit
+    events    : 1 if the event was observed, 0 if censored (None -> all observed)
+    variants  : group of every unit within its segment, e.g. 'reminder' yes/no
+    segments  : optional independent strata (country x platform, ...)
+    """
+
+    def __init__(self, durations, events=None, variants=None, segments=None):
+        durations = np.asarray(durations, dtype=float)
+        events = np.ones(durations.size, dtype=bool) if events is None else np.asarray(events).astype(bool)
+        if variants is None:
+            variant_codes, self.variants = np.zeros(durations.size, dtype=np.int64), pd.Index(['all'])
+        else:
+            variant_codes, self.variants = pd.factorize(np.asarray(variants), sort=True)
+        if segments is None:
+            segment_codes, self.segments = np.zeros(durations.size, dtype=np.int64), None
+        else:
+            segment_codes, self.segments = pd.factorize(np.asarray(segments), sort=True)
+
+        n_variants = len(self.variants)
+        n_segments = 1 if self.segments is None else len(self.segments)
+
+        # One row per distinct (segment, time), sorted by segment and then time
+        time_codes, times = pd.factorize(durations, sort=True)
+        rows, keys = pd.factorize(segment_codes * len(times) + time_codes, sort=True)
+        self.row_segment = keys // len(times)
+        self.row_time = times[keys % len(times)]
+        n_rows = keys.size
+
+        cells = rows * n_variants + variant_codes
+        self.observed = np.bincount(cells[events], minlength=n_rows * n_variants).reshape(n_rows, n_variants)
+        leaving = np.bincount(cells, minlength=n_rows * n_variants).reshape(n_rows, n_variants)
+        self.censored = leaving - self.observed
+
+        # At risk = units of the segment minus those that left strictly earlier in it
+        totals = np.bincount(segment_codes * n_variants + variant_codes, minlength=n_segments * n_variants)
+        totals = totals.reshape(n_segments, n_variants)
+        self.at_risk = totals[self.row_segment] - self._segment_cumsum(leaving, exclusive=True)
+
+    def _segment_cumsum(self, values: np.ndarray, exclusive: bool = False) -> np.ndarray:
+        """Cumulative sum down the rows that restarts at every segment boundary."""
+        running = np.cumsum(values, axis=0)
+        before = running - values
+        starts = np.flatnonzero(np.diff(self.row_segment, prepend=-1))
+        offset = np.repeat(before[starts], np.diff(np.append(starts, len(values))), axis=0)
+        return (before if exclusive else running) - offset
+
+    def kaplan_meier(self, level: float = 0.95) -> pd.DataFrame:
+        """
+        KM curve of every (segment, variant): one row per time with events or censoring.
+
+        Columns follow lifelines' event table and survival function: at_risk,
+        observed, censored, survival and the exponential Greenwood CI.
+        """
+        n, d = self.at_risk, self.observed
+        with np.errstate(divide='ignore', invalid='ignore'):
+            hazard = np.where(n > 0, d / n, 0.0)
+            greenwood_terms = np.where(n > d, d / (n * (n - d)), 0.0)
+        # log(0) when everyone at risk fails; count those rows instead of summing -inf
+        extinct = hazard >= 1
+        log_survival = self._segment_cumsum(np.log1p(-np.where(extinct, 0.0, hazard)))
+        survival = np.where(self._segment_cumsum(extinct.astype(np.int64)) > 0, 0.0, np.exp(log_survival))
+        greenwood = self._segment_cumsum(greenwood_terms)
+
+        z = stats.norm.ppf((1 + level) / 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            spread = z * np.sqrt(greenwood) / np.abs(np.log(survival))
+            ci_lower = survival ** np.exp(spread)
+            ci_upper = survival ** np.exp(-spread)
+        at_origin = survival == 1
+        ci_lower[at_origin], ci_upper[at_origin] = 1.0, 1.0
+
+        rows, variants = np.nonzero(self.observed + self.censored)
+        order = np.argsort(self.row_segment[rows] * len(self.variants) + variants, kind='stable')
+        rows, variants = rows[order], variants[order]
+        curves = pd.DataFrame({
+            'variant': self.variants[variants],
+            'time': self.row_time[rows],
+            'at_risk': n[rows, variants],
+            'observed': d[rows, variants],
+            'censored': self.censored[rows, variants],
+            'survival': survival[rows, variants],
+            'ci_lower': ci_lower[rows, variants],
+            'ci_upper': ci_upper[rows, variants],
+        })
+        if self.segments is not None:
+            curves.insert(0, 'segment', self.segments[self.row_segment[rows]])
+        return curves
+
+    def logrank(self, pairs: Optional[list] = None) -> pd.DataFrame:
+        """
+        Two-sample log-rank test for every pair of variants in every segment.
+
+        pairs : list of (variant_a, variant_b); all pairs by default.
+        """
+        names = list(self.variants)
+        pairs = list(combinations(names, 2)) if pairs is None else pairs
+        n_segments = 1 if self.segments is None else len(self.segments)
+
+        def per_segment(values):
+            return np.bincount(self.row_segment, weights=values, minlength=n_segments)
+
+        results = []
+        for name_a, name_b in pairs:
+            a, b = names.index(name_a), names.index(name_b)
+            n_a, n_b = self.at_risk[:, a], self.at_risk[:, b]
+            n = n_a + n_b
+            d = self.observed[:, a] + self.observed[:, b]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                share_a = np.where(n > 0, n_a / n, 0.0)
+                variance = np.where(n > 1, d * share_a * (1 - share_a) * (n - d) / (n - 1), 0.0)
+
+            observed_a = per_segment(self.observed[:, a])
+            observed_b = per_segment(self.observed[:, b])
+            expected_a = per_segment(d * share_a)
+            expected_b = observed_a + observed_b - expected_a
+            var = per_segment(variance)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                statistic = np.where(var > 0, (observed_a - expected_a) ** 2 / var, np.nan)
+            result = pd.DataFrame({
+                'variant_a': name_a,
+                'variant_b': name_b,
+                'observed_a': observed_a,
+                'expected_a': expected_a,
+                'observed_b': observed_b,
+                'expected_b': expected_b,
+                'test_statistic': statistic,
+                'p_value': stats.chi2.sf(statistic, 1),
+            })
+            if self.segments is not None:
+                result.insert(0, 'segment', self.segments)
+            results.append(result)
+        return pd.concat(results, ignore_index=True)
+
+
+def median_survival(curves: pd.DataFrame) -> pd.Series:
+    """First time the KM curve drops to 0.5 or below (inf if it never does)."""
+    keys = [c for c in ('segment', 'variant') if c in curves.columns]
+    medians = curves[curves['survival'] <= 0.5].groupby(keys, sort=True)['time'].first()
+    index = curves[keys].drop_duplicates().set_index(keys).index
+    return medians.reindex(index, fill_value=np.inf).rename('median_survival')